@@ -0,0 +1,48 @@
+"""
+Benchmark the access_filters Status rules: column masks vs the iterrows engine.
+
+Usage: python -m benchmarks.bench_apply_filter_maf
+"""
+
+import pandas as pd
+from postprocessing_variant_calls.maf.helper import read_delimited
+from postprocessing_variant_calls.maf.filter.filter_helpers import (
+    apply_filter_maf,
+    _apply_filter_maf_iterrows,
+    blocklist_keys,
+)
+from benchmarks.synthetic import timed
+
+SIZES = [1_200, 12_000]
+ARGS = {
+    "tumor_TD_min": 20,
+    "normal_TD_min": 20,
+    "tumor_vaf_germline_thres": 0.4,
+    "normal_vaf_germline_thres": 0.4,
+    "tier_one_alt_min": 3,
+    "tier_two_alt_min": 5,
+    "min_n_curated_samples_alt_detected": 2,
+    "tn_ratio_thres": 5,
+}
+
+
+def main():
+    fixture = read_delimited("tests/data/maf/filter/pre_filter.tsv")
+    args = dict(ARGS, blocklist=blocklist_keys(fixture.iloc[::7]))
+    print("rows\titerrows_s\tvectorized_s")
+    for n_rows in SIZES:
+        pre_filter_maf = pd.concat(
+            [fixture] * (n_rows // len(fixture)), ignore_index=True
+        )
+        rowwise, rowwise_time = timed(
+            _apply_filter_maf_iterrows, pre_filter_maf, **args
+        )
+        vectorized, vectorized_time = timed(
+            apply_filter_maf, pre_filter_maf, repeat=3, **args
+        )
+        assert rowwise.equals(vectorized)
+        print(f"{n_rows}\t{rowwise_time:.3f}\t{vectorized_time:.4f}")
+
+
+if __name__ == "__main__":
+    main()
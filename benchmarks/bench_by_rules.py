@@ -0,0 +1,82 @@
+"""
+Benchmark tag by_rules: one pass over the maf per rule vs rules compiled into a
+gene index and evaluated in one pass, as the number of rules grows. The mixed
+rule set constrains most rules to genes, the region set only to positions.
+
+Usage: python -m benchmarks.bench_by_rules
+"""
+
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+from postprocessing_variant_calls.maf.helper import (
+    CompiledRules,
+    _tag_by_variant_annotations_iterrows,
+)
+from benchmarks.synthetic import make_maf, timed
+
+N_ROWS = 200_000
+RULE_COUNTS = [10, 100, 500]
+N_GENES = 2_000
+RULE_SETS = ["mixed", "region"]
+
+
+def _make_rules(n_rules, genes, rule_set, seed=0):
+    rng = np.random.default_rng(seed)
+    rules = []
+    for i in range(n_rules):
+        start = int(rng.integers(1, 1_900_000))
+        bounded = rule_set == "region" or i % 2
+        rules.append(
+            {
+                "Tag_Column_Name": f"rule{i}",
+                "Hugo_Symbol": (
+                    list(rng.choice(genes, 3))
+                    if rule_set == "mixed" and i % 10
+                    else "none"
+                ),
+                "Variant_Classification": ["Missense_Mutation", "Intron"],
+                "Start_Position": start if bounded else "none",
+                "End_Position": start + 100_000 if bounded else "none",
+            }
+        )
+    return pd.DataFrame(rules)
+
+
+def _peak_mb(func, *args):
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    # the reference inserts one column per rule
+    warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+    print("rule_set\trules\titerrows_s\tcompiled_s\titerrows_peak_MB\tcompiled_peak_MB")
+    maf = make_maf(N_ROWS)
+    genes = np.array([f"GENE{i}" for i in range(N_GENES)])
+    maf["Hugo_Symbol"] = np.random.default_rng(0).choice(genes, N_ROWS)
+    for rule_set in RULE_SETS:
+        for n_rules in RULE_COUNTS:
+            rules_df = _make_rules(n_rules, genes, rule_set)
+            _, iterrows_time = timed(
+                _tag_by_variant_annotations_iterrows, maf.copy(), rules_df
+            )
+            _, compiled_time = timed(
+                lambda: CompiledRules(rules_df).evaluate(maf), repeat=3
+            )
+            iterrows_peak = _peak_mb(
+                _tag_by_variant_annotations_iterrows, maf.copy(), rules_df
+            )
+            compiled_peak = _peak_mb(lambda: CompiledRules(rules_df).evaluate(maf))
+            print(
+                f"{rule_set}\t{n_rules}\t{iterrows_time:.3f}\t{compiled_time:.3f}"
+                f"\t{iterrows_peak:.1f}\t{compiled_peak:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
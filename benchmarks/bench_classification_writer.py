@@ -0,0 +1,108 @@
+"""
+Benchmark writing the five by_variant_classification outputs: per row string joins
+written through five handles vs one buffered to_csv per output table.
+
+Usage: python -m benchmarks.bench_classification_writer
+"""
+
+import os
+import tempfile
+from contextlib import ExitStack
+import numpy as np
+import pandas as pd
+from postprocessing_variant_calls.maf.helper import (
+    CLASSIFICATION_OUTPUTS,
+    write_classification_outputs,
+)
+from postprocessing_variant_calls.maf.tag.tag_constants import MAF_TSV_COL_MAP
+from benchmarks.synthetic import timed
+
+SIZES = [20_000, 200_000]
+TAGS = [
+    "exonic",
+    "silent",
+    "nonpanel_exonic",
+    "nonpanel_silent",
+    "dropped, exonic",
+    "dropped, silent",
+]
+
+
+def _make_tagged_maf(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i, col in enumerate(MAF_TSV_COL_MAP):
+        if i % 3 == 0:
+            columns[col] = rng.random(n_rows).round(6)
+        elif i % 3 == 1:
+            columns[col] = rng.integers(0, 1000, n_rows)
+        else:
+            columns[col] = rng.choice(["c.35G>A", "p.G12D", "rs121913529", ""], n_rows)
+    maf = pd.DataFrame(columns)
+    maf["Transcript_ID"] = rng.choice(["ENST00000256078", "ENST00000269305"], n_rows)
+    maf["classification"] = rng.choice(TAGS, n_rows)
+    tx_df = pd.DataFrame(
+        {
+            "isoform": ["ENST00000256078", "ENST00000269305"],
+            "gene_name": ["KRAS", "TP53"],
+            "refseq_id": ["NM_004985.4", "NM_000546.5"],
+        }
+    )
+    return maf, tx_df
+
+
+def _write_rows(final_maf, tx_df, output_dir):
+    # the per row writer before the outputs were written as tables
+    def format_var(variant):
+        columns = map(lambda x: getattr(variant, x), MAF_TSV_COL_MAP.keys())
+        return "\t".join(map(str, columns)) + "\n"
+
+    headers = "\t".join(MAF_TSV_COL_MAP.values()) + "\n"
+    with ExitStack() as stack:
+        files = {
+            tag: stack.enter_context(open(os.path.join(output_dir, name), "w"))
+            for tag, name in CLASSIFICATION_OUTPUTS.items()
+        }
+        for file in files.values():
+            file.write(headers)
+        for variant in final_maf.itertuples(index=False):
+            for tag, file in files.items():
+                if tag not in variant.classification:
+                    continue
+                if tag == "exonic":
+                    refseq = tx_df[tx_df.isoform == variant.Transcript_ID]
+                    variant = variant._replace(
+                        Transcript_ID=refseq.refseq_id.values.tolist()
+                    )
+                file.write(format_var(variant))
+
+
+def _output_mb(output_dir):
+    return (
+        sum(
+            os.path.getsize(os.path.join(output_dir, name))
+            for name in CLASSIFICATION_OUTPUTS.values()
+        )
+        / 1e6
+    )
+
+
+def main():
+    print("rows\toutput_MB\trows_MB_per_s\ttables_MB_per_s")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for n_rows in SIZES:
+            final_maf, tx_df = _make_tagged_maf(n_rows)
+            _, rows_time = timed(_write_rows, final_maf, tx_df, output_dir)
+            rows_mb = _output_mb(output_dir)
+            _, tables_time = timed(
+                write_classification_outputs, final_maf, tx_df, output_dir, repeat=3
+            )
+            tables_mb = _output_mb(output_dir)
+            print(
+                f"{n_rows}\t{tables_mb:.1f}\t{rows_mb / rows_time:.1f}"
+                f"\t{tables_mb / tables_time:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
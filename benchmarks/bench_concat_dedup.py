@@ -0,0 +1,73 @@
+"""
+Benchmark deduplicating a concatenation: drop_duplicates over the materialized frame
+vs the hash-partitioned spill of stream_concat.
+
+Usage: python -m benchmarks.bench_concat_dedup
+"""
+
+import tempfile
+import tracemalloc
+from pathlib import Path
+import pandas as pd
+from postprocessing_variant_calls.maf.helper import stream_concat
+from benchmarks.synthetic import make_maf, timed
+
+SIZES = [200_000, 1_000_000]
+N_FILES = 4
+
+
+def _drop_duplicates(files):
+    concat_df = pd.concat(
+        [pd.read_csv(maf, sep="\t") for maf in files], axis=0, ignore_index=True
+    )
+    return concat_df.drop_duplicates(
+        subset=[
+            "Hugo_Symbol",
+            "Chromosome",
+            "Start_Position",
+            "End_Position",
+            "Reference_Allele",
+            "Tumor_Seq_Allele2",
+            "Variant_Classification",
+            "Variant_Type",
+            "HGVSc",
+            "HGVSp",
+            "HGVSp_Short",
+        ]
+    )
+
+
+def _peak_mb(func, *args, **kwargs):
+    tracemalloc.start()
+    func(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    separator = "\t"
+    print("rows\tdrop_duplicates_s\tspill_s\tdrop_duplicates_peak_MB\tspill_peak_MB")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for n_rows in SIZES:
+            files = []
+            for i in range(N_FILES):
+                # same seed across half the files, so every other file repeats its rows
+                df = make_maf(n_rows // N_FILES, seed=i % 2)
+                for col in ["Variant_Type", "HGVSc", "HGVSp", "HGVSp_Short"]:
+                    df[col] = "."
+                files.append(tmp / f"{n_rows}_{i}.maf")
+                df.to_csv(files[-1], sep="\t", index=False)
+            output = tmp / "output.maf"
+            _, drop_time = timed(_drop_duplicates, files)
+            _, spill_time = timed(stream_concat, files, output, "\t", deduplicate=True)
+            print(
+                f"{n_rows}\t{drop_time:.3f}\t{spill_time:.3f}"
+                f"\t{_peak_mb(_drop_duplicates, files):.0f}"
+                f"\t{_peak_mb(stream_concat, files, output, separator, deduplicate=True):.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark splitting a fillout by fillout_type: one isin scan per category vs a single partition.
+
+Usage: python -m benchmarks.bench_fillout_partition
+"""
+
+import tracemalloc
+import numpy as np
+from postprocessing_variant_calls.maf.helper import MAFFile
+from benchmarks.synthetic import make_maf, timed
+
+SIZES = [200_000, 2_000_000]
+CATEGORIES = [
+    ["CURATED"],
+    ["PLASMA"],
+    ["CASE"],
+    ["CONTROL"],
+    ["MATCHED_NORMAL"],
+    ["MATCHED_NORMAL", "UNMATCHED_NORMAL"],
+]
+
+
+def _split_isin(df):
+    return [df[df["fillout_type"].isin(values)] for values in CATEGORIES]
+
+
+def _split_partition(maf):
+    # as in MAFFile.extract_fillout_type, the matched normal is cut from the normals
+    partition = maf.partition_rows("fillout_type")
+    frames = [maf.take_rows(partition, values) for values in CATEGORIES[:4]]
+    normals = maf.take_rows(partition, CATEGORIES[5])
+    return frames + [normals[normals["fillout_type"] == "MATCHED_NORMAL"], normals]
+
+
+def _peak_mb(func, *args):
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    print("rows\tisin_s\tpartition_s\tisin_peak_MB\tpartition_peak_MB")
+    for n_rows in SIZES:
+        df = make_maf(n_rows)
+        df["fillout_type"] = np.random.default_rng(0).choice(
+            [
+                "CURATED",
+                "PLASMA",
+                "CASE",
+                "CONTROL",
+                "MATCHED_NORMAL",
+                "UNMATCHED_NORMAL",
+            ],
+            n_rows,
+            p=[0.7, 0.1, 0.02, 0.05, 0.01, 0.12],
+        )
+        # bypass reading a file, only the data frame is used
+        maf = MAFFile.__new__(MAFFile)
+        maf.data_frame = df
+        _, isin_time = timed(_split_isin, df, repeat=3)
+        _, partition_time = timed(_split_partition, maf, repeat=3)
+        print(
+            f"{n_rows}\t{isin_time:.3f}\t{partition_time:.3f}"
+            f"\t{_peak_mb(_split_isin, df):.0f}\t{_peak_mb(_split_partition, maf):.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark the fillout summary tables: single aggregation vs pivot_table with one groupby per statistic.
+
+Usage: python -m benchmarks.bench_fillout_summary
+"""
+
+import numpy as np
+import pandas as pd
+from postprocessing_variant_calls.maf.filter.filter_helpers import (
+    __generate_table_and_find_summary_stats as generate_summary_stats,
+    _pivot_table_summary_stats,
+)
+from benchmarks.synthetic import make_maf, timed
+
+MUTATION_KEY = [
+    "Chromosome",
+    "Start_Position",
+    "End_Position",
+    "Reference_Allele",
+    "Tumor_Seq_Allele2",
+]
+SIZES = [(500, 20), (2_000, 100)]
+
+
+def make_fillout(n_mutations, n_samples, seed=0):
+    """synthetic curated fillout, every mutation genotyped in every sample"""
+    rng = np.random.default_rng(seed)
+    mutations = make_maf(n_mutations, seed).drop_duplicates(MUTATION_KEY)[MUTATION_KEY]
+    fillout = mutations.loc[mutations.index.repeat(n_samples)].reset_index(drop=True)
+    fillout["Tumor_Sample_Barcode"] = np.tile(
+        [f"S{i}" for i in range(n_samples)], len(mutations)
+    )
+    alt = pd.Series(rng.integers(0, 20, len(fillout)))
+    ref = pd.Series(rng.integers(0, 200, len(fillout)))
+    fillout["t_alt_count_fragment_duplex"] = alt
+    fillout["t_vaf_fragment_duplex"] = np.round(alt / np.maximum(alt + ref, 1), 4)
+    fillout["summary_fragment_duplex"] = (
+        "DP="
+        + (alt + ref).astype(str)
+        + ";RD="
+        + ref.astype(str)
+        + ";AD="
+        + alt.astype(str)
+    )
+    return fillout
+
+
+def main():
+    print("mutations\tsamples\tpivot_table_s\taggregation_s")
+    for n_mutations, n_samples in SIZES:
+        fillout = make_fillout(n_mutations, n_samples)
+        args = (fillout, MUTATION_KEY, 3, "CURATED_DUPLEX_", "_duplex")
+        reference, pivot_time = timed(_pivot_table_summary_stats, *args)
+        summary, aggregation_time = timed(generate_summary_stats, *args, repeat=3)
+        pd.testing.assert_frame_equal(summary, reference)
+        print(f"{n_mutations}\t{n_samples}\t{pivot_time:.3f}\t{aggregation_time:.3f}")
+
+
+if __name__ == "__main__":
+    main()
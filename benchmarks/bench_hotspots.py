@@ -0,0 +1,42 @@
+"""
+Benchmark tag hotspots: csv.DictReader keys matched as character tuples vs a hashed
+hotspot index, built from the file or loaded from a saved .npz index.
+
+Usage: python -m benchmarks.bench_hotspots
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from postprocessing_variant_calls.maf.helper import (
+    HotspotIndex,
+    tag_by_hotspots,
+    _tag_by_hotspots_dictreader,
+)
+from benchmarks.synthetic import make_maf, timed
+
+SIZES = [100_000, 1_000_000]
+N_HOTSPOTS = 50_000
+
+
+def main():
+    # time parsing the hotspots file, not the resource cache, see bench_resource_cache
+    os.environ["PV_CACHE_MAX_MB"] = "0"
+    print("rows\tdictreader_s\tindex_build_s\tindex_load_s")
+    with tempfile.TemporaryDirectory() as tmp:
+        hotspots = Path(tmp) / "hotspots.txt"
+        index_file = Path(tmp) / "hotspots.idx"
+        make_maf(N_HOTSPOTS, seed=1).to_csv(hotspots, sep="\t", index=False)
+        HotspotIndex.load(hotspots, index_file)
+        for n_rows in SIZES:
+            maf = make_maf(n_rows)
+            _, dictreader_time = timed(_tag_by_hotspots_dictreader, maf, hotspots)
+            _, build_time = timed(tag_by_hotspots, maf, hotspots, repeat=3)
+            _, load_time = timed(
+                tag_by_hotspots, maf, hotspots, index_file=index_file, repeat=3
+            )
+            print(f"{n_rows}\t{dictreader_time:.3f}\t{build_time:.3f}\t{load_time:.3f}")
+
+
+if __name__ == "__main__":
+    main()
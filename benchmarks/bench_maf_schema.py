@@ -0,0 +1,47 @@
+"""
+Benchmark reading a maf with full type inference vs the declared maf schema:
+read time and the memory held by the data frame.
+
+Usage: python -m benchmarks.bench_maf_schema
+"""
+
+import tempfile
+from pathlib import Path
+from postprocessing_variant_calls.maf.helper import apply_maf_schema, read_delimited
+from postprocessing_variant_calls.maf.tag.tag_constants import MAF_CATEGORY_COLUMNS
+from benchmarks.synthetic import make_maf, timed
+
+SIZES = [100_000, 1_000_000]
+
+
+def _read_with_schema(maf):
+    # what MAFFile reads, without the id column it adds
+    return apply_maf_schema(
+        read_delimited(maf, dtype=dict.fromkeys(MAF_CATEGORY_COLUMNS, "category"))
+    )
+
+
+def _memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def main():
+    print("rows\tinferred_s\tschema_s\tinferred_MB\tschema_MB")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in SIZES:
+            maf = Path(tmp) / f"{n_rows}.maf"
+            df = make_maf(n_rows)
+            df["Variant_Type"] = "SNP"
+            df["Center"] = "MSKCC"
+            df["t_ref_count"] = df["t_depth"] - df["t_alt_count"]
+            df.to_csv(maf, sep="\t", index=False)
+            inferred, inferred_time = timed(read_delimited, maf)
+            schema, schema_time = timed(_read_with_schema, maf)
+            print(
+                f"{n_rows}\t{inferred_time:.3f}\t{schema_time:.3f}"
+                f"\t{_memory_mb(inferred):.0f}\t{_memory_mb(schema):.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
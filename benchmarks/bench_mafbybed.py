@@ -0,0 +1,36 @@
+"""
+Benchmark `maf annotate mafbybed`: interval index vs the original nested loop annotater.
+
+Usage: python -m benchmarks.bench_mafbybed
+"""
+
+from utils.pybed_intersect import annotater, _naive_annotater
+from benchmarks.synthetic import make_maf, make_bed, timed
+
+SIZES = [(1_000, 1_000), (5_000, 5_000), (10_000, 20_000)]
+
+
+def main():
+    print("maf_rows\tbed_intervals\tnaive_s\tindexed_s\tspeedup")
+    for n_rows, n_intervals in SIZES:
+        maf_df = make_maf(n_rows).drop_duplicates(
+            subset=[
+                "Chromosome",
+                "Start_Position",
+                "End_Position",
+                "Reference_Allele",
+                "Tumor_Seq_Allele1",
+                "Tumor_Seq_Allele2",
+            ]
+        )
+        bed_df = make_bed(n_intervals)
+        naive, naive_time = timed(_naive_annotater, maf_df, bed_df, "covered")
+        indexed, indexed_time = timed(annotater, maf_df, bed_df, "covered", repeat=3)
+        assert (naive["covered"].to_numpy() == indexed["covered"].to_numpy()).all()
+        print(
+            f"{n_rows}\t{n_intervals}\t{naive_time:.3f}\t{indexed_time:.4f}\t{naive_time / indexed_time:.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark filter not_complex on a wide maf: parsing every column vs projecting the
+filter's columns and streaming the others through as text, whole or in chunks.
+
+Usage: python -m benchmarks.bench_projection
+"""
+
+import tempfile
+import tracemalloc
+from pathlib import Path
+import numpy as np
+from postprocessing_variant_calls.maf.helper import MAFFile
+from benchmarks.synthetic import make_maf, timed
+
+SIZES = [100_000, 500_000]
+N_EXTRA_COLUMNS = 100
+CHUNKSIZE = 50_000
+
+
+def _filter(maf, output, projection, chunksize=None):
+    mafa = MAFFile(maf, "\t", projection=projection, chunksize=chunksize)
+    mafa.run("filter", "not_complex", output)
+
+
+def _peak_mb(func, *args):
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    print(
+        "rows\tfull_s\tprojected_s\tchunked_s"
+        "\tfull_peak_MB\tprojected_peak_MB\tchunked_peak_MB"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in SIZES:
+            maf = Path(tmp) / f"{n_rows}.maf"
+            output = Path(tmp) / "output.maf"
+            df = make_maf(n_rows)
+            df["complexity"] = np.where(np.arange(n_rows) % 3 == 0, "yes", "no")
+            for i in range(N_EXTRA_COLUMNS):
+                df[f"annotation_{i}"] = df["t_depth"] * i
+            df.to_csv(maf, sep="\t", index=False)
+            _, full_time = timed(_filter, maf, output, None)
+            _, projected_time = timed(_filter, maf, output, "not_complex")
+            _, chunked_time = timed(_filter, maf, output, "not_complex", CHUNKSIZE)
+            print(
+                f"{n_rows}\t{full_time:.3f}\t{projected_time:.3f}\t{chunked_time:.3f}"
+                f"\t{_peak_mb(_filter, maf, output, None):.0f}"
+                f"\t{_peak_mb(_filter, maf, output, 'not_complex'):.0f}"
+                f"\t{_peak_mb(_filter, maf, output, 'not_complex', CHUNKSIZE):.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
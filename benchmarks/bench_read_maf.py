@@ -0,0 +1,37 @@
+"""
+Benchmark reading a commented MAF: single pass read_delimited vs skiprows from a pre-scan.
+
+Usage: python -m benchmarks.bench_read_maf
+"""
+
+import os
+import tempfile
+import pandas as pd
+from postprocessing_variant_calls.maf.helper import read_delimited
+from benchmarks.synthetic import make_maf, timed
+
+SIZES = [50_000, 500_000]
+
+
+def _read_with_skiprows(file_path):
+    with open(file_path, "r") as handle:
+        skip = [i for i, line in enumerate(handle) if line.startswith("#")]
+    return pd.read_csv(file_path, sep="\t", skiprows=skip, low_memory=False)
+
+
+def main():
+    print("rows\tMB\tskiprows_s\tsingle_pass_s")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in SIZES:
+            path = os.path.join(tmp, f"bench_{n_rows}.maf")
+            with open(path, "w") as handle:
+                handle.write("#version 2.4\n")
+                make_maf(n_rows).to_csv(handle, sep="\t", index=False)
+            size = os.path.getsize(path) / 1e6
+            _, old_time = timed(_read_with_skiprows, path, repeat=3)
+            _, new_time = timed(read_delimited, path, repeat=3)
+            print(f"{n_rows}\t{size:.1f}\t{old_time:.3f}\t{new_time:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark loading reference resources: parsing the source file vs loading the
+parsed form from the resource cache.
+
+Usage: python -m benchmarks.bench_resource_cache
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from postprocessing_variant_calls.cache.resource_cache import ResourceCache
+from postprocessing_variant_calls.maf.helper import HotspotIndex
+from postprocessing_variant_calls.maf.filter.filter_helpers import extract_blocklist
+from postprocessing_variant_calls.maf.annotate.annotate_helpers import read_bed
+from benchmarks.synthetic import make_bed, make_maf, timed
+
+SIZES = [100_000, 1_000_000]
+
+
+def _parse_and_load(func, *args):
+    ResourceCache().clear()
+    _, parse_time = timed(func, *args)
+    _, load_time = timed(func, *args, repeat=3)
+    return parse_time, load_time
+
+
+def main():
+    separator = "\t"
+    print("resource\trows\tparse_s\tcached_s")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        os.environ["PV_CACHE_DIR"] = str(tmp / "cache")
+        for n_rows in SIZES:
+            maf = make_maf(n_rows)
+            hotspots = tmp / f"hotspots_{n_rows}.txt"
+            maf.to_csv(hotspots, sep=separator, index=False)
+            blocklist = tmp / f"blocklist_{n_rows}.txt"
+            maf[
+                [
+                    "Chromosome",
+                    "Start_Position",
+                    "End_Position",
+                    "Reference_Allele",
+                    "Tumor_Seq_Allele2",
+                ]
+            ].rename(columns={"Tumor_Seq_Allele2": "Tumor_Seq_Allele"}).assign(
+                Annotation="blocked"
+            ).to_csv(
+                blocklist, sep=separator, index=False
+            )
+            bed = tmp / f"targets_{n_rows}.bed"
+            make_bed(n_rows).to_csv(bed, sep=separator, index=False, header=False)
+            for name, func, args in [
+                ("hotspots", HotspotIndex.load, [hotspots]),
+                ("blocklist", extract_blocklist, [blocklist, separator]),
+                ("bed", read_bed, [bed]),
+            ]:
+                parse_time, load_time = _parse_and_load(func, *args)
+                print(f"{name}\t{n_rows}\t{parse_time:.3f}\t{load_time:.3f}")
+
+
+if __name__ == "__main__":
+    main()
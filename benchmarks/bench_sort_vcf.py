@@ -0,0 +1,73 @@
+"""
+Benchmark sorting a filtered vardict vcf: every record parsed by PyVCF and sorted in
+memory vs the line based external merge sort of sort_vcf_file.
+
+Usage: python -m benchmarks.bench_sort_vcf
+"""
+
+import random
+import tempfile
+import tracemalloc
+from pathlib import Path
+import vcf
+from utils.vcf_io import sort_vcf_file
+from benchmarks.bench_vardict_backends import TEMPLATE
+from benchmarks.synthetic import timed
+
+SIZES = [100_000, 300_000]
+RUN_RECORDS = 50_000
+
+
+def _pyvcf_sort(input_vcf, output_vcf):
+    vcf_reader = vcf.Reader(open(input_vcf, "r"))
+    sorted_records = sorted(vcf_reader, key=lambda record: (record.CHROM, record.POS))
+    vcf_writer = vcf.Writer(open(output_vcf, "w"), vcf_reader)
+    for record in sorted_records:
+        vcf_writer.write_record(record)
+    vcf_writer.close()
+
+
+def _write_shuffled_vcf(path, n_records, seed=0):
+    header, records = [], []
+    for line in TEMPLATE.read_text().splitlines(keepends=True):
+        (header if line.startswith("#") else records).append(line)
+    rng = random.Random(seed)
+    with open(path, "w") as handle:
+        handle.writelines(header)
+        for i in range(n_records):
+            fields = rng.choice(records).split("\t", 2)
+            fields[1] = str(rng.randint(1, 100_000_000))
+            handle.write("\t".join(fields))
+
+
+def _peak_mb(func, *args, **kwargs):
+    tracemalloc.start()
+    func(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    print("records\tpyvcf_s\texternal_s\tpyvcf_peak_MB\texternal_peak_MB")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_records in SIZES:
+            input_vcf = Path(tmp) / f"{n_records}.vcf"
+            output_vcf = Path(tmp) / "sorted.vcf"
+            _write_shuffled_vcf(input_vcf, n_records)
+            _, pyvcf_time = timed(_pyvcf_sort, input_vcf, output_vcf)
+            _, external_time = timed(
+                sort_vcf_file, input_vcf, output_vcf, run_records=RUN_RECORDS
+            )
+            pyvcf_peak = _peak_mb(_pyvcf_sort, input_vcf, output_vcf)
+            external_peak = _peak_mb(
+                sort_vcf_file, input_vcf, output_vcf, run_records=RUN_RECORDS
+            )
+            print(
+                f"{n_records}\t{pyvcf_time:.3f}\t{external_time:.3f}"
+                f"\t{pyvcf_peak:.0f}\t{external_peak:.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark vardict case-control filter: records fully parsed by PyVCF vs decoded by
+htslib through cyvcf2, with PyVCF only parsing and writing the records that pass.
+
+Usage: python -m benchmarks.bench_vardict_backends
+"""
+
+import tempfile
+from pathlib import Path
+from postprocessing_variant_calls.vardict.vardict_class import var_sample
+from postprocessing_variant_calls.vardict.reader_backends import have_cyvcf2
+from benchmarks.synthetic import timed
+
+SIZES = [100_000, 1_000_000]
+TEMPLATE = Path("tests/data/vardict/case_control_test.vcf")
+TUMOR = "C-C1V52M-L001-d"
+# thresholds of a deep panel, most records are dropped as noise
+ALLELE_DEPTH = 5
+VARIANT_FRACTION = 0.01
+
+
+def _write_vcf(path, n_records):
+    header, records = [], []
+    for line in TEMPLATE.read_text().splitlines(keepends=True):
+        (header if line.startswith("#") else records).append(line)
+    with open(path, "w") as handle:
+        handle.writelines(header)
+        for i in range(n_records):
+            handle.write(records[i % len(records)])
+
+
+def _filter(vcf, output_dir, backend):
+    to_filter = var_sample(
+        vcf, output_dir, TUMOR, 0, 20, ALLELE_DEPTH, VARIANT_FRACTION, 1, False, backend
+    )
+    return to_filter.filter_case_control()
+
+
+def main():
+    backends = ["pyvcf", "cyvcf2"] if have_cyvcf2() else ["pyvcf"]
+    print("records\t" + "\t".join(f"{backend}_s" for backend in backends))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_records in SIZES:
+            vcf = Path(tmp) / f"{n_records}.vcf"
+            _write_vcf(vcf, n_records)
+            times = []
+            for backend in backends:
+                output_dir = Path(tmp) / backend
+                output_dir.mkdir(exist_ok=True)
+                _, seconds = timed(_filter, vcf, str(output_dir), backend)
+                times.append(f"{seconds:.3f}")
+            print(f"{n_records}\t" + "\t".join(times))
+
+
+if __name__ == "__main__":
+    main()
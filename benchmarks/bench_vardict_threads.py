@@ -0,0 +1,55 @@
+"""
+Benchmark vardict case-control filter on a bgzip compressed, tabix indexed vcf in one
+process vs its contigs filtered in a pool of processes.
+
+Usage: python -m benchmarks.bench_vardict_threads
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from postprocessing_variant_calls.vardict.vardict_class import var_sample
+from utils.vcf_io import BgzfWriter
+from benchmarks.bench_vardict_backends import TEMPLATE, TUMOR
+from benchmarks.synthetic import CHROMOSOMES, timed
+
+SIZES = [200_000]
+THREADS = [1, 2, 4, 8]
+
+
+def _write_indexed_vcf(path, n_records):
+    header, records = [], []
+    for line in TEMPLATE.read_text().splitlines(keepends=True):
+        (header if line.startswith("#") else records).append(line)
+    per_contig = n_records // len(CHROMOSOMES)
+    with BgzfWriter(path, index=True) as handle:
+        handle.write("".join(header))
+        for chrom in CHROMOSOMES:
+            for i in range(per_contig):
+                fields = records[i % len(records)].split("\t", 2)
+                handle.write(f"{chrom}\t{100 * (i + 1)}\t{fields[2]}")
+
+
+def _filter(vcf, output_dir, threads):
+    to_filter = var_sample(vcf, output_dir, TUMOR, 0, 20, 1, 5e-05, 1, False, "pyvcf")
+    return to_filter.filter_by_contig("filter_case_control", threads)
+
+
+def main():
+    print(f"{os.cpu_count()} cpus")
+    print("records\t" + "\t".join(f"threads_{threads}_s" for threads in THREADS))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_records in SIZES:
+            vcf = Path(tmp) / f"{n_records}.vcf.gz"
+            _write_indexed_vcf(vcf, n_records)
+            times = []
+            for threads in THREADS:
+                output_dir = Path(tmp) / str(threads)
+                output_dir.mkdir()
+                _, seconds = timed(_filter, vcf, str(output_dir), threads)
+                times.append(f"{seconds:.3f}")
+            print(f"{n_records}\t" + "\t".join(times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark writing the records kept by the vardict filters: one vcf.Writer per vcf and the
+txt written record by record vs FilterOutputs serializing each record once into buffers
+written in blocks.
+
+Usage: python -m benchmarks.bench_vardict_writer
+"""
+
+import tempfile
+from pathlib import Path
+import vcf
+from postprocessing_variant_calls.vardict.vardict_class import var_sample
+from postprocessing_variant_calls.vardict.filter_outputs import FilterOutputs
+from benchmarks.bench_vardict_backends import _write_vcf, TUMOR
+from benchmarks.synthetic import timed
+
+SIZES = [100_000, 500_000]
+
+
+def _kept_records(vcf_path, output_dir):
+    to_filter = var_sample(vcf_path, output_dir, TUMOR, 0, 0, 0, 0, 1, False, "pyvcf")
+    return to_filter, [to_filter.kept_record(site) for site in to_filter.reader_backend]
+
+
+def _write_per_record(to_filter, records):
+    vcf_writer = vcf.Writer(open(to_filter.vcf_out, "w"), to_filter.vcf_reader)
+    vcf_complex_writer = vcf.Writer(
+        open(to_filter.vcf_complex_out, "w"), to_filter.vcf_reader
+    )
+    with open(to_filter.txt_out, "wb") as txt_fh:
+        for record, complex_flag in records:
+            if complex_flag:
+                vcf_complex_writer.write_record(record)
+            else:
+                vcf_writer.write_record(record)
+            txt_fh.write(
+                str.encode(
+                    f"{TUMOR}\t{record.CHROM}\t{record.POS}\t{record.REF}\t{record.ALT[0]}\t.\n"
+                )
+            )
+    vcf_writer.close()
+    vcf_complex_writer.close()
+
+
+def _write_buffered(to_filter, records):
+    with FilterOutputs(
+        to_filter.vcf_reader,
+        to_filter.vcf_out,
+        to_filter.vcf_complex_out,
+        to_filter.txt_out,
+        TUMOR,
+    ) as outputs:
+        for record, complex_flag in records:
+            outputs.write_record(record, complex_flag)
+
+
+def main():
+    print("records\tper_record_s\tbuffered_s")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_records in SIZES:
+            vcf_path = Path(tmp) / f"{n_records}.vcf"
+            _write_vcf(vcf_path, n_records)
+            to_filter, records = _kept_records(vcf_path, tmp)
+            _, per_record = timed(_write_per_record, to_filter, records)
+            _, buffered = timed(_write_buffered, to_filter, records)
+            print(f"{n_records}\t{per_record:.3f}\t{buffered:.3f}")
+            del records
+
+
+if __name__ == "__main__":
+    main()
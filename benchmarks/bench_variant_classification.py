@@ -0,0 +1,57 @@
+"""
+Benchmark tag by_variant_classification: per row tagging with itertuples and a
+transcript list vs column masks and a hashed isoform lookup.
+
+Usage: python -m benchmarks.bench_variant_classification
+"""
+
+import numpy as np
+from postprocessing_variant_calls.maf.helper import IS_EXONIC_CLASS, MAFFile
+from benchmarks.synthetic import make_maf, timed
+
+SIZES = [20_000, 200_000]
+N_ISOFORMS = 500
+
+
+def _tag_itertuples(maf, ref_lst):
+    # the classification loop before it was vectorized
+    def tag_row(row):
+        tags = []
+        if isinstance(row.Status, str) and row.Status != "":
+            tags.append("dropped")
+        exonic = IS_EXONIC_CLASS(
+            row.Hugo_Symbol, row.Variant_Classification, row.Start_Position
+        )
+        in_panel = row.Transcript_ID in ref_lst
+        if exonic:
+            tags.append("exonic" if in_panel else "nonpanel_exonic")
+        else:
+            tags.append("silent" if in_panel else "nonpanel_silent")
+        return ", ".join(tags)
+
+    return [tag_row(row) for row in maf.itertuples(index=False)]
+
+
+def _tag_vectorized(maf, ref_lst):
+    # bypass reading a file, only the data frame is used
+    mafa = MAFFile.__new__(MAFFile)
+    mafa.data_frame = maf.copy()
+    return mafa.tag_by_variant_classification(None, ref_lst)["classification"]
+
+
+def main():
+    print("rows\titertuples_s\tvectorized_s")
+    rng = np.random.default_rng(0)
+    isoforms = [f"ENST{i:011d}" for i in range(N_ISOFORMS * 2)]
+    ref_lst = isoforms[:N_ISOFORMS]
+    for n_rows in SIZES:
+        maf = make_maf(n_rows)
+        maf["Transcript_ID"] = rng.choice(isoforms, n_rows)
+        maf["Status"] = rng.choice(["", "Germline"], n_rows)
+        _, itertuples_time = timed(_tag_itertuples, maf, ref_lst)
+        _, vectorized_time = timed(_tag_vectorized, maf, ref_lst, repeat=3)
+        print(f"{n_rows}\t{itertuples_time:.3f}\t{vectorized_time:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark vardict case-control filter writing plain vcfs and bgzipping and indexing
+the sorted ones in a later pass, vs writing them bgzipped and indexed with --compress.
+
+Usage: python -m benchmarks.bench_vcf_compress
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from postprocessing_variant_calls.vardict.vardict_class import var_sample
+from utils.vcf_io import BgzfWriter
+from benchmarks.bench_vardict_backends import TUMOR, _write_vcf
+from benchmarks.synthetic import timed
+
+SIZES = [100_000, 500_000]
+
+
+def _filter(vcf, output_dir, compress):
+    to_filter = var_sample(
+        vcf, output_dir, TUMOR, 0, 20, 1, 5e-05, 1, False, "pyvcf", compress
+    )
+    to_filter.filter_case_control()
+    outputs = [to_filter.sort_vcf(), to_filter.sort_vcf_complex()]
+    if not compress:
+        # the extra pass of `bgzip` and `tabix` over each sorted vcf
+        for output in outputs:
+            with open(output) as plain, BgzfWriter(f"{output}.gz", index=True) as gz:
+                shutil.copyfileobj(plain, gz)
+
+
+def _bytes_written(output_dir):
+    return sum(path.stat().st_size for path in Path(output_dir).iterdir()) / 1e6
+
+
+def main():
+    print("records\tplain_then_bgzip_s\tcompress_s\tplain_MB\tcompress_MB")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_records in SIZES:
+            vcf = Path(tmp) / f"{n_records}.vcf"
+            _write_vcf(vcf, n_records)
+            results = []
+            for compress in [False, True]:
+                output_dir = Path(tmp) / f"{n_records}_{compress}"
+                output_dir.mkdir()
+                _, seconds = timed(_filter, vcf, str(output_dir), compress)
+                results.append((seconds, _bytes_written(output_dir)))
+            print(
+                f"{n_records}\t{results[0][0]:.3f}\t{results[1][0]:.3f}"
+                f"\t{results[0][1]:.0f}\t{results[1][1]:.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Shared helpers for the benchmark scripts in this folder.
+
+Benchmarks are plain scripts, run them from the repository root, e.g.
+`python -m benchmarks.bench_mafbybed`. They are not collected by pytest.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+
+CHROMOSOMES = [str(c) for c in range(1, 23)] + ["X"]
+
+
+def make_maf(n_rows, seed=0):
+    """Make a synthetic maf data frame with the columns used across the maf commands
+
+    Args:
+        n_rows (int): number of variants
+        seed (int): random seed
+
+    Returns:
+        data_frame: synthetic maf
+    """
+    rng = np.random.default_rng(seed)
+    start = rng.integers(1, 2_000_000, n_rows)
+    length = rng.integers(0, 3, n_rows)
+    bases = np.array(["A", "C", "G", "T", "-"])
+    return pd.DataFrame(
+        {
+            "Hugo_Symbol": rng.choice(["TP53", "KRAS", "EGFR", "MET", "TERT"], n_rows),
+            "Chromosome": rng.choice(CHROMOSOMES, n_rows),
+            "Start_Position": start,
+            "End_Position": start + length,
+            "Reference_Allele": rng.choice(bases, n_rows),
+            "Tumor_Seq_Allele1": rng.choice(bases, n_rows),
+            "Tumor_Seq_Allele2": rng.choice(bases, n_rows),
+            "Variant_Classification": rng.choice(
+                ["Missense_Mutation", "Silent", "Intron", "5'Flank"], n_rows
+            ),
+            "t_alt_count": rng.integers(0, 50, n_rows),
+            "t_depth": rng.integers(50, 500, n_rows),
+        }
+    )
+
+
+def make_bed(n_intervals, seed=0):
+    """Make a synthetic bed data frame on the same chromosomes as make_maf
+
+    Args:
+        n_intervals (int): number of intervals
+        seed (int): random seed
+
+    Returns:
+        data_frame: synthetic bed
+    """
+    rng = np.random.default_rng(seed + 1)
+    start = rng.integers(1, 2_000_000, n_intervals)
+    return pd.DataFrame(
+        {
+            "Chromosome": rng.choice(CHROMOSOMES, n_intervals),
+            "Start_Position": start,
+            "End_Position": start + rng.integers(50, 300, n_intervals),
+            "Comment": "target",
+        }
+    )
+
+
+def timed(func, *args, repeat=1, **kwargs):
+    """Run func and return (result, best wall time in seconds) over repeat runs"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# imports
+import datetime
+from pathlib import Path
+import typer
+
+from postprocessing_variant_calls.cache.resource_cache import ResourceCache
+
+app = typer.Typer(help="inspect and clear the cache of parsed reference resources.")
+
+
+@app.command(
+    "info",
+    help="List the cached resources, least recently used first. The cache directory is $PV_CACHE_DIR and its size cap $PV_CACHE_MAX_MB.",
+)
+def info(
+    cache_dir: Path = typer.Option(
+        None,
+        "--cache-dir",
+        help="Cache directory, defaults to $PV_CACHE_DIR or the user cache directory.",
+    ),
+):
+    cache = ResourceCache(cache_dir)
+    entries = cache.entries()
+    typer.secho(f"Cache directory: {cache.cache_dir}", fg=typer.colors.BRIGHT_GREEN)
+    for path, size, last_used in entries:
+        last_used = datetime.datetime.fromtimestamp(last_used).isoformat(
+            sep=" ", timespec="seconds"
+        )
+        typer.echo(f"{path.name}\t{size / 1e6:.1f} MB\tlast used {last_used}")
+    typer.echo(
+        f"{len(entries)} entries, {cache.size() / 1e6:.1f} MB of {cache.max_bytes / 1e6:.0f} MB."
+    )
+    return 0
+
+
+@app.command("clear", help="Remove cached resources.")
+def clear(
+    cache_dir: Path = typer.Option(
+        None,
+        "--cache-dir",
+        help="Cache directory, defaults to $PV_CACHE_DIR or the user cache directory.",
+    ),
+    kind: str = typer.Option(
+        None,
+        "--kind",
+        "-k",
+        help="Only remove one kind of resource: hotspots, blocklist, canonical_transcripts or bed.",
+    ),
+):
+    removed = ResourceCache(cache_dir).clear(kind)
+    typer.secho(f"Removed {removed} cache entries.", fg=typer.colors.BRIGHT_GREEN)
+    return 0
+
+
+if __name__ == "__main__":
+    app()
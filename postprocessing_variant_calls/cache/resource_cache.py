@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# imports
+import os
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("cache")
+
+# bump when the stored form of any resource changes, so older entries are never read
+CACHE_FORMAT_VERSION = 1
+
+# entries are named <kind>-<content hash>.npz
+CACHE_SUFFIX = ".npz"
+
+DEFAULT_MAX_MB = 1024
+
+
+def default_cache_dir():
+    """Cache directory: $PV_CACHE_DIR, else postprocessing_variant_calls under the user cache dir."""
+    if os.environ.get("PV_CACHE_DIR"):
+        return Path(os.environ["PV_CACHE_DIR"])
+    user_cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(user_cache) / "postprocessing_variant_calls"
+
+
+def default_max_bytes():
+    """LRU size cap: $PV_CACHE_MAX_MB megabytes, 0 turns the cache off."""
+    return int(float(os.environ.get("PV_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1e6)
+
+
+def content_hash(file_path, *params, chunk_size=1 << 20):
+    """sha256 of a file's bytes, the cache format version and any parse parameters."""
+    digest = hashlib.sha256(f"{CACHE_FORMAT_VERSION}:{params!r}".encode())
+    with open(file_path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResourceCache:
+    """On-disk cache of parsed, indexed reference resources.
+
+    Each entry is the numpy arrays of one resource saved as an .npz file, keyed by
+    the content hash of the source file, so an edited resource is never served
+    stale. Entries are touched when read, and the least recently used ones are
+    evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def entries(self):
+        """Cache entries, least recently used first.
+
+        Returns:
+            list: (path, size in bytes, last used as a timestamp) of every entry
+        """
+        if not self.cache_dir.is_dir():
+            return []
+        entries = []
+        for path in self.cache_dir.glob(f"*{CACHE_SUFFIX}"):
+            stat = path.stat()
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def clear(self, kind=None):
+        """Remove every entry, or the entries of one kind of resource.
+
+        Returns:
+            int: number of entries removed
+        """
+        removed = 0
+        for path, _, _ in self.entries():
+            if kind is None or path.name.startswith(f"{kind}-"):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def fetch(self, kind, source_file, build, to_arrays, from_arrays, params=()):
+        """Load a resource from the cache, or build it and store it.
+
+        Args:
+            kind (str): resource name, prefix of the entry file name
+            source_file (str/path): file the resource is parsed from, hashed for the key
+            build (callable): parses source_file into the resource
+            to_arrays (callable): resource -> dict of numpy arrays to save
+            from_arrays (callable): dict of saved numpy arrays -> resource
+            params (tuple): parse parameters that change the resource, e.g. the separator
+
+        Returns:
+            the resource, as returned by build or from_arrays
+        """
+        if not self.enabled:
+            return build()
+        path = (
+            self.cache_dir
+            / f"{kind}-{content_hash(source_file, *params)}{CACHE_SUFFIX}"
+        )
+        if path.exists():
+            try:
+                with np.load(path, allow_pickle=False) as saved:
+                    resource = from_arrays({name: saved[name] for name in saved.files})
+                os.utime(path)
+                logger.info("loaded %s from cache %s", source_file, path)
+                return resource
+            except (OSError, ValueError, KeyError) as error:
+                logger.warning("ignoring unreadable cache entry %s: %s", path, error)
+        resource = build()
+        try:
+            self.__store(path, to_arrays(resource))
+            self.__evict()
+        except OSError as error:
+            # an unwritable cache only costs the speed up
+            logger.warning(
+                "could not cache %s in %s: %s", source_file, self.cache_dir, error
+            )
+        return resource
+
+    def __store(self, path, arrays):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # written next to the entry and renamed, so readers never see a partial file
+        with tempfile.NamedTemporaryFile(
+            dir=self.cache_dir, suffix=".tmp", delete=False
+        ) as handle:
+            np.savez(handle, **arrays)
+        os.replace(handle.name, path)
+        logger.info("cached %s", path)
+
+    def __evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.info("evicted %s", path)
+
+
+def frame_to_arrays(df):
+    """Split a data frame into numpy arrays that load without pickling.
+
+    Text columns are stored as fixed width unicode with a mask of their missing values.
+    """
+    arrays = {"columns": np.array(df.columns, dtype=str)}
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if values.dtype == object:
+            arrays[f"isna_{i}"] = values.isna().to_numpy()
+            arrays[f"values_{i}"] = values.fillna("").to_numpy(dtype=str)
+        else:
+            arrays[f"values_{i}"] = values.to_numpy()
+    return arrays
+
+
+def arrays_to_frame(arrays):
+    """Rebuild a data frame saved by frame_to_arrays."""
+    columns = {}
+    for i, col in enumerate(arrays["columns"].tolist()):
+        values = arrays[f"values_{i}"]
+        if f"isna_{i}" in arrays:
+            values = pd.Series(values, dtype=object).mask(arrays[f"isna_{i}"])
+        columns[col] = values
+    return pd.DataFrame(columns)
+
+
+def cached_resource(kind, source_file, build, to_arrays, from_arrays, params=()):
+    """Fetch a resource through the default ResourceCache, see ResourceCache.fetch."""
+    return ResourceCache().fetch(
+        kind, source_file, build, to_arrays, from_arrays, params=params
+    )
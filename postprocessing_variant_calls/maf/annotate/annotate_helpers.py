@@ -3,9 +3,14 @@
 import os
 import sys
 import csv
-import pandas as pd
 import numpy as np
 from utils.pybed_intersect import annotater
+from postprocessing_variant_calls.maf.helper import read_delimited
+from postprocessing_variant_calls.cache.resource_cache import (
+    cached_resource,
+    frame_to_arrays,
+    arrays_to_frame,
+)
 import typer
 
 
@@ -24,18 +29,12 @@ def maf_bed_annotate(maf, bed, cname, outputFile):
         float: returns zero if annotated maf successfully written
     """
     ## input files preprocessing
-    # call the function to remove lines starting with #
-    skip = get_row(maf)
-    # read MSF file using Pandas
-    maf_df = pd.read_csv(maf, sep="\t", skiprows=skip, low_memory=False)
-    # call the function to remove lines starting with #
-    skip = get_row(bed)
+    # read MAF file using Pandas, lines starting with # are skipped
+    maf_df = read_delimited(maf)
     # assigning column names to BED file
     bed_names = ["Chromosome", "Start_Position", "End_Position", "Comment"]
     # store it as Pandas dataframe
-    bed_df = pd.read_csv(
-        bed, sep="\t", skiprows=skip, low_memory=False, header=None, names=bed_names
-    )
+    bed_df = read_delimited(bed, header=None, names=bed_names)
     # remove the string "chr"
     bed_df["Chromosome"] = bed_df["Chromosome"].str.replace("chr", "")
     # annotate maf with processed bed file
@@ -51,33 +50,27 @@ def maf_bed_annotate(maf, bed, cname, outputFile):
     return 0
 
 
-def get_row(file):
-    skipped = []
-    with open(file, "r") as csv_file:
-        skipped.extend(i for i, line in enumerate(csv_file) if line.startswith("#"))
-    return skipped
+def read_bed(bed):
+    # the parsed bed is kept in the resource cache, keyed by the content of the file
+    return cached_resource(
+        "bed", bed, lambda: _parse_bed(bed), frame_to_arrays, arrays_to_frame
+    )
 
 
-def read_bed(bed):
-    # call the function to remove lines starting with #
+def _parse_bed(bed):
+    # lines starting with # are skipped while reading
     # assigning column names to BED file
     # store it as Pandas dataframe
-    skip = get_row(bed)
     # TODO more robust handling for bed column names
     bed_names = ["Chromosome", "Start_Position", "End_Position", "Comment"]
-    bed_df = pd.read_csv(
-        bed, sep="\t", skiprows=skip, low_memory=False, header=None, names=bed_names
-    )
+    bed_df = read_delimited(bed, header=None, names=bed_names)
     # remove the string "chr"
     bed_df["Chromosome"] = bed_df["Chromosome"].astype(str).str.replace("chr", "")
     return bed_df
 
 
 def read_maf(maf):
-    # call the function to remove lines starting with #
-    # read MSF file using Pandas
-    # TODO IMPROVE THE READING OF MAF FILE
-    skip = get_row(maf)
-    maf_df = pd.read_csv(maf, sep="\t", skiprows=skip, low_memory=False)
+    # read MAF file using Pandas, lines starting with # are skipped
+    maf_df = read_delimited(maf)
     maf_df["Chromosome"] = maf_df["Chromosome"].astype(str).str.replace("chr", "")
     return maf_df
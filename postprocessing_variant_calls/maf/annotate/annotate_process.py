@@ -19,11 +19,17 @@ from postprocessing_variant_calls.maf.helper import (
     check_maf,
     check_txt,
     check_separator,
+    check_format,
+    write_maf,
     read_tsv,
     MAFFile,
     gen_id_tsv,
 )
 
+from postprocessing_variant_calls.maf.filter.filter_helpers import (
+    extract_blocklist as extract_blocklist_keys,
+    in_blocklist,
+)
 from utils.pybed_intersect import annotater
 import pandas as pd
 import numpy as np
@@ -140,6 +146,12 @@ def maf_tsv(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
     oc: str = typer.Option(
         "hotspot",
         "--outcome_column",
@@ -169,7 +181,7 @@ def maf_tsv(
     # added line of code to convert start/end coordinates from float to integer
 
     # write out paths
-    annotated_maf.to_csv(output_maf, index=False, sep="\t")
+    write_maf(annotated_maf, output_maf, output_format)
     return 0
 
 
@@ -210,52 +222,16 @@ def extract_blocklist(
         callback=check_separator,
     ),
 ):
-    # reading in input blocklist file
-    header = [
-        "Chromosome",
-        "Start_Position",
-        "End_Position",
-        "Reference_Allele",
-        "Tumor_Seq_Allele",
-        "Annotation",
-    ]
     mafa = MAFFile(maf, separator)
-    tsva = read_tsv(tsv, separator)
-
-    # processing the input blocklist file and extracting the blocklist values, returning a list
-    if tsva.empty:
-        blacklist = []
-        print("Extracted blocklist values for input blocklist file.")
-        # performing actual filtering using the MAF read in object
-        return blacklist
-    elif tsva.empty == False:
-        if list(tsva.columns.values) != header:
-            raise Exception(
-                "Blacklist provided is in the wrong format, file should have the following in the header (in order):"
-                + ", ".join(header)
-            )
-        else:
-            tsva.drop(["Annotation"], axis=1, inplace=True)
-            tsva.drop_duplicates(inplace=True)
-            blacklist = [
-                str(b[0])
-                + "_"
-                + str(b[1])
-                + "_"
-                + str(b[2])
-                + "_"
-                + str(b[3])
-                + "_"
-                + str(b[4])
-                for b in tsva.values.tolist()
-            ]
-            print("Extracted blocklist values for input blocklist file.")
-            # performing actual filtering using the MAF read in object
-            return blacklist
-    else:
-        raise IOError(
-            "Blacklist file provided does not exist. Please check inputs again."
-        )
+    blocklist = extract_blocklist_keys(tsv, separator)
+    print("Extracted blocklist values for input blocklist file.")
+    # matching the MAF read in object against the blocklist
+    blocklisted = in_blocklist(mafa.data_frame, blocklist)
+    typer.secho(
+        f"{blocklisted.sum()} of {len(blocklisted)} variants found in the blocklist.",
+        fg=typer.colors.BRIGHT_GREEN,
+    )
+    return blocklist
 
 
 if __name__ == "__main__":
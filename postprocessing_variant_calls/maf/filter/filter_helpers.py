@@ -11,7 +11,9 @@ from postprocessing_variant_calls.maf.helper import (
     check_separator,
     read_tsv,
     MAFFile,
+    _key_strings,
 )
+from postprocessing_variant_calls.cache.resource_cache import cached_resource
 
 from postprocessing_variant_calls.maf.tag.tag_constants import (
     MAF_DUMMY_COLUMNS2,
@@ -22,22 +24,48 @@ from postprocessing_variant_calls.maf.tag.tag_constants import (
 app = typer.Typer()
 
 
+BLOCKLIST_KEY = [
+    "Chromosome",
+    "Start_Position",
+    "End_Position",
+    "Reference_Allele",
+    "Tumor_Seq_Allele2",
+]
+
+
+def blocklist_keys(df, cols=BLOCKLIST_KEY):
+    """
+    The function `blocklist_keys` builds the (chrom, start, end, ref, alt) keys used to match
+    mutations against a blocklist.
+
+    :param df: DataFrame containing the key columns
+
+    :param cols: the key columns, in (chrom, start, end, ref, alt) order
+
+    :return: a MultiIndex with one string tuple per row
+    """
+    return pd.MultiIndex.from_arrays(
+        [_key_strings(df[col]) for col in cols], names=BLOCKLIST_KEY
+    )
+
+
 def extract_blocklist(blocklist_file, separator):
     """
-    The function `extract_blocklist` reads and processes a blocklist file, extracting specific values
-    and returning them as a list.
+    The function `extract_blocklist` reads and processes a blocklist file, extracting the unique
+    blocklisted mutations as a set of keys.
 
     :param blocklist_file: The `blocklist_file` parameter is the file path to the blocklist file that
-    contains information about genomic regions to be blocked. This function reads the contents of this
-    file and processes it to extract the blocklist values based on the specified separator
+    contains information about genomic regions to be blocked. When it is not given, an empty blocklist
+    is returned.
 
     :param separator: The `separator` parameter in the `extract_blocklist` function is used to specify
     the delimiter that separates values in the input blocklist file. This delimiter is used when reading
     the file to properly parse the data into columns. Common separators include commas (`,`), tabs
     (`\t`), and spaces
 
-    :return: The function `extract_blocklist` returns a list of blocklist values extracted from the
-    input blocklist file after processing it.
+    :return: The function `extract_blocklist` returns a MultiIndex of unique (Chromosome,
+    Start_Position, End_Position, Reference_Allele, Tumor_Seq_Allele) string keys, to be matched with
+    `in_blocklist`.
     """
     # reading in input blocklist file
     header = [
@@ -48,61 +76,83 @@ def extract_blocklist(blocklist_file, separator):
         "Tumor_Seq_Allele",
         "Annotation",
     ]
-    tsva = read_tsv(blocklist_file, separator)
-    # processing the input blocklist file and extracting the blocklist values, returning a list
-    if tsva.empty:
-        blocklist = []
-        # performing actual filtering using the MAF read in object
-        return blocklist
-    elif tsva.empty == False:
+    if blocklist_file is None:
+        return blocklist_keys(pd.DataFrame(columns=BLOCKLIST_KEY))
+
+    def parse_blocklist():
+        tsva = read_tsv(blocklist_file, separator)
+        # processing the input blocklist file and extracting the blocklist keys
+        if tsva.empty:
+            return blocklist_keys(pd.DataFrame(columns=BLOCKLIST_KEY))
         if list(tsva.columns.values) != header:
             raise Exception(
                 "Blacklist provided is in the wrong format, file should have the following in the header (in order):"
                 + ", ".join(header)
             )
-        else:
-            tsva.drop(["Annotation"], axis=1, inplace=True)
-            tsva.drop_duplicates(inplace=True)
-            blocklist = [
-                str(b[0])
-                + "_"
-                + str(b[1])
-                + "_"
-                + str(b[2])
-                + "_"
-                + str(b[3])
-                + "_"
-                + str(b[4])
-                for b in tsva.values.tolist()
-            ]
-            return blocklist
-    else:
-        raise IOError(
-            "Blacklist file provided does not exist. Please check inputs again."
-        )
+        return blocklist_keys(tsva, header[:-1]).unique()
+
+    # the parsed keys are kept in the resource cache as the levels and codes of the index
+    return cached_resource(
+        "blocklist",
+        blocklist_file,
+        parse_blocklist,
+        _blocklist_to_arrays,
+        _blocklist_from_arrays,
+        params=(separator,),
+    )
+
+
+def _blocklist_to_arrays(keys):
+    arrays = {}
+    for i, (level, codes) in enumerate(zip(keys.levels, keys.codes)):
+        arrays[f"level_{i}"] = level.to_numpy(dtype=str)
+        arrays[f"codes_{i}"] = codes
+    return arrays
+
+
+def _blocklist_from_arrays(arrays):
+    return pd.MultiIndex(
+        levels=[
+            pd.Index(arrays[f"level_{i}"], dtype=object)
+            for i in range(len(BLOCKLIST_KEY))
+        ],
+        codes=[arrays[f"codes_{i}"] for i in range(len(BLOCKLIST_KEY))],
+        names=BLOCKLIST_KEY,
+        verify_integrity=False,
+    )
+
+
+def in_blocklist(df, blocklist):
+    """
+    The function `in_blocklist` checks which mutations are listed in a blocklist, as a single hashed
+    join of the mutation keys against the blocklist keys.
+
+    :param df: DataFrame of mutations with the Chromosome, Start_Position, End_Position,
+    Reference_Allele and Tumor_Seq_Allele2 columns
+
+    :param blocklist: blocklist keys returned by `extract_blocklist`
+
+    :return: boolean Series, True where the mutation is blocklisted
+    """
+    return pd.Series(blocklist_keys(df).isin(blocklist), index=df.index)
 
 
 def __generate_table_and_find_summary_stats(
-    df_fillout, mutation_key, fillout_type, alt_thres, new_fillout_type
+    df_fillout, mutation_key, alt_thres, new_fillout_type, suffix=""
 ):
     """
     The function generates a summary table with statistics based on centered mutation key columns and sample
     information.
 
     :param df_fillout: `df_fillout` is a DataFrame containing data related to mutations and samples. It
-    likely includes columns such as `mutation_key`, `Tumor_Sample_Barcode`, `summary_fragment`,
-    `t_variant_frequency_standard`, `t_alt_count_standard`, `t_vaf_fragment`, and `t_alt
+    includes the `mutation_key` columns, `Tumor_Sample_Barcode` and the `summary_fragment`,
+    `t_vaf_fragment` and `t_alt_count_fragment` columns of the fillout category, named with `suffix`
 
     :param mutation_key: The `mutation_key` parameter is a list of columns derived from the fillout MAF class object which is used as the index for the pivot table and for
     grouping the data to calculate summary statistics in the function
     `__generate_table_and_find_summary_stats`. It helps in organizing and summarizing the data based on
     the mutation key provided
 
-    :param fillout_type: The `fillout_type` parameter in the function
-    `__generate_table_and_find_summary_stats` is used to determine the type of data processing to be
-    performed based on the input value. If `fillout_type` is equal to "NORMAL_", certain calculations
-    and operations are carried out on the input data
-
     :param alt_thres: The `alt_thres` parameter is used to specify the threshold for the alternative
     count. It is used to determine the number of samples with an alternative count above this threshold
     in the dataset
@@ -111,75 +161,90 @@ def __generate_table_and_find_summary_stats(
     fillout data that will be added to the summary table. It is used to create new column names in the
     summary table based on the type of fillout data being processed
 
+    :param suffix: The `suffix` parameter is the suffix of the fillout columns to summarize, e.g.
+    "_duplex", "_simplex_duplex" or "_standard" for normals
+
     :return: The function `__generate_table_and_find_summary_stats` returns a summary table with various
-    statistics calculated based on the input DataFrame `df_fillout`, mutation key, fillout type, alt
-    threshold, and new fillout type. The summary table includes columns for median VAF, number of
+    statistics calculated based on the input DataFrame `df_fillout`, mutation key, alt threshold and
+    new fillout type. The summary table includes columns for median VAF, number of
     samples with alt count above the threshold, and number of samples with Total Depth > 0.
     """
+    summary_col = f"summary_fragment{suffix}"
+    vaf_col = f"t_vaf_fragment{suffix}"
+    alt_col = f"t_alt_count_fragment{suffix}"
+    pivot_key = mutation_key + ["Tumor_Sample_Barcode"]
+
+    # one summary string per mutation and sample, only repeated samples need joining
+    df_cells = df_fillout.dropna(subset=pivot_key)
+    repeated = df_cells.duplicated(subset=pivot_key, keep=False).to_numpy()
+    cells = df_cells.loc[~repeated].set_index(pivot_key)[summary_col]
+    if repeated.any():
+        joined = df_cells.loc[repeated].groupby(pivot_key)[summary_col].agg(" ".join)
+        cells = pd.concat([cells, joined])
+    summary_table = (
+        cells.unstack("Tumor_Sample_Barcode").sort_index().sort_index(axis=1)
+    )
 
-    if fillout_type == "NORMAL_":
-        summary_table = df_fillout.pivot_table(
-            index=mutation_key,
-            columns="Tumor_Sample_Barcode",
-            values="summary_fragment_standard",
-            aggfunc=lambda x: " ".join(x),
+    # all the statistics in a single grouped aggregation
+    # 't_vaf_fragment' column is NA for samples where mutation had no coverage, so count() will exclude it
+    stats = (
+        df_fillout.assign(
+            alt_detect=df_fillout[alt_col].astype(float) >= float(alt_thres),
+            vaf=df_fillout[vaf_col].astype(float),
         )
-        # Find the median VAF for the set
-        summary_table[new_fillout_type + "median_VAF"] = df_fillout.groupby(
-            mutation_key
-        )["t_vaf_fragment_standard"].median()
-
-        # Find the number of samples with alt count above the threshold (alt_thres)
-        summary_table[
-            new_fillout_type + "n_fillout_sample_alt_detect"
-        ] = df_fillout.groupby(mutation_key)["t_alt_count_fragment_standard"].aggregate(
-            lambda x: (x >= float(alt_thres)).sum()
-        )
-        # Find the number of sample with the Total Depth is >0
-        # 't_vaf_fragment' column is NA for samples where mutation had no coverage, so count() will exclude it
-        summary_table[new_fillout_type + "n_fillout_sample"] = df_fillout.groupby(
-            mutation_key
-        )["t_vaf_fragment_standard"].count()
-
-        new_columns = {
-            col: f"{col}-{new_fillout_type}"
-            for col in summary_table.columns
-            if not col.startswith(new_fillout_type)
-        }
-        summary_table.rename(columns=new_columns, inplace=True)
-    else:
-        summary_table = df_fillout.pivot_table(
-            index=mutation_key,
-            columns="Tumor_Sample_Barcode",
-            values="summary_fragment",
-            aggfunc=lambda x: " ".join(x),
+        .groupby(mutation_key)
+        .agg(
+            median_VAF=("vaf", "median"),
+            n_fillout_sample_alt_detect=("alt_detect", "sum"),
+            n_fillout_sample=("vaf", "count"),
         )
-        # Find the median VAF for the set
-        summary_table[new_fillout_type + "median_VAF"] = df_fillout.groupby(
-            mutation_key
-        )["t_vaf_fragment"].median()
+    )
+    # Find the median VAF for the set
+    # Find the number of samples with alt count above the threshold (alt_thres)
+    # Find the number of sample with the Total Depth is >0
+    for stat in ["median_VAF", "n_fillout_sample_alt_detect", "n_fillout_sample"]:
+        summary_table[new_fillout_type + stat] = stats[stat]
+
+    new_columns = {
+        col: f"{col}-{new_fillout_type}"
+        for col in summary_table.columns
+        if not col.startswith(new_fillout_type)
+    }
+    summary_table.rename(columns=new_columns, inplace=True)
 
-        # Find the number of samples with alt count above the threshold (alt_thres)
+    return summary_table
 
-        summary_table[new_fillout_type + "n_fillout_sample_alt_detect"] = (
-            df_fillout.groupby(mutation_key)["t_alt_count_fragment"].aggregate(
-                lambda x: (x >= float(alt_thres)).sum()
-            )
-        )
-        # Find the number of sample with the Total Depth is >0
-        # 't_vaf_fragment' column is NA for samples where mutation had no coverage, so count() will exclude it
-        summary_table[new_fillout_type + "n_fillout_sample"] = df_fillout.groupby(
-            mutation_key
-        )["t_vaf_fragment"].count()
-
-        new_columns = {
-            col: f"{col}-{new_fillout_type}"
-            for col in summary_table.columns
-            if not col.startswith(new_fillout_type)
-        }
-        summary_table.rename(columns=new_columns, inplace=True)
 
-    return summary_table
+def _pivot_table_summary_stats(
+    df_fillout, mutation_key, alt_thres, new_fillout_type, suffix=""
+):
+    """
+    Reference version of `__generate_table_and_find_summary_stats`, built with `pivot_table` and one
+    groupby per statistic. Kept to check the single aggregation against and to benchmark it.
+    """
+    summary_table = df_fillout.pivot_table(
+        index=mutation_key,
+        columns="Tumor_Sample_Barcode",
+        values=f"summary_fragment{suffix}",
+        aggfunc=lambda x: " ".join(x),
+    )
+    vaf = df_fillout[f"t_vaf_fragment{suffix}"].astype(float)
+    alt = df_fillout[f"t_alt_count_fragment{suffix}"].astype(float)
+    summary_table[new_fillout_type + "median_VAF"] = vaf.groupby(
+        [df_fillout[col] for col in mutation_key]
+    ).median()
+    summary_table[new_fillout_type + "n_fillout_sample_alt_detect"] = alt.groupby(
+        [df_fillout[col] for col in mutation_key]
+    ).aggregate(lambda x: (x >= float(alt_thres)).sum())
+    summary_table[new_fillout_type + "n_fillout_sample"] = vaf.groupby(
+        [df_fillout[col] for col in mutation_key]
+    ).count()
+    new_columns = {
+        col: f"{col}-{new_fillout_type}"
+        for col in summary_table.columns
+        if not col.startswith(new_fillout_type)
+    }
+    return summary_table.rename(columns=new_columns)
 
 
 def _create_fillout_summary(df_fillout, alt_thres, mutation_key):
@@ -216,84 +281,36 @@ def _create_fillout_summary(df_fillout, alt_thres, mutation_key):
         fillout_type = ""
         raise
 
-    # for each of the groups (exception of normals), we are going to subset to their duplex and simplex-duplex stats as well as rename the fillout type those categories
+    # for each of the groups (exception of normals), we are going to summarize their duplex and simplex-duplex stats as well as rename the fillout type those categories
     if fillout_type not in ("NORMAL_"):
-        # take the duplex stats and convert their column
-        base_columns = [
-            col
-            for col in df_fillout.columns
-            if not col.endswith(("_simplex_duplex", "_duplex", "_simplex"))
-        ]
-
-        duplex_columns = [
-            col
-            for col in df_fillout.columns
-            if not col.endswith(("_simplex_duplex", "_simplex"))
-        ]
-
-        duplex_df = df_fillout[duplex_columns]
-        duplex_df["fillout_type"] = f"{fillout_type}DUPLEX_"
-        new_fillout_type_D = f"{fillout_type}DUPLEX_"
-
-        simplex_duplex_columns = base_columns + [
-            col for col in df_fillout.columns if col.endswith(("_simplex_duplex"))
-        ]
-
-        simplex_duplex_df = df_fillout[simplex_duplex_columns]
-        simplex_duplex_df["fillout_type"] = f"{fillout_type}SIMPLEX_DUPLEX_"
-        new_fillout_type_SD = f"{fillout_type}SIMPLEX_DUPLEX_"
-
-        # remove the nan t alt count, t ref count and t total count and t vaf fragment columns
-
-        duplex_df = duplex_df.rename(
-            columns={
-                "summary_fragment_duplex": "summary_fragment",
-                "t_vaf_fragment_duplex": "t_vaf_fragment",
-                "t_alt_count_fragment_duplex": "t_alt_count_fragment",
-                "t_ref_count_fragment_duplex": "t_ref_count_fragment",
-                "t_total_count_fragment_duplex": "t_total_count_fragment",
-            }
-        )
-
-        simplex_duplex_df = simplex_duplex_df.rename(
-            columns={
-                "summary_fragment_simplex_duplex": "summary_fragment",
-                "t_vaf_fragment_simplex_duplex": "t_vaf_fragment",
-                "t_alt_count_fragment_simplex_duplex": "t_alt_count_fragment",
-                "t_ref_count_fragment_simplex_duplex": "t_ref_count_fragment",
-                "t_total_count_fragment_simplex_duplex": "t_total_count_fragment",
-            }
-        )
-
-        for col in ["t_vaf_fragment", "t_alt_count_fragment", "t_ref_count_fragment"]:
-            duplex_df[col] = duplex_df[col].astype(float)
-            simplex_duplex_df[col] = simplex_duplex_df[col].astype(float)
-
         duplex_summary_table = __generate_table_and_find_summary_stats(
-            duplex_df, mutation_key, fillout_type, alt_thres, new_fillout_type_D
+            df_fillout,
+            mutation_key,
+            alt_thres,
+            f"{fillout_type}DUPLEX_",
+            "_duplex",
         )
 
         simplex_duplex_summary_table = __generate_table_and_find_summary_stats(
-            simplex_duplex_df,
+            df_fillout,
             mutation_key,
-            fillout_type,
             alt_thres,
-            new_fillout_type_SD,
+            f"{fillout_type}SIMPLEX_DUPLEX_",
+            "_simplex_duplex",
         )
 
         return [duplex_summary_table, simplex_duplex_summary_table]
     else:
-
+        # the normal genotypes are later extracted from this frame with float counts
         for col in [
             "t_vaf_fragment_standard",
             "t_alt_count_fragment_standard",
             "t_ref_count_fragment_standard",
         ]:
             df_fillout[col] = df_fillout[col].astype(float)
-            df_normal_combined = df_fillout
 
         summary_table = __generate_table_and_find_summary_stats(
-            df_normal_combined, mutation_key, fillout_type, alt_thres, str(fillout_type)
+            df_fillout, mutation_key, alt_thres, str(fillout_type), "_standard"
         )
 
         return summary_table
@@ -538,6 +555,151 @@ def apply_filter_maf(pre_filter_maf, **kwargs):
 
     """
 
+    df_post_filter = pre_filter_maf.copy()
+    df_post_filter["Status"] = _filter_status(df_post_filter, kwargs)
+    df_post_filter_final = _cleanup_post_filter(df_post_filter)
+
+    return df_post_filter_final
+
+
+def _filter_status(df, kwargs):
+    """
+    The function `_filter_status` evaluates the access filter rules as boolean column masks and
+    assembles the `Status` string of every mutation from them.
+
+    The rules and the order of their tags match the row by row tagging functions in
+    `_apply_filter_maf_iterrows`: Germline or LikelyGermline, BelowAltThreshold (and
+    LostbyGenotyper), InCurated, TNRatio-curatedmedian, TNRatio-matchnorm and InBlacklist.
+
+    :param df: DataFrame containing the pre-filter mutation data
+
+    :param kwargs: dictionary of the filter thresholds and the blocklist, see `apply_filter_maf`
+
+    :return: Series of `Status` strings, indexed like `df`
+    """
+    tier_one_alt_min = float(kwargs["tier_one_alt_min"])
+    tier_two_alt_min = float(kwargs["tier_two_alt_min"])
+    tn_ratio_thres = float(kwargs["tn_ratio_thres"])
+    tumor_vaf = df["SD_t_vaf_fragment"]
+    tumor_alt = df["SD_t_alt_count_fragment"]
+    caller_alt = df["caller_t_alt_count"]
+    hotspot = df["hotspot_whitelist"]
+    no_match = pd.Series(False, index=df.index)
+
+    tumor_depth = df["SD_t_ref_count_fragment"] + tumor_alt
+    tumor_covered = tumor_depth > float(kwargs["tumor_TD_min"])
+    # matched normal columns are only present for matched samples
+    matched_normal = "n_vaf_fragment" in df.columns
+    if matched_normal:
+        normal_depth = df["n_ref_count_fragment"] + df["n_alt_count_fragment"]
+        normal_covered = normal_depth > float(kwargs["normal_TD_min"])
+    else:
+        normal_covered = no_match
+
+    germline = normal_covered
+    likely_germline = (
+        ~germline
+        & df["FILTER"].astype(str).str.contains("common_variant", regex=False)
+        & tumor_covered
+        & (tumor_vaf > float(kwargs["tumor_vaf_germline_thres"]))
+    )
+    below_alt_threshold = (tumor_alt < tier_one_alt_min) | (
+        (hotspot == False) & (tumor_alt < tier_two_alt_min)
+    )
+    lost_by_genotyper = below_alt_threshold & (
+        (caller_alt >= tier_two_alt_min)
+        | ((hotspot == True) & (caller_alt >= tier_one_alt_min))
+    )
+    in_curated = df["CURATED_DUPLEX_n_fillout_sample_alt_detect"] >= float(
+        kwargs["min_n_curated_samples_alt_detected"]
+    )
+    curated_median = df["CURATED_DUPLEX_median_VAF"]
+    tn_ratio_curated = (
+        tumor_covered
+        & (curated_median != 0)
+        & (tumor_vaf / curated_median < tn_ratio_thres)
+    )
+    if matched_normal:
+        normal_vaf = df["n_vaf_fragment"]
+        tn_ratio_matched = (
+            tumor_covered
+            & normal_covered
+            & (normal_vaf != 0)
+            & (tumor_vaf / normal_vaf < tn_ratio_thres)
+        )
+    else:
+        tn_ratio_matched = no_match
+    blocklisted = in_blocklist(df, kwargs["blocklist"])
+
+    status = pd.Series("", index=df.index, dtype=object)
+    for mask, tag in [
+        (germline, "Germline;"),
+        (likely_germline, "LikelyGermline;"),
+        (below_alt_threshold, "BelowAltThreshold;"),
+        (lost_by_genotyper, "LostbyGenotyper;"),
+        (in_curated, "InCurated;"),
+        (tn_ratio_curated, "TNRatio-curatedmedian;"),
+        (tn_ratio_matched, "TNRatio-matchnorm;"),
+        (blocklisted, "InBlacklist;"),
+    ]:
+        status = status.mask(mask, status + tag)
+    return status
+
+
+def _cleanup_post_filter(df_post_filter):
+    """
+    The function `_cleanup_post_filter` reorganizes columns in a DataFrame and adds new columns if
+    certain columns are missing.
+
+    :param df_post_filter: The `_cleanup_post_filter` function is designed to clean up and modify a
+    DataFrame `df_post_filter` by moving the "Status" column next to "Hotspots" and adding
+    additional columns related to matched normal samples if they do not already exist
+
+    :return: The function `_cleanup_post_filter` is returning the DataFrame `df_post_filter` after
+    performing the specified operations, which include moving the "Status" column next to
+    "Hotspots", adding columns for "Matched_Norm_Sample_Barcode", "n_alt_count_fragment",
+    "n_ref_count_fragment", and "n_vaf_fragment" if they do not already exist, and inserting a
+    "Match"
+    """
+
+    # Move Status column next to Hotspots
+    col = list(df_post_filter)
+    col.insert(col.index("SD_t_alt_count_fragment"), col.pop(col.index("Status")))
+    df_post_filter = df_post_filter[col]
+    # Add Match Normal columns even when sample is unmatched
+    if "Matched_Norm_Sample_Barcode" not in col:
+        df_post_filter.insert(
+            col.index("SD_t_vaf_fragment") + 1,
+            "Matched_Norm_Sample_Barcode",
+            "Unmatched",
+        )
+        df_post_filter.insert(
+            col.index("SD_t_vaf_fragment") + 2, "n_alt_count_fragment", "NA"
+        )
+        df_post_filter.insert(
+            col.index("SD_t_vaf_fragment") + 3, "n_ref_count_fragment", "NA"
+        )
+        df_post_filter.insert(
+            col.index("SD_t_vaf_fragment") + 4, "n_vaf_fragment", "NA"
+        )
+
+    col = list(df_post_filter)
+    df_post_filter.insert(
+        col.index("Matched_Norm_Sample_Barcode") + 1, "Matched_Norm_Bamfile", "NA"
+    )
+    return df_post_filter
+
+
+def _apply_filter_maf_iterrows(pre_filter_maf, **kwargs):
+    """
+    Row by row version of `apply_filter_maf`, calling one tagging function per rule for every
+    mutation. Kept as the reference the vectorized rules are checked against.
+
+    :param pre_filter_maf: DataFrame containing the pre-filter mutation data
+
+    :return: DataFrame with the `Status` column added
+    """
+
     # mini tagging functions (will need to be moved into helper.pyx)
     def tag_germline(mut, status, inner_kwargs):
         """
@@ -679,9 +841,9 @@ def apply_filter_maf(pre_filter_maf, **kwargs):
                         status = status + "TNRatio-matchnorm;"
         return status
 
-    def in_blocklist(mut, status, inner_kwargs):
+    def tag_in_blocklist(mut, status, inner_kwargs):
         """
-        The function `in_blocklist` checks if a mutation is listed in a blocklist and updates the status
+        The function `tag_in_blocklist` checks if a mutation is listed in a blocklist and updates the status
         accordingly.
 
         :param mut: The `mut` parameter is a dictionary containing information about a mutation. It
@@ -691,74 +853,18 @@ def apply_filter_maf(pre_filter_maf, **kwargs):
         :param status: The `status` parameter is a variable that holds the current status of a mutation.
         It is updated based on whether the mutation is listed in a blocklist
 
-        :param inner_kwargs: `inner_kwargs` is a dictionary containing the key "blocklist_lst", which is
-        a list of strings representing mutations that are in a blocklist. The function `in_blocklist`
-        takes three parameters: `mut` (a dictionary representing a mutation), `status` (a string
-        representing the current
+        :param inner_kwargs: `inner_kwargs` is a dictionary containing the key "blocklist", the
+        blocklist keys returned by `extract_blocklist`.
 
         :return: the updated `status` variable, which may have the string "InBlacklist;" appended to it
         if the mutation specified in the input `mut` is found in the blocklist specified in
-        `inner_kwargs["blocklist_lst"]`.
+        `inner_kwargs["blocklist"]`.
         """
         # if mutation is listed in blocklist
-        if (
-            str(mut["Chromosome"])
-            + "_"
-            + str(mut["Start_Position"])
-            + "_"
-            + str(mut["End_Position"])
-            + "_"
-            + str(mut["Reference_Allele"])
-            + "_"
-            + str(mut["Tumor_Seq_Allele2"])
-            in inner_kwargs["blocklist_lst"]
-        ):
+        if tuple(str(mut[col]) for col in BLOCKLIST_KEY) in inner_kwargs["blocklist"]:
             status = status + "InBlacklist;"
         return status
 
-    def cleanup_post_filter(df_post_filter):
-        """
-        The function `cleanup_post_filter` reorganizes columns in a DataFrame and adds new columns if
-        certain columns are missing.
-
-        :param df_post_filter: The `cleanup_post_filter` function is designed to clean up and modify a
-        DataFrame `df_post_filter` by moving the "Status" column next to "Hotspots" and adding
-        additional columns related to matched normal samples if they do not already exist
-
-        :return: The function `cleanup_post_filter` is returning the DataFrame `df_post_filter` after
-        performing the specified operations, which include moving the "Status" column next to
-        "Hotspots", adding columns for "Matched_Norm_Sample_Barcode", "n_alt_count_fragment",
-        "n_ref_count_fragment", and "n_vaf_fragment" if they do not already exist, and inserting a
-        "Match"
-        """
-
-        # Move Status column next to Hotspots
-        col = list(df_post_filter)
-        col.insert(col.index("SD_t_alt_count_fragment"), col.pop(col.index("Status")))
-        df_post_filter = df_post_filter[col]
-        # Add Match Normal columns even when sample is unmatched
-        if "Matched_Norm_Sample_Barcode" not in col:
-            df_post_filter.insert(
-                col.index("SD_t_vaf_fragment") + 1,
-                "Matched_Norm_Sample_Barcode",
-                "Unmatched",
-            )
-            df_post_filter.insert(
-                col.index("SD_t_vaf_fragment") + 2, "n_alt_count_fragment", "NA"
-            )
-            df_post_filter.insert(
-                col.index("SD_t_vaf_fragment") + 3, "n_ref_count_fragment", "NA"
-            )
-            df_post_filter.insert(
-                col.index("SD_t_vaf_fragment") + 4, "n_vaf_fragment", "NA"
-            )
-
-        col = list(df_post_filter)
-        df_post_filter.insert(
-            col.index("Matched_Norm_Sample_Barcode") + 1, "Matched_Norm_Bamfile", "NA"
-        )
-        return df_post_filter
-
     df_post_filter = pre_filter_maf.copy()
     df_post_filter["Status"] = ""
 
@@ -776,10 +882,10 @@ def apply_filter_maf(pre_filter_maf, **kwargs):
         status = occurrence_in_normal(mut, status, kwargs)
         if status is None:
             status = ""
-        status = in_blocklist(mut, status, kwargs)
+        status = tag_in_blocklist(mut, status, kwargs)
         df_post_filter.loc[i, "Status"] = status
 
-    df_post_filter_final = cleanup_post_filter(df_post_filter)
+    df_post_filter_final = _cleanup_post_filter(df_post_filter)
 
     return df_post_filter_final
 
@@ -20,6 +20,8 @@ from postprocessing_variant_calls.maf.helper import (
     check_maf,
     check_txt,
     check_separator,
+    check_format,
+    write_maf,
     read_tsv,
     MAFFile,
     gen_id_tsv,
@@ -79,11 +81,32 @@ def hotspot(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
-    mafa = mafa.filter("hotspot")
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="hotspot" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
+    mafa.run("filter", "hotspot", output_maf, output_format)
     return 0
 
 
@@ -113,11 +136,32 @@ def non_hotspot(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
-    mafa = mafa.filter("non_hotspot")
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="non_hotspot" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
+    mafa.run("filter", "non_hotspot", output_maf, output_format)
     return 0
 
 
@@ -148,11 +192,32 @@ def not_complex(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
-    mafa = mafa.filter("not_complex")
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="not_complex" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
+    mafa.run("filter", "not_complex", output_maf, output_format)
     return 0
 
 
@@ -180,11 +245,32 @@ def mappable(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
-    mafa = mafa.filter("mappable")
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="mappable" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
+    mafa.run("filter", "mappable", output_maf, output_format)
     return 0
 
 
@@ -215,11 +301,32 @@ def non_common_variant(
         help="Specify a separator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
-    mafa = mafa.filter("non_common_variant")
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="non_common_variant" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
+    mafa.run("filter", "non_common_variant", output_maf, output_format)
     return 0
 
 
@@ -247,11 +354,32 @@ def cmo_ch(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
-    mafa = mafa.filter("cmo_ch_filter")
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="cmo_ch_filter" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
+    mafa.run("filter", "cmo_ch_filter", output_maf, output_format)
     return 0
 
 
@@ -294,6 +422,12 @@ def access_remove_variants(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
 ):
     # prep maf
     mafa = MAFFile(maf, separator)
@@ -306,9 +440,7 @@ def access_remove_variants(
 
     final_maf_df = subset_df.drop(columns=variant_columns)
 
-    final_maf_df.to_csv(
-        f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t"
-    )
+    write_maf(final_maf_df, output_maf, output_format)
 
     return 0
 
@@ -433,15 +565,16 @@ def access_filters(
 ):
 
     # prep annotated and fillout mafs
-    fillout_mafa = MAFFile(fillout_maf, separator)
-    anno_mafa = MAFFile(anno_maf, separator)
+    # read without the maf schema: the mpath formatting only zero-fills object columns
+    fillout_mafa = MAFFile(fillout_maf, separator, schema=False)
+    anno_mafa = MAFFile(anno_maf, separator, schema=False)
     mutation_key = fillout_mafa.cols["general"]
 
     # convert the anno maf to dataframe (functions located in MAF class)
     df_annotation = anno_mafa.convert_annomaf_to_df()
 
     # # call the extract blocklist function
-    blocklist_lst = extract_blocklist(blocklist, separator)
+    blocklist_keys = extract_blocklist(blocklist, separator)
 
     # # standard compiled arguments for rest of access_filters functions
     args = {
@@ -453,7 +586,7 @@ def access_filters(
         "tier_two_alt_min": tier_two_alt_min,
         "min_n_curated_samples_alt_detected": min_n_curated_samples_alt_detected,
         "tn_ratio_thres": tn_ratio_thres,
-        "blocklist_lst": blocklist_lst,
+        "blocklist": blocklist_keys,
     }
 
     # # call the extract fillout type function to return all subcategory dfs with summary columns calculated (function located in MAF class)
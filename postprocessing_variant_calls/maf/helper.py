@@ -1,17 +1,29 @@
 #!/usr/bin/env python
 # imports
+import io
 import os
 import sys
 import csv
 import re
+import time
+import logging
+import tempfile
 
 from pathlib import Path
-from contextlib import ExitStack
+from itertools import repeat
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Optional
 import typer
 import pandas as pd
 import numpy as np
 from .resources import tsg_genes
+from postprocessing_variant_calls.cache.resource_cache import (
+    cached_resource,
+    content_hash,
+    frame_to_arrays,
+    arrays_to_frame,
+)
 
 from postprocessing_variant_calls.maf.tag.tag_constants import (
     MAF_DUMMY_COLUMNS2,
@@ -24,8 +36,21 @@ from postprocessing_variant_calls.maf.tag.tag_constants import (
     NONPANEL_SILENT_FILTERED,
     DROPPED,
     ALLOWED_EXONIC_VARIANT_CLASS,
+    MAF_CATEGORY_COLUMNS,
+    MAF_COUNT_COLUMNS,
 )
 
+logger = logging.getLogger("maf")
+
+# columns making up the variant id of every MAFFile
+MAF_ID_COLUMNS = [
+    "Chromosome",
+    "Start_Position",
+    "End_Position",
+    "Reference_Allele",
+    "Tumor_Seq_Allele2",
+]
+
 
 def process_paths(paths):
     file = open(paths, "r")
@@ -62,8 +87,26 @@ def IS_EXONIC_CLASS(Gene, Variant_Classification, Coordinate):
         return None
 
 
+def IS_EXONIC_CLASS_MASK(Gene, Variant_Classification, Coordinate):
+    """
+    Column-wise IS_EXONIC_CLASS, takes maf columns and returns
+    a boolean Series, True where the variant is considered exonic.
+    Keep the conditions in sync with IS_EXONIC_CLASS.
+    """
+    return (
+        Variant_Classification.isin(ALLOWED_EXONIC_VARIANT_CLASS)
+        | ((Gene == "TERT") & (Variant_Classification == "5'Flank"))
+        | (
+            (Gene == "MET")
+            & (Variant_Classification == "Intron")
+            & (Coordinate >= 116411708)
+            & (Coordinate <= 116414935)
+        )
+    )
+
+
 def check_maf(files: List[Path]):
-    acceptable_extensions = [".maf", ".txt", ".csv", "tsv"]
+    acceptable_extensions = [".maf", ".txt", ".csv", "tsv", *COLUMNAR_FORMATS]
     # return non if argument is empty
     if files is None:
         return None
@@ -176,68 +219,285 @@ def make_condensed_post_filter(df_post_filter):
     return df_condensed
 
 
+def _format_summary(alt, ref, vaf, chunk_size=65536):
+    # one formatting pass into a preallocated array, str() of every value matches
+    # the former astype(str) concatenation. Chunking bounds the temporary python objects.
+    depth = (alt.astype(int) + ref.astype(int)).to_numpy()
+    alt, ref, vaf = alt.to_numpy(), ref.to_numpy(), vaf.fillna(0).to_numpy()
+    summary = np.empty(len(depth), dtype=object)
+    for start in range(0, len(depth), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        summary[chunk] = [
+            f"DP={dp};RD={rd};AD={ad};VF={vf}"
+            for dp, rd, ad, vf in zip(
+                depth[chunk].tolist(),
+                ref[chunk].tolist(),
+                alt[chunk].tolist(),
+                vaf[chunk].tolist(),
+            )
+        ]
+    return summary
+
+
 # FindVAFandSummary
 def _find_VAFandsummary(df, sample_group):  # add category as third argumnet
+    """Add the DP=..;RD=..;AD=..;VF=.. summary_fragment columns of one or more sample groups.
+
+    The input frame is not copied or modified, the returned frame shares its columns.
+
+    Args:
+        df (data_frame): fillout data frame of a single fillout category
+        sample_group (str/list): sample group(s), e.g. simplex, duplex, simplex_duplex or standard
+
+    Returns:
+        data_frame: df with a summary_fragment_<sample_group> column per sample group
+    """
     # add a line of code here to rename the simplex, duplex and simplex_duplex columns with a prefix of the category they belong to.
-    df = df.copy()
+    sample_groups = [sample_group] if isinstance(sample_group, str) else sample_group
+    # shallow copy, columns are added or replaced without copying the others
+    df = df.copy(deep=False)
 
     # find the VAF from the fillout (the comma separated string values that the summary will later be calculated from)
     # NOTE: col [t_vaf_fragment] already calculated by traceback, no need to create column again
 
     if (~df["fillout_type"].isin(["MATCHED_NORMAL", "UNMATCHED_NORMAL"])).any():
-        df[f"summary_fragment_{str(sample_group)}"] = (
-            "DP="
-            + (
-                df[f"t_alt_count_fragment_{str(sample_group)}"].astype(int)
-                + df[f"t_ref_count_fragment_{str(sample_group)}"].astype(int)
-            ).astype(str)
-            + ";RD="
-            + df[f"t_ref_count_fragment_{str(sample_group)}"].astype(str)
-            + ";AD="
-            + df[f"t_alt_count_fragment_{str(sample_group)}"].astype(str)
-            + ";VF="
-            + df[f"t_vaf_fragment_{str(sample_group)}"].fillna(0).astype(str)
-        )
+        for group in sample_groups:
+            df[f"summary_fragment_{group}"] = _format_summary(
+                df[f"t_alt_count_fragment_{group}"],
+                df[f"t_ref_count_fragment_{group}"],
+                df[f"t_vaf_fragment_{group}"],
+            )
     else:
-        df["t_vaf_fragment_standard"] = (
-            df["t_alt_count_fragment_standard"]
-            / (
-                df["t_alt_count_fragment_standard"].astype(int)
-                + df["t_ref_count_fragment_standard"].astype(int)
-            )
-        ).round(4)
-        df[f"summary_fragment_standard"] = (
-            "DP="
-            + (
-                df[f"t_alt_count_fragment_standard"].astype(int)
-                + df[f"t_ref_count_fragment_standard"].astype(int)
-            ).astype(str)
-            + ";RD="
-            + df[f"t_ref_count_fragment_standard"].astype(str)
-            + ";AD="
-            + df[f"t_alt_count_fragment_standard"].astype(str)
-            + ";VF="
-            + df[f"t_vaf_fragment_standard"].fillna(0).astype(str)
-        )
+        alt = df["t_alt_count_fragment_standard"]
+        ref = df["t_ref_count_fragment_standard"]
+        vaf = (alt / (alt.astype(int) + ref.astype(int))).round(4)
+        df["t_vaf_fragment_standard"] = vaf
+        df["summary_fragment_standard"] = _format_summary(alt, ref, vaf)
 
     return df
 
 
+DE_DUPLICATION_COLUMNS = [
+    "Hugo_Symbol",
+    "Chromosome",
+    "Start_Position",
+    "End_Position",
+    "Reference_Allele",
+    "Tumor_Seq_Allele2",
+    "Variant_Classification",
+    "Variant_Type",
+    "HGVSc",
+    "HGVSp",
+    "HGVSp_Short",
+]
+
+
+# (row number, 64-bit key) records spilled to the partition files of external_first_occurrence
+SPILL_RECORD = np.dtype([("row", "<u8"), ("key", "<u8")])
+
+
+def duplication_key(data_frame):
+    """Hash the DE_DUPLICATION_COLUMNS of every row into a 64-bit key.
+
+    Args:
+        data_frame (data_frame): data frame containing the DE_DUPLICATION_COLUMNS
+
+    Returns:
+        numpy array: uint64 key for every row
+    """
+    return pd.util.hash_pandas_object(
+        data_frame[DE_DUPLICATION_COLUMNS], index=False
+    ).to_numpy()
+
+
 def maf_duplicates(data_frame):
-    de_duplication_columns = [
-        "Hugo_Symbol",
-        "Chromosome",
-        "Start_Position",
-        "End_Position",
-        "Reference_Allele",
-        "Tumor_Seq_Allele2",
-        "Variant_Classification",
-        "Variant_Type",
-        "HGVSc",
-        "HGVSp",
-        "HGVSp_Short",
-    ]
-    return data_frame.drop_duplicates(subset=de_duplication_columns)
+    first = ~pd.Series(duplication_key(data_frame)).duplicated().to_numpy()
+    return data_frame[first]
+
+
+@contextmanager
+def external_first_occurrence(key_chunks, n_partitions=64, tmp_dir=None):
+    """Find the first occurrence of every key without holding the keys in memory.
+
+    Keys are numbered in input order and spilled to n_partitions temp files by
+    key, so every duplicate of a key lands in the same partition. Partitions are
+    then deduplicated one at a time and the first occurrences marked in a
+    memory-mapped boolean array, one byte per row on disk.
+
+    Args:
+        key_chunks (iterable): uint64 key arrays, in input order
+        n_partitions (int): number of spill files, each is loaded on its own
+        tmp_dir (str/path, optional): where to spill, defaults to the system temp dir
+
+    Yields:
+        numpy memmap: True for the rows holding the first occurrence of their key
+    """
+    with tempfile.TemporaryDirectory(prefix="maf_dedup_", dir=tmp_dir) as spill_dir:
+        spill_dir = Path(spill_dir)
+        n_rows = 0
+        with ExitStack() as stack:
+            partitions = [
+                stack.enter_context(open(spill_dir / f"{i}.bin", "wb"))
+                for i in range(n_partitions)
+            ]
+            for keys in key_chunks:
+                records = np.empty(len(keys), dtype=SPILL_RECORD)
+                records["row"] = np.arange(n_rows, n_rows + len(keys))
+                records["key"] = keys
+                n_rows += len(keys)
+                bucket = records["key"] % np.uint64(n_partitions)
+                order = np.argsort(bucket, kind="stable")
+                bounds = np.searchsorted(bucket[order], np.arange(n_partitions + 1))
+                for i in np.flatnonzero(np.diff(bounds)):
+                    records[order[bounds[i] : bounds[i + 1]]].tofile(partitions[i])
+        first = np.memmap(
+            spill_dir / "first.bin", dtype=bool, mode="w+", shape=max(n_rows, 1)
+        )[:n_rows]
+        for i in range(n_partitions):
+            records = np.fromfile(spill_dir / f"{i}.bin", dtype=SPILL_RECORD)
+            # rows were appended in input order, the first index of a key is its first occurrence
+            _, index = np.unique(records["key"], return_index=True)
+            first[records["row"][index]] = True
+            del records
+        try:
+            yield first
+        finally:
+            del first
+
+
+def _load_maf(file_path, separator, header):
+    start = time.perf_counter()
+    data_frame = MAFFile(file_path, separator, header).data_frame
+    return data_frame, time.perf_counter() - start
+
+
+def load_mafs(files, separator, header=None, workers=1):
+    """Parse maf files into data frames, in parallel processes when workers > 1.
+
+    Args:
+        files (list): maf files to parse
+        separator (str): field separator of the files
+        header (str/path, optional): header file with the columns to keep
+        workers (int): number of processes parsing files at the same time
+
+    Returns:
+        list: the MAFFile data frames, in the order of files
+    """
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            results = list(
+                executor.map(
+                    _load_maf,
+                    files,
+                    repeat(separator),
+                    repeat(header),
+                    chunksize=max(1, len(files) // (workers * 4)),
+                )
+            )
+    else:
+        results = [_load_maf(maf, separator, header) for maf in files]
+    for maf, (_, elapsed) in zip(files, results):
+        logger.info("parsed %s in %.3fs", maf, elapsed)
+    return [data_frame for data_frame, _ in results]
+
+
+def stream_concat(
+    files,
+    output_maf,
+    separator,
+    header=None,
+    deduplicate=False,
+    chunksize=100_000,
+    tmp_dir=None,
+    maf_format="tsv",
+):
+    """Concatenate maf files row-wise, writing each chunk to the output as it is read.
+
+    Peak memory is one chunk. Deduplicating reads the files twice, spilling the
+    row hashes to tmp_dir in between, see external_first_occurrence.
+    Values are copied verbatim as text, the output columns are the union of the
+    input columns in order of appearance, empty where a file lacks a column.
+
+    Args:
+        files (list): maf files to concatenate
+        output_maf (str/path): output maf file
+        separator (str): field separator of the input files
+        header (list, optional): columns to concatenate on, other columns are dropped
+        deduplicate (bool): drop rows repeating the DE_DUPLICATION_COLUMNS of an earlier row
+        chunksize (int): number of rows read at a time
+        tmp_dir (str/path, optional): where to spill the row hashes when deduplicating
+        maf_format (str): output format, tsv or csv
+
+    Returns:
+        int: number of rows written
+    """
+    # first pass over the header lines only, to align the chunks of every file
+    file_columns = []
+    for maf in files:
+        columns = read_header_columns(maf, separator)
+        if header:
+            columns = [col for col in columns if col in header]
+        missing = set(MAF_ID_COLUMNS) - set(columns)
+        if missing:
+            typer.secho(
+                f"maf file must include {MAF_ID_COLUMNS} columns to generate an id for annotating the input maf.",
+                fg=typer.colors.RED,
+            )
+            raise typer.Abort()
+        file_columns.append(columns)
+    output_columns = list(dict.fromkeys(col for cols in file_columns for col in cols))
+    if deduplicate and not set(DE_DUPLICATION_COLUMNS).issubset(output_columns):
+        missing = [col for col in DE_DUPLICATION_COLUMNS if col not in output_columns]
+        typer.secho(
+            f"maf files must include {missing} columns to be deduplicated.",
+            fg=typer.colors.RED,
+        )
+        raise typer.Abort()
+
+    def read_chunks(maf, columns, usecols):
+        for chunk in iter_delimited(
+            maf,
+            separator,
+            chunksize,
+            usecols=usecols,
+            dtype=str,
+            keep_default_na=False,
+        ):
+            yield chunk.reindex(columns=columns, fill_value="")
+
+    def write_chunks(output, first=None):
+        n_rows = 0
+        offset = 0
+        for maf, columns in zip(files, file_columns):
+            typer.secho(f"Streaming maf file: {maf}", fg=typer.colors.BRIGHT_GREEN)
+            for chunk in read_chunks(maf, output_columns, columns):
+                if first is not None:
+                    keep = np.asarray(first[offset : offset + len(chunk)])
+                    offset += len(chunk)
+                    chunk = chunk[keep]
+                chunk.to_csv(output, sep=output_separator, index=False, header=False)
+                n_rows += len(chunk)
+        return n_rows
+
+    output_separator = MAF_FORMATS[maf_format]
+    with open(output_maf, "w", newline="") as output:
+        pd.DataFrame(columns=output_columns).to_csv(
+            output, sep=output_separator, index=False
+        )
+        if not deduplicate:
+            return write_chunks(output)
+        # first pass hashes the deduplication columns only, second pass writes the first occurrences
+        key_chunks = (
+            duplication_key(chunk)
+            for maf, columns in zip(files, file_columns)
+            for chunk in read_chunks(
+                maf,
+                DE_DUPLICATION_COLUMNS,
+                [col for col in columns if col in DE_DUPLICATION_COLUMNS],
+            )
+        )
+        with external_first_occurrence(key_chunks, tmp_dir=tmp_dir) as first:
+            return write_chunks(output, first)
 
 
 def check_txt(paths: Path):
@@ -268,6 +528,93 @@ def check_separator(separator: str):
     return sep
 
 
+# columnar formats, detected from the file extension, that need the optional pyarrow
+COLUMNAR_FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+MAF_FORMATS = {"tsv": "\t", "csv": ",", "parquet": None, "feather": None}
+
+
+def check_format(maf_format: Optional[str]):
+    if maf_format is None or maf_format in MAF_FORMATS:
+        return maf_format
+    typer.secho(
+        f"Format must be one of {', '.join(MAF_FORMATS)}, not '{maf_format}'",
+        fg=typer.colors.RED,
+    )
+    raise typer.Abort()
+
+
+def columnar_format(file_path):
+    """Columnar format of a file from its extension, None for delimited text files."""
+    return COLUMNAR_FORMATS.get(Path(file_path).suffix.lower())
+
+
+def _require_pyarrow(maf_format):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        typer.secho(
+            f"Reading and writing {maf_format} files requires pyarrow, install it with `pip install pyarrow`.",
+            fg=typer.colors.RED,
+        )
+        raise typer.Abort()
+
+
+def read_columnar(file_path, maf_format=None, columns=None):
+    """Read a Parquet or Feather file, keeping the dtypes it was written with.
+
+    Args:
+        file_path (str/path): file to be read
+        maf_format (str, optional): parquet or feather, detected from the extension by default
+        columns (list, optional): only read these columns
+
+    Returns:
+        data_frame: data frame of the file
+    """
+    maf_format = maf_format or columnar_format(file_path)
+    _require_pyarrow(maf_format)
+    start = time.perf_counter()
+    if maf_format == "parquet":
+        df = pd.read_parquet(file_path, columns=columns)
+    else:
+        df = pd.read_feather(file_path, columns=columns)
+    _log_throughput(file_path, os.path.getsize(file_path), start)
+    return df
+
+
+def write_maf(df, output_file, maf_format=None):
+    """Write a maf data frame as tsv, csv, Parquet or Feather.
+
+    Delimited files are written without the index, as every command always did.
+    Columnar files keep the dtypes of df, so the next command reads them back
+    without parsing text.
+
+    Args:
+        df (data_frame): maf to write
+        output_file (str/path): output file
+        maf_format (str, optional): one of MAF_FORMATS, detected from the extension
+            of output_file by default and tsv otherwise
+    """
+    maf_format = maf_format or columnar_format(output_file) or "tsv"
+    start = time.perf_counter()
+    if MAF_FORMATS[maf_format] is not None:
+        df.to_csv(output_file, sep=MAF_FORMATS[maf_format], index=False)
+    else:
+        _require_pyarrow(maf_format)
+        # the index of a maf is only ever a view of its columns, it is never written
+        df = df.reset_index(drop=True)
+        if maf_format == "parquet":
+            df.to_parquet(output_file, index=False)
+        else:
+            df.to_feather(output_file)
+    _log_throughput(output_file, os.path.getsize(output_file), start, action="wrote")
+
+
 def read_tsv(tsv, separator, canonical_tx_ref_flag=False):
     """Read a tsv file
 
@@ -283,14 +630,18 @@ def read_tsv(tsv, separator, canonical_tx_ref_flag=False):
     """
     typer.echo("Read Delimited file...")
     if canonical_tx_ref_flag != False:
-        skip = get_row(tsv)
         try:
-            tx_tsv = pd.read_csv(
+            tx_tsv = cached_resource(
+                "canonical_transcripts",
                 tsv,
-                sep=separator,
-                skiprows=skip,
-                low_memory=False,
-                usecols=["isoform", "gene_name", "refseq_id"],
+                lambda: read_delimited(
+                    tsv,
+                    separator,
+                    usecols=["isoform", "gene_name", "refseq_id"],
+                ),
+                frame_to_arrays,
+                arrays_to_frame,
+                params=(separator,),
             )
             tx_isoform_list = tx_tsv.isoform.values.tolist()
             return tx_tsv, tx_isoform_list
@@ -302,21 +653,225 @@ def read_tsv(tsv, separator, canonical_tx_ref_flag=False):
             )
             raise
     else:
-        skip = get_row(tsv)
-        return pd.read_csv(tsv, sep=separator, skiprows=skip, low_memory=False)
+        return read_delimited(tsv, separator)
+
+
+def canonical_refseq_ids(tx_df):
+    """Map every isoform of a canonical transcript file to its reportable refseq ids.
+
+    Args:
+        tx_df (data_frame): canonical transcript file, as read by read_tsv with canonical_tx_ref_flag
+
+    Returns:
+        dict: isoform -> list of its refseq ids, formatted as a string
+    """
+    return {
+        isoform: str(refseq_ids.tolist())
+        for isoform, refseq_ids in tx_df.groupby("isoform", sort=False)["refseq_id"]
+    }
+
+
+# output file of every by_variant_classification tag
+CLASSIFICATION_OUTPUTS = {
+    "exonic": EXONIC_FILTERED,
+    "silent": SILENT_FILTERED,
+    "nonpanel_exonic": NONPANEL_EXONIC_FILTERED,
+    "nonpanel_silent": NONPANEL_SILENT_FILTERED,
+    "dropped": DROPPED,
+}
+
+
+def write_classification_outputs(final_maf, tx_df, output_dir, buffer_size=1 << 20):
+    """Write the variants of every by_variant_classification tag to its own tsv.
+
+    Each table is a row subset of the MAF_TSV_COL_MAP columns, written with a single
+    to_csv call through a buffered handle under the MAF_TSV_COL_MAP header. Tags are
+    matched as substrings, so nonpanel variants are also written to the exonic and
+    silent files. Exonic variants report the refseq ids of their canonical transcript.
+
+    Args:
+        final_maf (data_frame): maf tagged by MAFFile.tag_by_variant_classification
+        tx_df (data_frame): canonical transcript file, see canonical_refseq_ids
+        output_dir (str/path): directory the CLASSIFICATION_OUTPUTS are written to
+        buffer_size (int): write buffer of each output file, in bytes
+
+    Returns:
+        dict: output file path -> number of variants written
+    """
+    missing_columns = set(MAF_TSV_COL_MAP.keys()) - set(final_maf.columns)
+    if missing_columns:
+        raise Exception(
+            "Missing required columns: {}".format(",".join(missing_columns))
+        )
+
+    # every value is written as its str(), the tsv format expected downstream
+    variants = final_maf[list(MAF_TSV_COL_MAP.keys())].astype(str)
+    tags = final_maf["classification"]
+
+    n_variants = {}
+    for tag, name in CLASSIFICATION_OUTPUTS.items():
+        variants_subset = variants[tags.str.contains(tag, regex=False).to_numpy()]
+        if tag == "exonic":
+            variants_subset = variants_subset.assign(
+                Transcript_ID=final_maf.loc[variants_subset.index, "Transcript_ID"]
+                .map(canonical_refseq_ids(tx_df))
+                .fillna("[]")
+            )
+        output_path = os.path.join(output_dir, name)
+        start = time.perf_counter()
+        with open(output_path, "w", buffering=buffer_size, newline="") as output:
+            variants_subset.to_csv(
+                output,
+                sep="\t",
+                index=False,
+                header=list(MAF_TSV_COL_MAP.values()),
+                quoting=csv.QUOTE_NONE,
+                lineterminator="\n",
+            )
+            n_bytes = output.tell()
+        _log_throughput(output_path, n_bytes, start, action="wrote")
+        n_variants[output_path] = len(variants_subset)
+    return n_variants
+
+
+def _key_strings(values):
+    # positions read as float because of missing values still match integer positions
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        values = values.astype("Int64")
+    return values.astype(str)
+
+
+# columns identifying a hotspot, in key order
+HOTSPOT_COLUMNS = [
+    "Chromosome",
+    "Start_Position",
+    "Reference_Allele",
+    "Tumor_Seq_Allele2",
+]
+
+# bump when the key scheme changes, so saved indexes are rebuilt
+HOTSPOT_INDEX_VERSION = 1
+
+
+def hotspot_keys(df):
+    """Hash the HOTSPOT_COLUMNS of every row into a 64-bit key.
+
+    Args:
+        df (data_frame): data frame containing the HOTSPOT_COLUMNS
+
+    Returns:
+        numpy array: uint64 key for every row
+    """
+    parts = pd.DataFrame({col: _key_strings(df[col]) for col in HOTSPOT_COLUMNS})
+    return pd.util.hash_pandas_object(parts, index=False).to_numpy()
 
 
-def tag_by_hotspots(input_maf, hotspots_maf):
+def _file_fingerprint(file_path):
+    # the content hash the resource cache keys the hotspot index by
+    return content_hash(file_path, HOTSPOT_INDEX_VERSION)
+
+
+class HotspotIndex:
+    """Sorted 64-bit keys of the variants of a hotspots file.
+
+    The index can be saved to a binary .npz file and is loaded from it on the
+    next run, as long as the hotspots file has the same content hash as in the
+    resource cache.
+    """
+
+    def __init__(self, keys, fingerprint=None):
+        self.keys = np.unique(keys)
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_file(cls, hotspots_file, separator="\t"):
+        hotspots = read_delimited(
+            hotspots_file,
+            separator,
+            usecols=HOTSPOT_COLUMNS,
+            dtype=str,
+            keep_default_na=False,
+        )
+        return cls(hotspot_keys(hotspots))
+
+    @classmethod
+    def load(cls, hotspots_file, index_file=None):
+        """Load the index of a hotspots file, from index_file when it is up to date.
+
+        Without an index_file, the index is kept in the resource cache instead.
+
+        Args:
+            hotspots_file (str/path): hotspots file with the HOTSPOT_COLUMNS
+            index_file (str/path, optional): saved index, written when missing or stale
+
+        Returns:
+            HotspotIndex: index of the hotspots file
+        """
+        if index_file is None:
+            return cached_resource(
+                "hotspots",
+                hotspots_file,
+                lambda: cls.from_file(hotspots_file),
+                lambda index: {"keys": index.keys},
+                lambda arrays: cls(arrays["keys"]),
+                params=(HOTSPOT_INDEX_VERSION,),
+            )
+        fingerprint = _file_fingerprint(hotspots_file)
+        if os.path.exists(index_file):
+            with np.load(index_file) as saved:
+                if str(saved["fingerprint"]) == fingerprint:
+                    logger.info("loaded hotspot index %s", index_file)
+                    return cls(saved["keys"], fingerprint)
+        index = cls.from_file(hotspots_file)
+        index.fingerprint = fingerprint
+        index.save(index_file)
+        return index
+
+    def save(self, index_file):
+        # through a handle, np.savez would append .npz to the path
+        with open(index_file, "wb") as output:
+            np.savez(output, keys=self.keys, fingerprint=self.fingerprint)
+        logger.info("saved hotspot index %s", index_file)
+
+    def contains(self, df):
+        """Check which rows of a data frame are hotspots.
+
+        Args:
+            df (data_frame): data frame containing the HOTSPOT_COLUMNS
+
+        Returns:
+            numpy array: boolean mask, True where the row is a hotspot
+        """
+        keys = hotspot_keys(df)
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        position = np.searchsorted(self.keys, keys).clip(max=len(self.keys) - 1)
+        return self.keys[position] == keys
+
+
+def tag_by_hotspots(input_maf, hotspots_maf, index_file=None):
     """Read an input MAF file and tag any hotspots present in it from corresponding hotspots MAF file.
 
     Args:
         maf (File): Input MAF/tsv like format file
         hotspots_maf (File): Input MAF/tsv like format file containing hotspots
+        index_file (File, optional): binary index of the hotspots file, see HotspotIndex.load
 
     Returns:
         data_frame: Output a data frame containing the MAF/tsv tagged with hotspots
     """
-    cols = ["Chromosome", "Start_Position", "Reference_Allele", "Tumor_Seq_Allele2"]
+    index = HotspotIndex.load(hotspots_maf, index_file)
+    input_maf["hotspot_whitelist"] = np.where(index.contains(input_maf), "Yes", "No")
+    return input_maf
+
+
+def _tag_by_hotspots_dictreader(input_maf, hotspots_maf):
+    """reference implementation of tag_by_hotspots, joins the key columns row by row.
+
+    Kept to check HotspotIndex against and to benchmark it, see
+    benchmarks/bench_hotspots.py.
+    """
+    cols = HOTSPOT_COLUMNS
     hotspots = set()
     with open(hotspots_maf, "r") as infile:
         reader = csv.DictReader(infile, delimiter="\t")
@@ -324,33 +879,176 @@ def tag_by_hotspots(input_maf, hotspots_maf):
             key = ":".join([row[k] for k in cols])
             hotspots.add(tuple(key))
 
-    # Add hotspots column, set initial value to No
     input_maf["hotspot_whitelist"] = "No"
-    # Create the column containing the cols values by joining values
     input_maf["key"] = input_maf[cols].astype(str).agg(":".join, axis=1)
-    # update the hotspot whitelist column with Yes values if hotspots are detected
     input_maf.loc[input_maf["key"].apply(tuple).isin(hotspots), "hotspot_whitelist"] = (
         "Yes"
     )
-    # drop the key column since its not needed in final maf
-    input_maf_final = input_maf.drop(columns=["key"])
+    return input_maf.drop(columns=["key"])
+
+
+class CommentFilter(io.RawIOBase):
+    """Binary stream that drops comment lines from an underlying file in a single pass.
+
+    Chunks without a comment line are passed through untouched, so a MAF with a
+    leading `#version` block costs one extra scan of the first chunk only.
+    """
+
+    def __init__(self, handle, comment=b"#", chunk_size=1 << 20):
+        self.handle = handle
+        self.comment = comment
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self._partial = b""
+        self._buffer = b""
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def _filter(self, data):
+        if not data.startswith(self.comment) and b"\n" + self.comment not in data:
+            return data
+        return b"".join(
+            line
+            for line in data.splitlines(keepends=True)
+            if not line.startswith(self.comment)
+        )
+
+    def _fill(self):
+        while not self._buffer and not self._eof:
+            raw = self.handle.read(self.chunk_size)
+            if not raw:
+                self._eof = True
+                data, self._partial = self._partial, b""
+            else:
+                self.bytes_read += len(raw)
+                data = self._partial + raw
+                last = data.rfind(b"\n") + 1
+                data, self._partial = data[:last], data[last:]
+            self._buffer = self._filter(data)
+
+    def readinto(self, b):
+        self._fill()
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def read_delimited(file_path, separator="\t", comment="#", **kwargs):
+    """Read a delimited file, skipping lines starting with the comment character.
+
+    Comment lines are removed while streaming the file into the pandas C parser,
+    so the file is read once. Throughput is logged per file.
+
+    Args:
+        file_path (str/path): file to be read
+        separator (str): field separator
+        comment (str): lines starting with this string are skipped
+        **kwargs: passed on to pd.read_csv
+
+    Returns:
+        data_frame: data frame of the file
+    """
+    kwargs.setdefault("low_memory", False)
+    start = time.perf_counter()
+    with open(file_path, "rb") as handle:
+        stream = CommentFilter(handle, comment.encode())
+        with io.BufferedReader(stream) as buffered:
+            df = pd.read_csv(buffered, sep=separator, **kwargs)
+    _log_throughput(file_path, stream.bytes_read, start)
+    return df
+
+
+def iter_delimited(file_path, separator="\t", chunksize=100_000, comment="#", **kwargs):
+    """Read a delimited file in chunks, skipping lines starting with the comment character.
+
+    Args:
+        file_path (str/path): file to be read
+        separator (str): field separator
+        chunksize (int): number of rows per chunk
+        comment (str): lines starting with this string are skipped
+        **kwargs: passed on to pd.read_csv
+
+    Yields:
+        data_frame: the next chunk of rows of the file
+    """
+    start = time.perf_counter()
+    with open(file_path, "rb") as handle:
+        stream = CommentFilter(handle, comment.encode())
+        with io.BufferedReader(stream) as buffered:
+            yield from pd.read_csv(
+                buffered, sep=separator, chunksize=chunksize, **kwargs
+            )
+    _log_throughput(file_path, stream.bytes_read, start)
+
+
+def read_header_columns(file_path, separator="\t", comment="#"):
+    """Read the column names of a delimited file, the first line not starting with the comment character.
+
+    Args:
+        file_path (str/path): file to be read
+        separator (str): field separator
+        comment (str): lines starting with this string are skipped
+
+    Returns:
+        list: column names, empty if the file has no header line
+    """
+    with open(file_path, "rb") as handle:
+        for line in handle:
+            if not line.startswith(comment.encode()):
+                return pd.read_csv(
+                    io.BytesIO(line), sep=separator, nrows=0
+                ).columns.tolist()
+    return []
+
+
+def _log_throughput(file_path, n_bytes, start, action="read"):
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    logger.info(
+        "%s %s: %d bytes in %.3fs (%.1f MB/s)",
+        action,
+        file_path,
+        n_bytes,
+        elapsed,
+        n_bytes / elapsed / 1e6,
+    )
+
+
+def _variant_id_parts(df, cols):
+    # "-" alleles are blanked before stringifying, as the row-wise id always did
+    return [df[col].replace("-", "").astype(str) for col in cols]
+
+
+def build_variant_id(df, cols):
+    """Build the string variant id, column values joined by "_" with "-" values blanked.
+
+    Args:
+        df (data_frame): data frame containing the id columns
+        cols (list): columns making up the id, in order
+
+    Returns:
+        Series: string id for every row
+    """
+    parts = _variant_id_parts(df, cols)
+    return parts[0].str.cat(parts[1:], sep="_")
 
-    return input_maf_final
 
+def build_variant_key(df, cols):
+    """Build a hashed 64-bit variant key, for joins that never need the string id.
 
-def get_row(tsv_file):
-    """Function to skip rows
+    Rows get the same key when they would get the same string id from build_variant_id.
 
     Args:
-        tsv_file (file): file to be read
+        df (data_frame): data frame containing the id columns
+        cols (list): columns making up the key, in order
 
     Returns:
-        list: lines to be skipped
+        Series: uint64 key for every row
     """
-    skipped = []
-    with open(tsv_file, "r") as FH:
-        skipped.extend(i for i, line in enumerate(FH) if line.startswith("#"))
-    return skipped
+    parts = pd.concat(_variant_id_parts(df, cols), axis=1)
+    return pd.util.hash_pandas_object(parts, index=False)
 
 
 def gen_id_tsv(df):
@@ -362,9 +1060,7 @@ def gen_id_tsv(df):
         "Tumor_Seq_Allele2",
     ]
     if set(cols).issubset(set(df.columns.tolist())):
-        df["id"] = df[cols].apply(
-            lambda x: "_".join(x.replace("-", "").astype(str)), axis=1
-        )
+        df["id"] = build_variant_id(df, cols)
     else:
         typer.secho(
             f"tsv file must include {cols} columns to generate an id for annotating the input maf.",
@@ -374,10 +1070,243 @@ def gen_id_tsv(df):
     return df
 
 
+def apply_maf_schema(df):
+    """Cast the columns of a maf to the declared schema of tag_constants.
+
+    MAF_CATEGORY_COLUMNS become categoricals and MAF_COUNT_COLUMNS holding only
+    integers become int32. Count columns with missing or non integer values keep
+    the dtype they were read with, so they are written out unchanged.
+
+    Args:
+        df (data_frame): maf read with type inference
+
+    Returns:
+        data_frame: df, with its columns cast in place
+    """
+    int32 = np.iinfo(np.int32)
+    for col in df.columns.intersection(MAF_CATEGORY_COLUMNS):
+        if df[col].dtype == object:
+            df[col] = df[col].astype("category")
+    for col in df.columns.intersection(MAF_COUNT_COLUMNS):
+        values = df[col]
+        if (
+            pd.api.types.is_integer_dtype(values.dtype)
+            and not pd.api.types.is_extension_array_dtype(values.dtype)
+            and (values.empty or int32.min <= values.min() <= values.max() <= int32.max)
+        ):
+            df[col] = values.astype(np.int32)
+    return df
+
+
+def merge_inferred_dtypes(dtypes):
+    """dtype pandas infers for a column from the dtypes it inferred for its chunks.
+
+    Integers and floats give float64, as a column with missing values is read whole.
+    Any other mix is read as text, the values of a column pandas could not parse
+    as one type are kept as they are in the file.
+
+    Args:
+        dtypes (set): numpy dtypes of the column in every chunk
+
+    Returns:
+        the dtype to read the column with in every chunk
+    """
+    if len(dtypes) == 1:
+        return next(iter(dtypes))
+    if all(
+        pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        for dtype in dtypes
+    ):
+        if all(pd.api.types.is_integer_dtype(dtype) for dtype in dtypes):
+            return np.int64
+        return np.float64
+    return str
+
+
+class ProjectionWriter:
+    """Writes the tagged or filtered rows of a projected MAFFile as tsv or csv.
+
+    The rows written are those of the data frames passed to write, in input order.
+    The input columns outside the projection are copied from the file as text. For
+    tsv to tsv the fields are sliced out of the input lines as they are, otherwise
+    they are read by pandas as strings. Columns follow the input order with the
+    columns added by the tag or filter last, as a maf written whole would have them.
+    Data frames can be written one after the other, e.g. one per chunk of the input.
+    """
+
+    def __init__(self, maf_file, output_file, maf_format="tsv"):
+        self.maf_file = maf_file
+        self.output_file = output_file
+        self.separator = MAF_FORMATS[maf_format]
+        self.passthrough = self.passthrough_columns(maf_file)
+        self.copy_lines = maf_file.separator == "\t" and self.separator == "\t"
+        self.columns = None
+
+    @staticmethod
+    def passthrough_columns(maf_file):
+        """Input columns of maf_file outside its projection, in input order."""
+        passthrough = [
+            col
+            for col in read_header_columns(maf_file.file_path, maf_file.separator)
+            if col != "id" and col not in maf_file.usecols
+        ]
+        if maf_file.header:
+            passthrough = [col for col in passthrough if col in maf_file.header]
+        return passthrough
+
+    @classmethod
+    def join_passthrough(cls, maf_file, data_frame):
+        """data_frame with the passthrough columns of its rows, read as strings."""
+        passthrough = cls.passthrough_columns(maf_file)
+        text = read_delimited(
+            maf_file.file_path,
+            maf_file.separator,
+            usecols=passthrough,
+            dtype=str,
+            keep_default_na=False,
+        )
+        # columns the tag or filter rewrote are taken from data_frame
+        text = text.drop(columns=text.columns.intersection(data_frame.columns))
+        return pd.concat([text.loc[data_frame.index], data_frame], axis=1)[
+            cls.output_columns(maf_file, passthrough, data_frame)
+        ]
+
+    @staticmethod
+    def output_columns(maf_file, passthrough, data_frame):
+        file_columns = read_header_columns(maf_file.file_path, maf_file.separator)
+        columns = ["id"] + [
+            col
+            for col in file_columns
+            if col != "id" and (col in passthrough or col in data_frame)
+        ]
+        return columns + [col for col in data_frame.columns if col not in columns]
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.output = open(self.output_file, "w", newline="")
+        self.input = open(self.maf_file.file_path, newline="")
+        if self.copy_lines:
+            # the lines read_delimited parses: no comments, no blank lines, header first
+            self.lines = enumerate(
+                (
+                    line
+                    for line in self.input
+                    if not line.startswith("#") and line.strip("\r\n")
+                ),
+                start=-1,
+            )
+            self.row, self.line = next(self.lines)
+        else:
+            self.chunks = iter_delimited(
+                self.maf_file.file_path,
+                self.maf_file.separator,
+                usecols=self.passthrough,
+                dtype=str,
+                keep_default_na=False,
+            )
+            self.chunk = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.columns is None and exc_info[0] is None:
+            pd.DataFrame(columns=["id"] + self.passthrough).to_csv(
+                self.output, sep=self.separator, index=False
+            )
+        n_bytes = self.output.tell()
+        self.output.close()
+        self.input.close()
+        if exc_info[0] is None:
+            _log_throughput(self.output_file, n_bytes, self.start, action="wrote")
+
+    def write(self, data_frame):
+        """Append the rows of data_frame, indexed by input row, to the output."""
+        if self.columns is None:
+            self.columns = self.output_columns(
+                self.maf_file, self.passthrough, data_frame
+            )
+            # columns of data_frame, including passthrough columns the tag or filter rewrote
+            self.computed = [col for col in self.columns if col in data_frame]
+            self.copied = [col for col in self.passthrough if col not in data_frame]
+            if self.copy_lines:
+                self.segments = self.__line_segments()
+            self.output.write(
+                pd.DataFrame(columns=self.columns).to_csv(
+                    sep=self.separator, index=False, lineterminator="\n"
+                )
+            )
+        rows = data_frame.index.to_numpy()
+        if self.copy_lines:
+            self.__copy_lines(data_frame, rows)
+        else:
+            text = self.__passthrough_rows(rows)[self.copied]
+            pd.concat([text, data_frame], axis=1)[self.columns].to_csv(
+                self.output, sep=self.separator, index=False, header=False
+            )
+
+    def __line_segments(self):
+        position = {
+            col: i for i, col in enumerate(read_header_columns(self.maf_file.file_path))
+        }
+        passthrough = set(self.copied)
+        # an output line is runs of consecutive input fields and computed fields
+        segments = []
+        for col in self.columns:
+            if col not in passthrough:
+                segments.append((False, self.computed.index(col), None))
+            elif segments and segments[-1][0] and segments[-1][2] == position[col]:
+                segments[-1] = (True, segments[-1][1], position[col] + 1)
+            else:
+                segments.append((True, position[col], position[col] + 1))
+        return segments
+
+    def __copy_lines(self, data_frame, rows):
+        text = data_frame[self.computed].to_csv(
+            sep="\t", index=False, header=False, lineterminator="\n"
+        )
+        for row, values in zip(rows, text.split("\n")):
+            while self.row < row:
+                self.row, self.line = next(self.lines)
+            values = values.split("\t")
+            fields = self.line.rstrip("\r\n").split("\t")
+            self.output.write(
+                "\t".join(
+                    [
+                        "\t".join(fields[first:last]) if raw else values[first]
+                        for raw, first, last in self.segments
+                    ]
+                )
+                + "\n"
+            )
+
+    def __passthrough_rows(self, rows):
+        # pandas chunks keep the row numbers of the file, rows only ever move forward
+        pieces = []
+        while len(rows):
+            if self.chunk is None or rows[0] > self.chunk.index.max():
+                self.chunk = next(self.chunks)
+                continue
+            in_chunk = rows[rows <= self.chunk.index.max()]
+            pieces.append(self.chunk.loc[in_chunk])
+            rows = rows[len(in_chunk) :]
+        if not pieces:
+            return pd.DataFrame(columns=self.passthrough)
+        return pd.concat(pieces)
+
+
 class MAFFile:
-    def __init__(self, file_path, separator, header=None):
+    def __init__(
+        self,
+        file_path,
+        separator,
+        header=None,
+        projection=None,
+        chunksize=None,
+        schema=True,
+    ):
         self.file_path = file_path
         self.separator = separator
+        # cast the columns to the maf schema, see apply_maf_schema
+        self.schema = schema
         self.cols = {
             "general": [
                 "Chromosome",
@@ -407,23 +1336,26 @@ class MAFFile:
             "not_complex": ["complexity"],
             "mappable": ["mappability"],
             "non_common_variant": ["common_variant"],
-            "cmo_ch_filter": [
+            "cmo_ch_tag": [
                 "t_alt_count",
                 "t_depth",
                 "gnomAD_AF",
+                "CNT",
                 "Consequence",
                 "Variant_Classification",
                 "Hugo_Symbol",
+            ],
+            "cmo_ch_filter": [
                 "t_alt_count",
+                "t_depth",
+                "gnomAD_AF",
+                "Consequence",
+                "Variant_Classification",
+                "Hugo_Symbol",
                 "hotspot",
-                "t_alt_count",
+                "common_variant",
                 "complexity",
                 "mappability",
-                "Chromosome",
-                "Start_Position",
-                "End_Position",
-                "Reference_Allele",
-                "Tumor_Seq_Allele2",
             ],
             "traceback": {
                 "standard": [
@@ -439,9 +1371,19 @@ class MAFFile:
             },
         }
         self.header = self.__process_header(header) if header is not None else None
+        # columns loaded when only the columns of one tag or filter are needed
+        self.usecols = None
+        if projection is not None and not columnar_format(file_path):
+            self.usecols = set(self.cols["general"]).union(self.cols[projection])
+        self.tsg_genes = tsg_genes
+        # with a chunksize, run reads the maf chunk by chunk instead
+        self.chunksize = None
+        if chunksize is not None and self.usecols is not None:
+            self.chunksize = chunksize
+            self.data_frame = None
+            return
         self.data_frame = self.__read_tsv()
         self.__gen_id()
-        self.tsg_genes = tsg_genes
 
     def convert_annomaf_to_df(self):
         if self.data_frame.empty == False:
@@ -494,6 +1436,10 @@ class MAFFile:
     def __read_tsv(self):
         """Read the tsv file and store it in the instance variable 'data_frame'.
 
+        Parquet and Feather files, detected from the extension, are read with their dtypes.
+        Columns are cast to the maf schema, see apply_maf_schema, unless schema is False.
+        With a projection, only the columns of that tag or filter and the id columns are read.
+
         Args:
             self
 
@@ -505,10 +1451,22 @@ class MAFFile:
                 f"Reading Delimited file: {self.file_path}",
                 fg=typer.colors.BRIGHT_GREEN,
             )
-            skip = self.get_row()
-            df = pd.read_csv(
-                self.file_path, sep=self.separator, skiprows=skip, low_memory=False
-            )
+            if columnar_format(self.file_path):
+                df = read_columnar(self.file_path)
+            else:
+                # categoricals are parsed directly, counts are downcast once read
+                df = read_delimited(
+                    self.file_path,
+                    self.separator,
+                    dtype=(
+                        dict.fromkeys(MAF_CATEGORY_COLUMNS, "category")
+                        if self.schema
+                        else None
+                    ),
+                    usecols=None if self.usecols is None else self.usecols.__contains__,
+                )
+            if self.schema:
+                df = apply_maf_schema(df)
             if self.header:
                 df = df[df.columns.intersection(self.header)]
             return df
@@ -516,16 +1474,87 @@ class MAFFile:
             typer.secho(f"failed to open {self.file_path}", fg=typer.colors.RED)
             raise typer.Abort()
 
-    def get_row(self):
-        """Function to skip rows
+    def write(self, data_frame, output_file, maf_format=None):
+        """Write a tagged or filtered data frame of this maf.
 
-        Returns:
-            list: lines to be skipped
+        Without a projection this is write_maf. With one, data_frame only holds the
+        projected columns: the other columns of the input are streamed through from
+        the file, as text and unchanged, for the rows kept in data_frame, see
+        ProjectionWriter.
+
+        Args:
+            data_frame (data_frame): output of tag or filter, indexed by input row
+            output_file (str/path): output file
+            maf_format (str, optional): output format, see write_maf
         """
-        skipped = []
-        with open(self.file_path, "r") as FH:
-            skipped.extend(i for i, line in enumerate(FH) if line.startswith("#"))
-        return skipped
+        maf_format = maf_format or columnar_format(output_file) or "tsv"
+        if self.usecols is None or MAF_FORMATS[maf_format] is None:
+            # columnar files are written whole, the passthrough columns are joined first
+            if self.usecols is not None:
+                data_frame = ProjectionWriter.join_passthrough(self, data_frame)
+            return write_maf(data_frame, output_file, maf_format)
+        with ProjectionWriter(self, output_file, maf_format) as writer:
+            writer.write(data_frame)
+
+    def run(self, operation, name, output_file, maf_format=None):
+        """Tag or filter the maf and write the result.
+
+        With a chunksize, the projected columns are read chunksize rows at a time and
+        every chunk is tagged or filtered and appended to the output, so memory stays
+        flat however large the maf is. Only row-local operations can run in chunks.
+        A first pass over the projected columns finds the dtypes pandas infers for the
+        whole maf, see merge_inferred_dtypes, so every chunk is written like the maf
+        read whole would be.
+
+        Args:
+            operation (str): "tag", "tag_all" or "filter"
+            name (str): name of the tag or filter, a key of self.cols
+            output_file (str/path): output file
+            maf_format (str, optional): output format, see write_maf
+        """
+        if self.chunksize is None:
+            return self.write(getattr(self, operation)(name), output_file, maf_format)
+        maf_format = maf_format or columnar_format(output_file) or "tsv"
+        if MAF_FORMATS[maf_format] is None:
+            typer.secho(
+                f"--chunksize appends to the output as it goes, write {maf_format} output without it.",
+                fg=typer.colors.RED,
+            )
+            raise typer.Abort()
+        dtype = dict.fromkeys(MAF_CATEGORY_COLUMNS, "category")
+        # every chunk is parsed with the dtypes pandas infers for the whole maf
+        dtype.update(self.__inferred_dtypes(dtype))
+        with ProjectionWriter(self, output_file, maf_format) as writer:
+            for chunk in iter_delimited(
+                self.file_path,
+                self.separator,
+                chunksize=self.chunksize,
+                dtype=dtype,
+                usecols=self.usecols.__contains__,
+            ):
+                self.data_frame = apply_maf_schema(chunk)
+                if self.header:
+                    self.data_frame = self.data_frame[
+                        self.data_frame.columns.intersection(self.header)
+                    ]
+                self.__gen_id()
+                writer.write(getattr(self, operation)(name))
+
+    def __inferred_dtypes(self, dtype):
+        # a first pass over the projected columns, chunk by chunk like the second
+        chunk_dtypes = {}
+        for chunk in iter_delimited(
+            self.file_path,
+            self.separator,
+            chunksize=self.chunksize,
+            dtype=dtype,
+            usecols=self.usecols.__contains__,
+        ):
+            for col in chunk.columns.difference(list(dtype)):
+                chunk_dtypes.setdefault(col, set()).add(chunk[col].dtype)
+        return {
+            col: merge_inferred_dtypes(dtypes) for col, dtypes in chunk_dtypes.items()
+        }
 
     def merge(self, maf, id, how):
         maf_df = self.data_frame.merge(maf, on=id, how=how)
@@ -534,9 +1563,7 @@ class MAFFile:
     def __gen_id(self):
         cols = self.cols["general"]
         if set(cols).issubset(set(self.data_frame.columns.tolist())):
-            self.data_frame["id"] = self.data_frame[cols].apply(
-                lambda x: "_".join(x.replace("-", "").astype(str)), axis=1
-            )
+            self.data_frame["id"] = build_variant_id(self.data_frame, cols)
             first_column = self.data_frame.pop("id")
             self.data_frame.insert(0, "id", first_column)
         else:
@@ -546,6 +1573,17 @@ class MAFFile:
             )
             raise typer.Abort()
 
+    def variant_key(self, cols=None):
+        """hashed 64-bit key of the id columns, see build_variant_key
+
+        Args:
+            cols (list, optional): columns to hash. Defaults to the general id columns.
+
+        Returns:
+            Series: uint64 key for every row
+        """
+        return build_variant_key(self.data_frame, cols or self.cols["general"])
+
     def annotate_maf_maf(self, maf_df_a, cname, values):
         self.data_frame[cname] = np.where(
             self.data_frame["id"].isin(maf_df_a["id"]), values[0], values[1]
@@ -554,61 +1592,31 @@ class MAFFile:
 
     def extract_fillout_type(self):
 
-        # make a call to the _convert_fillout_to_df() function since it is also within the MAF class
-        df_full_fillout = self._convert_fillout_to_df()
+        # make a call to the _convert_fillout_to_df() function since it is also within the MAF class,
+        # it casts Chromosome to str in self.data_frame and aborts on an empty fillout
+        self._convert_fillout_to_df()
 
-        # run extract fillout type function on the fillout df (will result in many mini dfs)
-        # extract the VAF and summary values for the curated samples
-        df_curated = df_full_fillout[df_full_fillout["fillout_type"].isin(["CURATED"])]
-        df_plasma = df_full_fillout[df_full_fillout["fillout_type"].isin(["PLASMA"])]
-        df_tumor = df_full_fillout[df_full_fillout["fillout_type"].isin(["CASE"])]
-        df_control = df_full_fillout[df_full_fillout["fillout_type"].isin(["CONTROL"])]
-
-        df_matched_normal = df_full_fillout[
-            df_full_fillout["fillout_type"].isin(["MATCHED_NORMAL"])
-        ]
+        # split the fillout once by fillout type, each sub frame is only built from its row positions
+        partition = self.partition_rows("fillout_type")
+        df_curated = self.take_rows(partition, ["CURATED"])
+        df_plasma = self.take_rows(partition, ["PLASMA"])
+        df_tumor = self.take_rows(partition, ["CASE"])
+        df_control = self.take_rows(partition, ["CONTROL"])
+        df_normals = self.take_rows(partition, ["MATCHED_NORMAL", "UNMATCHED_NORMAL"])
 
         # make a call to the findVAFandSummary function for each of the subgroups within curated (simplex,duplex)
 
-        df_curated_simplex_summary_added = _find_VAFandsummary(df_curated, "simplex")
-        df_curated_simplex_duplex_summary_added = _find_VAFandsummary(
-            df_curated_simplex_summary_added, "duplex"
-        )
-        df_all_curated_SD = _find_VAFandsummary(
-            df_curated_simplex_duplex_summary_added, "simplex_duplex"
-        )
-
-        df_plasma_simplex_summary_added = _find_VAFandsummary(df_plasma, "simplex")
-        df_plasma_simplex_duplex_summary_added = _find_VAFandsummary(
-            df_plasma_simplex_summary_added, "duplex"
-        )
-        df_all_plasma_SD = _find_VAFandsummary(
-            df_plasma_simplex_duplex_summary_added, "simplex_duplex"
-        )
-
-        df_tumor_simplex_summary_added = _find_VAFandsummary(df_tumor, "simplex")
-        df_tumor_simplex_duplex_summary_added = _find_VAFandsummary(
-            df_tumor_simplex_summary_added, "duplex"
-        )
-        df_all_tumor_SD = _find_VAFandsummary(
-            df_tumor_simplex_duplex_summary_added, "simplex_duplex"
-        )
-
-        df_control_simplex_summary_added = _find_VAFandsummary(df_control, "simplex")
-        df_control_simplex_duplex_summary_added = _find_VAFandsummary(
-            df_control_simplex_summary_added, "duplex"
-        )
-        df_all_control_SD = _find_VAFandsummary(
-            df_control_simplex_duplex_summary_added, "simplex_duplex"
-        )
-
-        df_matched_normal = _find_VAFandsummary(df_matched_normal, "standard")
-
-        df_normals = df_full_fillout[
-            df_full_fillout["fillout_type"].isin(["MATCHED_NORMAL", "UNMATCHED_NORMAL"])
-        ]
+        sample_groups = ["simplex", "duplex", "simplex_duplex"]
+        df_all_curated_SD = _find_VAFandsummary(df_curated, sample_groups)
+        df_all_plasma_SD = _find_VAFandsummary(df_plasma, sample_groups)
+        df_all_tumor_SD = _find_VAFandsummary(df_tumor, sample_groups)
+        df_all_control_SD = _find_VAFandsummary(df_control, sample_groups)
 
+        # the matched normal is summarized along with the rest of the normals
         df_all_normals = _find_VAFandsummary(df_normals, "standard")
+        df_matched_normal = df_all_normals[
+            df_all_normals["fillout_type"] == "MATCHED_NORMAL"
+        ]
 
         return (
             df_all_curated_SD,
@@ -619,6 +1627,32 @@ class MAFFile:
             df_all_control_SD,
         )
 
+    def partition_rows(self, column):
+        """Positions of the rows of every value of a column, found in a single grouping pass.
+
+        Args:
+            column (str): column to partition the data frame by, e.g. fillout_type
+
+        Returns:
+            dict: column value -> sorted numpy array of row positions
+        """
+        return self.data_frame.groupby(column, sort=False).indices
+
+    def take_rows(self, partition, values):
+        """Build the sub frame of the rows having one of the given values, in file order.
+
+        Args:
+            partition (dict): output of partition_rows
+            values (list): column values to keep
+
+        Returns:
+            pd.DataFrame: the selected rows, an empty frame if none of the values is present
+        """
+        positions = [partition[value] for value in values if value in partition]
+        if positions:
+            positions = np.sort(np.concatenate(positions))
+        return self.data_frame.take(np.asarray(positions, dtype=np.intp))
+
     def tag(self, tagging):
         cols = self.cols[tagging]
         if isinstance(cols, dict):
@@ -729,86 +1763,34 @@ class MAFFile:
         maf = add_dummy_columns(self.data_frame, MAF_DUMMY_COLUMNS)
 
         # start tagging the input MAF with the 5 categories
+        exonic = IS_EXONIC_CLASS_MASK(
+            maf["Hugo_Symbol"], maf["Variant_Classification"], maf["Start_Position"]
+        )
+        in_panel = maf["Transcript_ID"].isin(ref_lst)
+        exonic_or_silent = np.select(
+            [exonic & in_panel, exonic, in_panel],
+            ["exonic", "nonpanel_exonic", "silent"],
+            "nonpanel_silent",
+        )
 
-        def is_exonic_or_silent(row, ref_lst):
-            exonic_result = IS_EXONIC_CLASS(
-                row.Hugo_Symbol, row.Variant_Classification, row.Start_Position
-            )
-            if exonic_result:
-                if row.Transcript_ID in ref_lst:
-                    return "exonic"
-                else:
-                    return "nonpanel_exonic"
-            else:
-                if row.Transcript_ID in ref_lst:
-                    return "silent"
-                else:
-                    return "nonpanel_silent"
-
-        def dropped(row):
-            return pd.notna(row.Status) and row.Status != ""
-
-        def tag_row(row, canonical):
-            tags = []
-
-            # Evaluate "dropped"
-            if dropped(row):
-                tags.append("dropped")
-
-            # Evaluate "exonic" or "silent" independently of "dropped"
-            is_exonic_or_silent_tag = is_exonic_or_silent(row, canonical)
-            if is_exonic_or_silent_tag:
-                tags.append(is_exonic_or_silent_tag)
-
-            return ", ".join(tags)
-
-        tags_list = []
-        for row in maf.itertuples(index=False):
-            tags_list.append(tag_row(row, ref_lst))
-
-        maf["classification"] = tags_list
+        # "dropped" is evaluated independently of "exonic" or "silent"
+        dropped = maf["Status"].notna() & (maf["Status"] != "")
+        maf["classification"] = (
+            pd.Series(np.where(dropped, "dropped, ", ""), index=maf.index)
+            + exonic_or_silent
+        )
 
         return maf
 
     def tag_by_variant_annotations(self, rules_df):
         if rules_df is not None:
-            for index, row in rules_df.iterrows():
-                condition = True
-                is_list = lambda var: isinstance(var, list)
-
-                (
-                    Tag_Column_Name,
-                    Hugo_Symbol,
-                    Variant_Classification,
-                    Start_Position,
-                    End_Position,
-                ) = row[
-                    [
-                        "Tag_Column_Name",
-                        "Hugo_Symbol",
-                        "Variant_Classification",
-                        "Start_Position",
-                        "End_Position",
-                    ]
-                ]
-
-                if Hugo_Symbol != "none":
-                    condition &= self.data_frame["Hugo_Symbol"].isin(Hugo_Symbol)
-                if Variant_Classification != "none":
-                    condition &= self.data_frame["Variant_Classification"].isin(
-                        Variant_Classification
-                    )
-                if Start_Position != "none":
-                    condition &= self.data_frame["Start_Position"] >= float(
-                        Start_Position
-                    )
-                if End_Position != "none":
-                    condition &= self.data_frame["End_Position"] <= float(End_Position)
-
-                colname = "".join(Tag_Column_Name)
-                tag_column_name = f"is_{colname}_variant"
-                self.data_frame[tag_column_name] = "No"
-                self.data_frame.loc[condition, tag_column_name] = "Yes"
+            tags = CompiledRules(rules_df).evaluate(self.data_frame)
+            # existing tag columns are overwritten in place, new ones appended at once
+            existing = tags.columns.intersection(self.data_frame.columns)
+            self.data_frame[existing] = tags[existing]
+            self.data_frame = pd.concat(
+                [self.data_frame, tags.drop(columns=existing)], axis=1
+            )
         else:
             typer.secho(
                 f"MAF Rules JSON File is empty. Please check your inputs again.",
@@ -892,6 +1874,18 @@ class MAFFile:
         return self.data_frame
 
     def __process_header(self, header):
+        return self.read_header_file(header)
+
+    @staticmethod
+    def read_header_file(header):
+        """Read the columns to concatenate on from a csv, tsv or space separated header file.
+
+        Args:
+            header (str/path): header file, the columns are on its first line
+
+        Returns:
+            list: column names, they must include the variant id columns
+        """
         possible_delimiters = [",", "\t", " "]
 
         with open(header, "r") as file:
@@ -911,11 +1905,12 @@ class MAFFile:
 
         file = open(header, "r")
         header = file.readline().rstrip("\n").split(delimiter)
-        header = self.__check_headers(header)
+        header = MAFFile.__check_headers(header)
         return header
 
-    def __check_headers(self, header):
-        req_columns_set = set(self.cols["general"])
+    @staticmethod
+    def __check_headers(header):
+        req_columns_set = set(MAF_ID_COLUMNS)
         if set(req_columns_set).issubset(header):
             return header
         else:
@@ -936,6 +1931,15 @@ class RulesFile:
         try:
             data_frame = pd.read_json(self.file_path)
             data_frame.replace("", "none", inplace=True)
+            data_frame.rename(
+                columns={"tag_column_name": "Tag_Column_Name"}, inplace=True
+            )
+            # a single gene or variant classification is a rule matching one value
+            for col in ["Hugo_Symbol", "Variant_Classification"]:
+                data_frame[col] = [
+                    [value] if isinstance(value, str) and value != "none" else value
+                    for value in data_frame[col]
+                ]
 
             return data_frame
         except Exception as e:
@@ -944,3 +1948,215 @@ class RulesFile:
                 fg=typer.colors.RED,
             )
             raise typer.Abort()
+
+
+def _is_rule_set(value):
+    # "none", missing keys and NaN leave a gene or classification unconstrained
+    if isinstance(value, list):
+        return True
+    return not (value is None or value == "none" or pd.isna(value))
+
+
+def _is_missing(value):
+    # a key missing from a rule of the json, read as NaN or None
+    return not isinstance(value, list) and (value is None or pd.isna(value))
+
+
+class CompiledRules:
+    """Rules of a RulesFile compiled into lookups, evaluated over a maf in one pass.
+
+    Gene constrained rules are indexed by gene, so each variant is only checked
+    against the rules of its own gene. Rules matching any gene are interval arrays
+    searched over the variants sorted by Start_Position, so each of those rules is
+    only checked against the variants starting within its bounds. Variant
+    classifications are a rule x classification table. A tag column is set by the
+    last rule naming it, as when rules were applied one after the other. A rule
+    missing a Start_Position or End_Position key never matches, as the position
+    comparisons of a rule applied on its own never held for it.
+    """
+
+    def __init__(self, rules_df):
+        rule_columns = [
+            f"is_{''.join(name)}_variant" for name in rules_df["Tag_Column_Name"]
+        ]
+        self.tag_columns = list(dict.fromkeys(rule_columns))
+        last = ~pd.Series(rule_columns).duplicated(keep="last").to_numpy()
+        rules_df = rules_df[last].reset_index(drop=True)
+        self.rule_column = np.array(
+            [self.tag_columns.index(col) for col in np.array(rule_columns)[last]],
+            dtype=np.int64,
+        )
+        n_rules = len(rules_df)
+        # rules missing a bound key never match, and are left out of the lookups
+        live = [
+            not (_is_missing(start) or _is_missing(end))
+            for start, end in zip(rules_df["Start_Position"], rules_df["End_Position"])
+        ]
+
+        # gene -> rules, as offsets into a flat array of rule indices
+        gene_rules = pd.DataFrame(
+            [
+                (gene, rule)
+                for rule, genes in enumerate(rules_df["Hugo_Symbol"])
+                if live[rule] and _is_rule_set(genes)
+                for gene in genes
+            ],
+            columns=["Hugo_Symbol", "rule"],
+        ).drop_duplicates()
+        grouped = gene_rules.groupby("Hugo_Symbol", sort=False)["rule"]
+        self.genes = pd.Index(list(grouped.groups))
+        self.gene_offsets = np.concatenate([[0], np.cumsum(grouped.size().to_numpy())])
+        self.gene_rule_ids = np.concatenate(
+            [[]] + [rules.to_numpy() for _, rules in grouped]
+        ).astype(np.int64)
+        self.any_gene_rules = np.array(
+            [
+                rule
+                for rule, genes in enumerate(rules_df["Hugo_Symbol"])
+                if live[rule] and not _is_rule_set(genes)
+            ],
+            dtype=np.int64,
+        )
+
+        # rule x classification, the extra last column is for classifications
+        # no rule lists, which get_indexer maps to -1
+        classifications = rules_df["Variant_Classification"]
+        self.classifications = pd.Index(
+            sorted({vc for vcs in classifications if _is_rule_set(vcs) for vc in vcs})
+        )
+        self.allowed = np.zeros((n_rules, len(self.classifications) + 1), dtype=bool)
+        for rule, vcs in enumerate(classifications):
+            if _is_rule_set(vcs):
+                self.allowed[rule, self.classifications.get_indexer(vcs)] = True
+            else:
+                self.allowed[rule] = True
+
+        # NaN where a rule has no bound
+        self.starts, self.ends = (
+            np.array(
+                [
+                    float(value) if _is_rule_set(value) else np.nan
+                    for value in rules_df[col]
+                ],
+                dtype=float,
+            )
+            for col in ["Start_Position", "End_Position"]
+        )
+
+    def evaluate(self, data_frame):
+        """Tag every variant of a maf with the compiled rules.
+
+        Args:
+            data_frame (data_frame): maf with Hugo_Symbol, Variant_Classification,
+                Start_Position and End_Position columns
+
+        Returns:
+            data_frame: one is_<name>_variant column of "Yes"/"No" per tag
+        """
+        n_rows = len(data_frame)
+        classification = self.classifications.get_indexer(
+            data_frame["Variant_Classification"]
+        )
+        start = pd.to_numeric(data_frame["Start_Position"], errors="coerce").to_numpy(
+            dtype=float
+        )
+        end = pd.to_numeric(data_frame["End_Position"], errors="coerce").to_numpy(
+            dtype=float
+        )
+        hits = np.zeros((n_rows, len(self.tag_columns)), dtype=bool)
+
+        # candidate (variant, rule) pairs: the rules of the variant's gene
+        codes = self.genes.get_indexer(data_frame["Hugo_Symbol"])
+        counts = np.where(
+            codes >= 0, self.gene_offsets[codes + 1] - self.gene_offsets[codes], 0
+        )
+        rows = np.repeat(np.arange(n_rows), counts)
+        first = np.repeat(
+            self.gene_offsets[codes] - (np.cumsum(counts) - counts), counts
+        )
+        rules = self.gene_rule_ids[first + np.arange(len(rows))]
+        self.__set_hits(hits, rows, rules, classification, start, end)
+
+        # the rules matching any gene, against the variants starting within their bounds
+        if len(self.any_gene_rules):
+            # variants ending before they start, or missing a position, are checked against every rule
+            ordered = start <= end
+            irregular = np.flatnonzero(~ordered)
+            by_start = np.flatnonzero(ordered)
+            by_start = by_start[np.argsort(start[by_start], kind="stable")]
+            sorted_start = start[by_start]
+            rule_starts = self.starts[self.any_gene_rules]
+            rule_ends = self.ends[self.any_gene_rules]
+            first = np.searchsorted(
+                sorted_start, np.nan_to_num(rule_starts, nan=-np.inf), "left"
+            )
+            last = np.searchsorted(
+                sorted_start, np.nan_to_num(rule_ends, nan=np.inf), "right"
+            )
+            for rule, lo, hi in zip(self.any_gene_rules, first, last):
+                rows = np.concatenate([by_start[lo:hi], irregular])
+                self.__set_hits(
+                    hits, rows, np.full(len(rows), rule), classification, start, end
+                )
+
+        # index a two item object array, every cell refers to the same two strings
+        labels = np.array(["No", "Yes"], dtype=object)
+        return pd.DataFrame(
+            labels[hits.view(np.uint8)],
+            columns=self.tag_columns,
+            index=data_frame.index,
+        )
+
+    def __set_hits(self, hits, rows, rules, classification, start, end):
+        # marks the tag of every (variant, rule) pair whose classification and positions match
+        rule_starts = self.starts[rules]
+        rule_ends = self.ends[rules]
+        match = (
+            self.allowed[rules, classification[rows]]
+            & (np.isnan(rule_starts) | (start[rows] >= rule_starts))
+            & (np.isnan(rule_ends) | (end[rows] <= rule_ends))
+        )
+        hits[rows[match], self.rule_column[rules[match]]] = True
+
+
+def _tag_by_variant_annotations_iterrows(data_frame, rules_df):
+    """reference implementation of MAFFile.tag_by_variant_annotations, one pass per rule.
+
+    Kept to check CompiledRules against and to benchmark it, see
+    benchmarks/bench_by_rules.py.
+    """
+    for index, row in rules_df.iterrows():
+        condition = True
+
+        (
+            Tag_Column_Name,
+            Hugo_Symbol,
+            Variant_Classification,
+            Start_Position,
+            End_Position,
+        ) = row[
+            [
+                "Tag_Column_Name",
+                "Hugo_Symbol",
+                "Variant_Classification",
+                "Start_Position",
+                "End_Position",
+            ]
+        ]
+
+        if Hugo_Symbol != "none":
+            condition &= data_frame["Hugo_Symbol"].isin(Hugo_Symbol)
+        if Variant_Classification != "none":
+            condition &= data_frame["Variant_Classification"].isin(
+                Variant_Classification
+            )
+        if Start_Position != "none":
+            condition &= data_frame["Start_Position"] >= float(Start_Position)
+        if End_Position != "none":
+            condition &= data_frame["End_Position"] <= float(End_Position)
+
+        colname = "".join(Tag_Column_Name)
+        tag_column_name = f"is_{colname}_variant"
+        data_frame[tag_column_name] = "No"
+        data_frame.loc[condition, tag_column_name] = "Yes"
+    return data_frame
@@ -5,6 +5,12 @@ from postprocessing_variant_calls.maf.helper import (
     check_txt,
     process_paths,
     maf_duplicates,
+    stream_concat,
+    load_mafs,
+    check_format,
+    write_maf,
+    columnar_format,
+    MAF_FORMATS,
 )
 from .subset.subset_helpers import read_tsv, read_ids, filter_by_rows, check_separator
 import typer
@@ -72,7 +78,7 @@ def concat(
         False,
         "--deduplicate",
         "-de",
-        help="deduplicate outputted maf file.",
+        help="deduplicate outputted maf file. With --streaming, duplicates are found out of memory.",
     ),
     separator: str = typer.Option(
         "tsv",
@@ -81,16 +87,66 @@ def concat(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    streaming: bool = typer.Option(
+        False,
+        "--streaming",
+        help="Write the mafs to the output in chunks as they are read, keeping memory bounded. \
+              Values are copied as text, columns missing from a maf are left empty.",
+    ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        "--threads",
+        "-w",
+        min=1,
+        help="Number of processes parsing maf files in parallel. Output rows keep the input order.",
+    ),
+    tmp_dir: Path = typer.Option(
+        None,
+        "--tmp-dir",
+        help="Directory for the temp files of --streaming --deduplicate, defaults to the system temp directory.",
+    ),
 ):
     # option to get files from text file
     if paths:
         files = process_paths(paths)
-    if files:
-        # create maf files
-        maf_list = []
-        for maf in files:
-            maf = MAFFile(maf, separator, header)
-            maf_list.append(maf.data_frame)
+    if files and streaming and any(columnar_format(maf) for maf in files):
+        typer.secho(
+            "--streaming copies delimited text, Parquet/Feather mafs are concatenated in memory.",
+            fg=typer.colors.RED,
+        )
+        raise typer.Abort()
+    output_format = output_format or columnar_format(output_maf) or "tsv"
+    if files and streaming and MAF_FORMATS[output_format] is None:
+        typer.secho(
+            f"--streaming writes delimited text, write {output_format} output without it.",
+            fg=typer.colors.RED,
+        )
+        raise typer.Abort()
+    if files and streaming:
+        header_columns = MAFFile.read_header_file(header) if header else None
+        typer.secho(
+            "Concatenating maf files.",
+            fg=typer.colors.BRIGHT_GREEN,
+        )
+        stream_concat(
+            files,
+            output_maf,
+            separator,
+            header_columns,
+            deduplicate,
+            tmp_dir=tmp_dir,
+            maf_format=output_format,
+        )
+    elif files:
+        # create maf files, in parallel when more than one worker is requested
+        maf_list = load_mafs(files, separator, header, workers)
         # concat
         typer.secho(
             f"Concatenating maf files.",
@@ -105,9 +161,9 @@ def concat(
         if "id" in list(concat_df.columns):
             try:
                 concat_df = concat_df.drop(columns=["id"])
-                concat_df.to_csv(output_maf, index=False, sep="\t")
+                write_maf(concat_df, output_maf, output_format)
             except:
-                concat_df.to_csv(output_maf, index=False, sep="\t")
+                write_maf(concat_df, output_maf, output_format)
     else:
         typer.echo("--files or --path argument must be provided.")
         raise typer.Abort()
@@ -229,12 +285,18 @@ def mergetsv(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
 ):
     # prep maf
     mafa = MAFFile(mafa, separator)
     mafb = read_tsv(mafb, separator)
     maf = mafa.merge(mafb, id, how)
-    maf.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    write_maf(maf, output_maf, output_format)
     return 0
 
 
@@ -1,7 +1,7 @@
 from pathlib import Path
 from typing import List, Optional
 import typer
-import pandas as pd
+from postprocessing_variant_calls.maf.helper import read_delimited
 
 app = typer.Typer()
 
@@ -17,8 +17,7 @@ def read_tsv(tsv, separator):
         data_frame: Output a data frame containing the MAF/tsv
     """
     typer.echo("Read Delimited file...")
-    skip = get_row(tsv)
-    return pd.read_csv(tsv, sep=separator, skiprows=skip, low_memory=False)
+    return read_delimited(tsv, separator)
 
 
 def read_ids(sid, ids):
@@ -73,22 +72,6 @@ def filter_by_rows(sid, tsv_df, col_name):
     return result.copy(deep=True)
 
 
-# preprocessing
-def get_row(tsv_file):
-    """Function to skip rows
-
-    Args:
-        tsv_file (file): file to be read
-
-    Returns:
-        list: lines to be skipped
-    """
-    skipped = []
-    with open(tsv_file, "r") as FH:
-        skipped.extend(i for i, line in enumerate(FH) if line.startswith("#"))
-    return skipped
-
-
 def check_separator(separator: str):
     separator_dict = {"tsv": "\t", "csv": ","}
     if separator in separator_dict.keys():
@@ -626,6 +626,57 @@ GNOMAD_COLUMNS = [
     "gnomAD_AF_SAS",
 ]
 
+# low cardinality text columns of a maf, read as pandas categoricals. Columns that
+# are rewritten in place (CallMethod, Status) or grouped on (Tumor_Sample_Barcode)
+# stay plain strings.
+MAF_CATEGORY_COLUMNS = [
+    "Hugo_Symbol",
+    "Center",
+    "NCBI_Build",
+    "Strand",
+    "Variant_Classification",
+    "Variant_Type",
+    "Consequence",
+    "VARIANT_CLASS",
+    "BIOTYPE",
+    "IMPACT",
+    "Mutation_Status",
+    "Validation_Status",
+    "Verification_Status",
+    "Sequencing_Phase",
+    "Sequence_Source",
+    "Sequencer",
+]
+
+# read count and depth columns of callers, traceback and fillouts, stored as int32
+MAF_COUNT_COLUMNS = [
+    "t_depth",
+    "t_ref_count",
+    "t_alt_count",
+    "n_depth",
+    "n_ref_count",
+    "n_alt_count",
+    "t_total_count",
+    "t_ref_count_standard",
+    "t_alt_count_standard",
+    "t_total_count_standard",
+    "t_total_count_fragment",
+    "t_ref_count_fragment",
+    "t_alt_count_fragment",
+    "t_ref_count_fragment_standard",
+    "t_alt_count_fragment_standard",
+    "t_total_count_fragment_simplex_duplex",
+    "t_ref_count_fragment_simplex_duplex",
+    "t_alt_count_fragment_simplex_duplex",
+    "t_ref_count_fragment_simplex",
+    "t_alt_count_fragment_simplex",
+    "t_ref_count_fragment_duplex",
+    "t_alt_count_fragment_duplex",
+    "n_count_fragment",
+    "n_ref_count_fragment",
+    "n_alt_count_fragment",
+]
+
 MAF_DUMMY_COLUMNS2 = [
     "cosmic_ID",
     "cosmic_OCCURENCE",
@@ -8,7 +8,6 @@ import time
 import logging
 from pathlib import Path
 from typing import List, Optional
-from contextlib import ExitStack
 import typer
 from vcf.parser import (
     _Info as VcfInfo,
@@ -19,10 +18,13 @@ from postprocessing_variant_calls.maf.helper import (
     check_maf,
     check_txt,
     check_separator,
+    check_format,
+    write_maf,
     read_tsv,
     MAFFile,
     gen_id_tsv,
     tag_by_hotspots,
+    write_classification_outputs,
     RulesFile,
 )
 
@@ -30,12 +32,6 @@ from postprocessing_variant_calls.maf.tag.tag_constants import (
     MAF_DUMMY_COLUMNS2,
     MAF_COLUMNS_SELECT,
     MAF_DUMMY_COLUMNS,
-    MAF_TSV_COL_MAP,
-    EXONIC_FILTERED,
-    SILENT_FILTERED,
-    NONPANEL_EXONIC_FILTERED,
-    NONPANEL_SILENT_FILTERED,
-    DROPPED,
     ALLOWED_EXONIC_VARIANT_CLASS,
 )
 
@@ -83,15 +79,36 @@ def germline_status(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="germline_status" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
     typer.secho(
         f"Tagging Maf with germline_status columns", fg=typer.colors.BRIGHT_GREEN
     )
-    mafa = mafa.tag("germline_status")
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa.run("tag", "germline_status", output_maf, output_format)
     return 0
 
 
@@ -122,15 +139,36 @@ def common_variant(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="common_variant" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
     typer.secho(
         f"Tagging Maf with common_variant columns", fg=typer.colors.BRIGHT_GREEN
     )
-    mafa = mafa.tag("common_variant")
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa.run("tag", "common_variant", output_maf, output_format)
     return 0
 
 
@@ -161,15 +199,36 @@ def prevalence_in_cosmicDB(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="prevalence_in_cosmicDB" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
     typer.secho(
         f"Tagging Maf with prevalence_in_cosmicDB columns", fg=typer.colors.BRIGHT_GREEN
     )
-    mafa = mafa.tag("prevalence_in_cosmicDB")
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa.run("tag", "prevalence_in_cosmicDB", output_maf, output_format)
     return 0
 
 
@@ -200,15 +259,36 @@ def truncating_mut_in_TSG(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="truncating_mut_in_TSG" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
     typer.secho(
         f"Tagging Maf with truncating_mut_in_TSG columns", fg=typer.colors.BRIGHT_GREEN
     )
-    mafa = mafa.tag("truncating_mut_in_TSG")
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa.run("tag", "truncating_mut_in_TSG", output_maf, output_format)
     return 0
 
 
@@ -238,13 +318,34 @@ def cmo_ch(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
+    projection: bool = typer.Option(
+        False,
+        "--projection",
+        help="Only parse the columns this command uses. The other columns are copied to the output as text, unchanged.",
+    ),
+    chunksize: int = typer.Option(
+        None,
+        "--chunksize",
+        min=1,
+        help="Process the maf this many rows at a time, appending to the output as it goes. Implies --projection.",
+    ),
 ):
     # prep maf
-    mafa = MAFFile(maf, separator)
+    mafa = MAFFile(
+        maf,
+        separator,
+        projection="cmo_ch_tag" if projection or chunksize else None,
+        chunksize=chunksize,
+    )
     typer.secho(f"Tagging Maf with cmo_ch_tag columns", fg=typer.colors.BRIGHT_GREEN)
-    mafa = mafa.tag_all("cmo_ch_tag")
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    mafa.run("tag_all", "cmo_ch_tag", output_maf, output_format)
     return 0
 
 
@@ -275,6 +376,12 @@ def traceback(
         help="Specify a seperator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
     samplesheet: List[Path] = typer.Option(
         None,
         "--samplesheet",
@@ -323,7 +430,7 @@ def traceback(
 
     # write out to csv file
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    mafa.to_csv(f"{output_maf}".format(outputFile=output_maf), index=False, sep="\t")
+    write_maf(mafa, output_maf, output_format)
     return 0
 
 
@@ -376,27 +483,6 @@ def by_variant_classification(
     write out into individual TXT/MAF output files
     """
 
-    def format_var(variant):
-        """
-        Helper function to convert named tuple dervied from pandas df into tsv
-        """
-        try:
-            columns = map(lambda x: getattr(variant, x), MAF_TSV_COL_MAP.keys())
-            return "\t".join(map(str, columns)) + "\n"
-        except AttributeError:
-            missing_columns = set(MAF_TSV_COL_MAP.keys()) - set(
-                filter(lambda x: not x.startswith("_"), dir(variant))
-            )
-            raise Exception(
-                "Missing required columns: {}".format(",".join(missing_columns))
-            )
-
-    def reformat_tx(txID, tx_df):
-        """
-        helper function to get reportable txID
-        """
-        return tx_df[tx_df.isoform == txID].refseq_id.values.tolist()
-
     # prep and read in maf
     typer.secho(f"Reading in input Filtered MAF file.", fg=typer.colors.BRIGHT_GREEN)
     mafa = MAFFile(maf, separator)
@@ -414,63 +500,7 @@ def by_variant_classification(
     final_maf = mafa.tag_by_variant_classification(output_dir, tx_isoform_lst)
 
     # Create exonic, silent, and nonpanel files.
-    file_names = [
-        EXONIC_FILTERED,
-        SILENT_FILTERED,
-        NONPANEL_EXONIC_FILTERED,
-        NONPANEL_SILENT_FILTERED,
-        DROPPED,
-    ]
-
-    file_paths = [f"{output_dir}/{name}" for name in file_names]
-
-    headers = "\t".join(MAF_TSV_COL_MAP.values()) + "\n"
-
-    with ExitStack() as stack:
-        files = [stack.enter_context(open(path, "w")) for path in file_paths]
-        for file in files:
-            file.write(headers)
-
-        # Iterate through the DataFrame rows
-        for variant in final_maf.itertuples(index=False):
-            tag = variant.classification
-
-            # Reformat the row
-            formatted_variant = format_var(variant)
-
-            # Determine which file(s) to write to based on the tag
-            if "exonic" in tag:
-                variant_tuple = (
-                    variant.Hugo_Symbol,
-                    variant.Variant_Classification,
-                    variant.Start_Position,
-                )
-                transcript_id = reformat_tx(variant.Transcript_ID, tx_df)
-
-                variant = variant._replace(
-                    Hugo_Symbol=variant_tuple[0],  # Gene
-                    Entrez_Gene_Id=variant.Entrez_Gene_Id,
-                    Center=variant.Center,
-                    NCBI_Build=variant.NCBI_Build,
-                    Chromosome=variant.Chromosome,
-                    Variant_Classification=variant_tuple[1],  # VariantClass
-                    Variant_Type=variant.Variant_Type,
-                    Start_Position=variant_tuple[2],  # Start coordinate
-                    Tumor_Sample_Barcode=variant.Tumor_Sample_Barcode,
-                    caller_Norm_Sample_Barcode=variant.caller_Norm_Sample_Barcode,
-                    Transcript_ID=transcript_id,  # TranscriptID
-                )
-                formatted_exonic_variant_row = format_var(variant)
-                files[0].write(formatted_exonic_variant_row)
-
-            if "silent" in tag:
-                files[1].write(formatted_variant)
-            if "nonpanel_exonic" in tag:
-                files[2].write(formatted_variant)
-            if "nonpanel_silent" in tag:
-                files[3].write(formatted_variant)
-            if "dropped" in tag:
-                files[4].write(formatted_variant)
+    write_classification_outputs(final_maf, tx_df, output_dir)
 
     return 0
 
@@ -514,6 +544,12 @@ def by_rules(
         help="Specify a separator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
 ):
     # run tag by_variant_annotations
     mafa = MAFFile(maf, separator)
@@ -525,7 +561,7 @@ def by_rules(
     tagged_by_variant_annot_maf = mafa.tag_by_variant_annotations(rules_file.data_frame)
 
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    tagged_by_variant_annot_maf.to_csv(output_maf, sep="\t", index=False)
+    write_maf(tagged_by_variant_annot_maf, output_maf, output_format)
 
 
 @app.command(
@@ -557,6 +593,12 @@ def hotspots(
         resolve_path=True,
         help="Text file containing hotspots to tag input MAF by",
     ),
+    hotspots_index: Path = typer.Option(
+        None,
+        "--hotspots-index",
+        help="Binary index of the hotspots file. Built and saved here on first use, \
+              then reused while the hotspots file is unchanged.",
+    ),
     output_maf: Path = typer.Option(
         "output_tagged.maf", "--output", "-o", help="Maf output file name."
     ),
@@ -567,17 +609,25 @@ def hotspots(
         help="Specify a separator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
 ):
-    # run tag by_variant_annotations
+    # run tag by hotspots
     mafa = MAFFile(maf, separator)
     typer.secho(
-        f"Tagging Maf with criteria from input rules JSON file",
+        f"Tagging Maf with hotspots from input hotspots file",
         fg=typer.colors.BRIGHT_GREEN,
     )
-    tagged_by_hotspot_maf = tag_by_hotspots(tagged_by_variant_annot_maf, hotspots)
+    tagged_by_hotspot_maf = tag_by_hotspots(
+        mafa.data_frame, hotspots, index_file=hotspots_index
+    )
 
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    tagged_by_hotspot_maf.to_csv(output_maf, sep="\t", index=False)
+    write_maf(tagged_by_hotspot_maf, output_maf, output_format)
 
 
 @app.command(
@@ -621,6 +671,12 @@ def access(
         resolve_path=True,
         help="Text file containing hotspots to tag input MAF by",
     ),
+    hotspots_index: Path = typer.Option(
+        None,
+        "--hotspots-index",
+        help="Binary index of the hotspots file. Built and saved here on first use, \
+              then reused while the hotspots file is unchanged.",
+    ),
     output_maf: Path = typer.Option(
         "output_tagged.maf", "--output", "-o", help="Maf output file name."
     ),
@@ -631,6 +687,12 @@ def access(
         help="Specify a separator for delimited data.",
         callback=check_separator,
     ),
+    output_format: str = typer.Option(
+        None,
+        "--format",
+        help="Output format: tsv, csv, parquet or feather. Defaults to the extension of the output file, tsv otherwise.",
+        callback=check_format,
+    ),
 ):
     # run tag by_variant_annotations
     mafa = MAFFile(maf, separator)
@@ -641,11 +703,11 @@ def access(
     rules_file = RulesFile(rules)
     tagged_by_variant_annot_maf = mafa.tag_by_variant_annotations(rules_file.data_frame)
     tagged_by_variant_annot_and_hotspots_maf = tag_by_hotspots(
-        tagged_by_variant_annot_maf, hotspots
+        tagged_by_variant_annot_maf, hotspots, index_file=hotspots_index
     )
 
     typer.secho(f"Writing Delimited file: {output_maf}", fg=typer.colors.BRIGHT_GREEN)
-    tagged_by_variant_annot_and_hotspots_maf.to_csv(output_maf, sep="\t", index=False)
+    write_maf(tagged_by_variant_annot_and_hotspots_maf, output_maf, output_format)
 
 
 if __name__ == "__main__":
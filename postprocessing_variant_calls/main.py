@@ -7,6 +7,7 @@ from .mutect import mutect2_process
 # from .maf import main
 from .maf import main
 from .maf.annotate import annotate_process
+from .cache import cache_process
 import logging
 import time
 
@@ -41,6 +42,13 @@ app.add_typer(
     help="operations for manipulating maf files based on a given input.",
 )
 
+# Reference resource cache App
+app.add_typer(
+    cache_process.app,
+    name="cache",
+    help="inspect and clear the cache of parsed reference resources.",
+)
+
 # versioning
 __version__ = "0.2.8"
 
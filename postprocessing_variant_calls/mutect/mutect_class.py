@@ -9,6 +9,12 @@ from vcf.parser import (
     _Format as VcfFormat,
     _vcf_metadata_parser as VcfMetadataParser,
 )
+from utils.vcf_io import (
+    compressed_name,
+    open_vcf,
+    open_vcf_output,
+    strip_vcf_extension,
+)
 
 
 class mutect_sample:
@@ -30,6 +36,7 @@ class mutect_sample:
         -allsamples
         -vcf_reader
         -txt_out
+        -compress
     """
 
     def __init__(
@@ -43,6 +50,7 @@ class mutect_sample:
         alleleDepth,
         variantFraction,
         tnRatio,
+        compress=False,
     ):
 
         # specified by CLI tool
@@ -60,6 +68,9 @@ class mutect_sample:
         self.vcf_out = self.out_name()
         self.txt_out = self.vcf_out + "_filtered.txt"
         self.vcf_out = self.vcf_out + "_filtered.vcf"
+        # a bgzip compressed vcf is named .vcf.gz and gets a tabix index
+        self.compress = compress
+        self.vcf_out = compressed_name(self.vcf_out, compress)
         # vcf reader
         self.vcf_reader = self.set_reader()
         # sample list
@@ -73,8 +84,7 @@ class mutect_sample:
         -input: self
         -ouput: a string that specifies the name of the output vcf
         """
-        vcf_out = os.path.basename(self.inputVcf)
-        vcf_out = os.path.splitext(vcf_out)[0]
+        vcf_out = strip_vcf_extension(os.path.basename(self.inputVcf))
         if self.outputDir != "":
             vcf_out = os.path.join(self.outputDir, vcf_out)
         return vcf_out
@@ -87,7 +97,7 @@ class mutect_sample:
         -input: self
         -ouput: a vcf reader
         """
-        vcf_reader = vcf.Reader(open(self.inputVcf, "r"))
+        vcf_reader = vcf.Reader(open_vcf(self.inputVcf), compressed=False)
         vcf_reader.infos["FAILURE_REASON"] = VcfInfo(
             "FAILURE_REASON",
             ".",
@@ -163,7 +173,6 @@ class mutect_sample:
             "triallelic_site",
         ]
 
-        vcf_writer = vcf.Writer(open(self.vcf_out, "w"), self.vcf_reader)
         txt_fh = open(self.txt_out, "wb")
 
         # If the caller reported the normal genotype column before the tumor, swap those around
@@ -246,7 +255,6 @@ class mutect_sample:
 
         # This section uses the keepDict to write all passed mutations to the new VCF file
         _write_to_vcf(
-            self.outputDir,
             self.vcf_out,
             self.vcf_reader,
             self.allsamples,
@@ -266,7 +274,9 @@ class mutect_sample:
             - self.vcf_out
         """
 
-        vcf_writer = vcf.Writer(open(self.vcf_out, "w"), self.vcf_reader)
+        vcf_writer = vcf.Writer(
+            open_vcf_output(self.vcf_out, index=True), self.vcf_reader
+        )
 
         def should_remove(
             tumor_total_depth, tad, tvf, totalDepth, alleleDepth, variantFraction, nvfRF
@@ -436,9 +446,10 @@ def _tvf_threshold_calculation(nvf, tnr):
     return nvfRF
 
 
-def _write_to_vcf(outDir, vcf_out, vcf_reader, allsamples, tsampleName, keepDict):
+def _write_to_vcf(vcf_out, vcf_reader, allsamples, tsampleName, keepDict):
     # This section uses the keepDict to write all passed mutations to the new VCF file
-    vcf_writer = vcf.Writer(open(f"{outDir}/{vcf_out}", "w"), vcf_reader)
+    # vcf_out already includes the output dir
+    vcf_writer = vcf.Writer(open_vcf_output(vcf_out, index=True), vcf_reader)
     for record in vcf_reader:
         key_for_tracking = (
             str(record.CHROM)
@@ -102,6 +102,11 @@ def filter(
     outputDir: str = typer.Option(
         "", "--outDir", "-o", help="Full Path to the output dir"
     ),
+    compress: bool = typer.Option(
+        False,
+        "--compress",
+        help="Write a bgzip compressed vcf (.vcf.gz) with a tabix index (.tbi).",
+    ),
 ):
     """
     This tool helps to filter MuTect version 1.1.5 VCFs for case-control calling
@@ -122,6 +127,7 @@ def filter(
         alleleDepth,
         variantFraction,
         tnRatio,
+        compress,
     )
 
     # check for normal
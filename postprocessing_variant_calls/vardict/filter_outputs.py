@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# imports
+import io
+import vcf
+from utils.vcf_io import ContigOrder, OrderTracker, open_vcf_output
+
+# records held in memory before the buffer of an output is written out in one block
+BLOCK_RECORDS = 8192
+
+
+def _stringify(value):
+    # Writer._stringify of PyVCF
+    if value is None:
+        return "."
+    if type(value) is list:
+        return ",".join(["." if x is None else str(x) for x in value])
+    return str(value)
+
+
+class FilterOutputs:
+    """
+    @Description : The purpose of this class is to write the records kept by the vardict filters, routing them to the
+                    STDfilter vcf or the STDfilter complex vcf and adding a line to the STDfilter txt for each.
+                    Each record is serialized once, into the text vcf.Writer.write_record would write for it, and its columns
+                    are reused for the txt line. The order of the INFO keys and the layout of the FORMAT fields are worked out
+                    once for all the records that share them. The buffers are written out in blocks of BLOCK_RECORDS records.
+    -init:
+        -vcf_reader: the PyVCF reader whose header the vcfs get
+        -vcf_out
+        -vcf_complex_out
+        -txt_out
+        -sample_name: first column of the txt
+        -vcf_out_order: tracks whether the records of vcf_out are written in contig order
+        -vcf_complex_out_order
+    """
+
+    def __init__(
+        self,
+        vcf_reader,
+        vcf_out,
+        vcf_complex_out,
+        txt_out,
+        sample_name,
+        block_records=BLOCK_RECORDS,
+    ):
+        self.sample_name = sample_name
+        self.block_records = block_records
+        # the header is serialized once, for both vcfs
+        header = io.StringIO()
+        vcf.Writer(header, vcf_reader)
+        self.vcf_fh = open_vcf_output(vcf_out)
+        self.vcf_complex_fh = open_vcf_output(vcf_complex_out)
+        self.txt_fh = open(txt_out, "w", encoding="utf-8")
+        for fh in (self.vcf_fh, self.vcf_complex_fh):
+            fh.write(header.getvalue())
+        # PyVCF writer whose FILTER and INFO formatting is reused, its header is dropped
+        self.writer = vcf.Writer(io.StringIO(), vcf_reader)
+        # sorted INFO keys, by the tuple of keys of a record
+        self.info_keys = {}
+        # (position of GT or None, positions of FT, positions of the other fields), by FORMAT
+        self.sample_layouts = {}
+        self.vcf_lines = []
+        self.vcf_complex_lines = []
+        self.txt_lines = []
+        contig_order = ContigOrder(vcf_reader.contigs)
+        self.vcf_out_order = OrderTracker(contig_order)
+        self.vcf_complex_out_order = OrderTracker(contig_order)
+
+    def write_record(self, record, complex_flag):
+        """
+        @Description : The purpose of this function is to buffer a kept record for its vcf and the txt
+        -input:
+            - record: PyVCF record
+            - complex_flag: boolean representing whether the record is a padded complex indel
+        """
+        chrom, pos, ref, alt, line = self.serialize(record)
+        if complex_flag:
+            self.vcf_complex_lines.append(line)
+            self.vcf_complex_out_order.add(record.CHROM, record.POS)
+        else:
+            self.vcf_lines.append(line)
+            self.vcf_out_order.add(record.CHROM, record.POS)
+        self.txt_lines.append(f"{self.sample_name}\t{chrom}\t{pos}\t{ref}\t{alt}\t.\n")
+        if len(self.txt_lines) >= self.block_records:
+            self.flush()
+
+    def serialize(self, record):
+        """
+        @Description : The purpose of this function is to serialize a record like vcf.Writer.write_record
+        -input: record: PyVCF record
+        -ouput:
+            - CHROM, POS, REF and the first ALT of the record, as the vcf line has them
+            - the vcf line
+        """
+        chrom = str(record.CHROM)
+        pos = str(record.POS)
+        ref = str(record.REF)
+        alts = ["." if alt is None else str(alt) for alt in record.ALT]
+        columns = [
+            chrom,
+            pos,
+            "." if record.ID is None else str(record.ID),
+            ref,
+            ",".join(alts),
+            str(record.QUAL or "."),
+            self.writer._format_filter(record.FILTER),
+            self.format_info(record.INFO),
+        ]
+        if record.FORMAT:
+            columns.append(record.FORMAT)
+            columns.extend(self.format_samples(record.FORMAT, record.samples))
+        return chrom, pos, ref, alts[0], "\t".join(columns) + "\n"
+
+    def format_info(self, info):
+        # Writer._format_info of PyVCF: keys in the order of the header, then alphabetically
+        if not info:
+            return "."
+        keys = tuple(info)
+        if keys not in self.info_keys:
+            info_order = self.writer.info_order
+            self.info_keys[keys] = sorted(keys, key=lambda key: (info_order[key], key))
+        fields = []
+        for key in self.info_keys[keys]:
+            value = info[key]
+            if isinstance(value, bool):
+                fields.append(key if value else "")
+            else:
+                fields.append(f"{key}={_stringify(value)}")
+        return ";".join(fields)
+
+    def format_samples(self, fmt, samples):
+        # Writer._format_sample of PyVCF: GT first, then the other fields in the order of the call data
+        if not samples:
+            return []
+        if fmt not in self.sample_layouts:
+            names = samples[0].data._fields
+            self.sample_layouts[fmt] = (
+                names.index("GT") if "GT" in names else None,
+                "GT" in fmt,
+                [i for i, name in enumerate(names) if name == "FT"],
+                [i for i, name in enumerate(names) if name != "GT"],
+            )
+        gt_index, gt_in_format, ft_indexes, indexes = self.sample_layouts[fmt]
+        columns = []
+        for sample in samples:
+            data = sample.data
+            if gt_index is not None:
+                gt = data[gt_index]
+            else:
+                gt = "./." if gt_in_format else ""
+            fields = [gt] if gt else []
+            for i in indexes:
+                if i in ft_indexes:
+                    fields.append(self.writer._format_filter(data[i]))
+                else:
+                    fields.append(_stringify(data[i]))
+            columns.append(":".join(fields))
+        return columns
+
+    def flush(self):
+        self.vcf_fh.write("".join(self.vcf_lines))
+        self.vcf_complex_fh.write("".join(self.vcf_complex_lines))
+        self.txt_fh.write("".join(self.txt_lines))
+        self.vcf_lines.clear()
+        self.vcf_complex_lines.clear()
+        self.txt_lines.clear()
+
+    def close(self):
+        self.flush()
+        self.vcf_fh.close()
+        self.vcf_complex_fh.close()
+        self.txt_fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# imports
+import typer
+
+# auto picks cyvcf2 when it is installed and falls back to PyVCF otherwise
+READER_BACKENDS = ["auto", "cyvcf2", "pyvcf"]
+
+# cyvcf2 reports a missing integer FORMAT value as the smallest int32
+CYVCF2_MISSING_INT = -(2**31)
+
+
+def have_cyvcf2():
+    try:
+        import cyvcf2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def check_backend(backend: str):
+    """Validate the --backend option of the vardict filter commands."""
+    if backend not in READER_BACKENDS:
+        typer.secho(
+            f"Unknown reader backend {backend}, choose one of {', '.join(READER_BACKENDS)}.",
+            fg=typer.colors.RED,
+        )
+        raise typer.Abort()
+    if backend == "cyvcf2" and not have_cyvcf2():
+        typer.secho(
+            "The cyvcf2 backend requires cyvcf2, install it with `pip install cyvcf2` or use `--backend pyvcf`.",
+            fg=typer.colors.RED,
+        )
+        raise typer.Abort()
+    return backend
+
+
+def reader_backend(backend, vcf_reader, input_vcf, contig=None):
+    """
+    @Description : The purpose of this function is to pick the engine var_sample filters records with
+    -input:
+        -backend: auto, cyvcf2 or pyvcf
+        -vcf_reader: the PyVCF reader set up by var_sample.set_reader, positioned after the header
+        -input_vcf: path of the vcf vcf_reader reads
+        -contig: the only contig vcf_reader reads, from an indexed input_vcf
+    -ouput: a backend, iterating over the sites of input_vcf
+    """
+    if backend == "auto":
+        backend = "cyvcf2" if have_cyvcf2() else "pyvcf"
+    if backend == "cyvcf2":
+        return Cyvcf2Backend(vcf_reader, input_vcf, contig)
+    return PyVcfBackend(vcf_reader)
+
+
+class PyVcfBackend:
+    """
+    @Description : Filter on records fully parsed by PyVCF, every INFO and FORMAT field of every record
+    """
+
+    name = "pyvcf"
+
+    def __init__(self, vcf_reader):
+        self.vcf_reader = vcf_reader
+
+    def __iter__(self):
+        for record in self.vcf_reader:
+            yield PyVcfSite(record)
+
+    def record(self, site):
+        return site.record
+
+
+class PyVcfSite:
+    def __init__(self, record):
+        self.record = record
+
+    def info(self, key):
+        return self.record.INFO[key]
+
+    def genotype(self, sample_name):
+        return PyVcfCall(self.record.genotype(sample_name))
+
+
+class PyVcfCall:
+    def __init__(self, call):
+        self.call = call
+
+    def __getitem__(self, key):
+        # raises AttributeError for fields missing from FORMAT, like PyVCF calls do
+        value = self.call[key]
+        # set_reader declares DP with Number "1", which PyVCF parses as a list
+        if isinstance(value, list):
+            return value[0]
+        return value
+
+
+class Cyvcf2Backend:
+    """
+    @Description : Filter on records decoded by htslib through cyvcf2, reading only the fields the filter uses.
+                    PyVCF still parses and writes the records that pass, from their original lines, so the
+                    outputs are byte-identical to the pyvcf backend.
+    """
+
+    name = "cyvcf2"
+
+    def __init__(self, vcf_reader, input_vcf, contig=None):
+        from cyvcf2 import VCF
+
+        self.vcf_reader = vcf_reader
+        # the raw data lines, read alongside the htslib records
+        self.lines = vcf_reader.reader
+        self.vcf = VCF(str(input_vcf), lazy=True)
+        self.sample_index = {name: i for i, name in enumerate(self.vcf.samples)}
+        self.contig = contig
+
+    def __iter__(self):
+        variants = self.vcf if self.contig is None else self.vcf(self.contig)
+        for variant in variants:
+            line = next(self.lines)
+            pos = line.split("\t", 2)[1]
+            if int(pos) != variant.POS:
+                raise ValueError(
+                    f"cyvcf2 and PyVCF disagree on the record at {variant.CHROM}:{variant.POS} ({pos} in the vcf text)"
+                )
+            yield Cyvcf2Site(variant, line, self.sample_index)
+        self.vcf.close()
+
+    def record(self, site):
+        self.vcf_reader.reader = iter((site.line,))
+        return next(self.vcf_reader)
+
+
+class Cyvcf2Site:
+    def __init__(self, variant, line, sample_index):
+        self.variant = variant
+        self.line = line
+        self.sample_index = sample_index
+        self.formats = {}
+
+    def info(self, key):
+        # raises KeyError for missing fields, like the INFO dict of a PyVCF record
+        return self.variant.INFO[key]
+
+    def format(self, key):
+        """First value of a FORMAT field for every sample, None where it is missing."""
+        if key not in self.formats:
+            values = self.variant.format(key)
+            if values is not None:
+                values = [
+                    (
+                        None
+                        if value == CYVCF2_MISSING_INT or value != value  # nan
+                        else value
+                    )
+                    for value in values[:, 0].tolist()
+                ]
+            self.formats[key] = values
+        return self.formats[key]
+
+    def genotype(self, sample_name):
+        return Cyvcf2Call(self, self.sample_index[sample_name])
+
+
+class Cyvcf2Call:
+    def __init__(self, site, index):
+        self.site = site
+        self.index = index
+
+    def __getitem__(self, key):
+        values = self.site.format(key)
+        if values is None:
+            # like PyVCF calls, for fields missing from FORMAT
+            raise AttributeError(key)
+        return values[self.index]
@@ -2,12 +2,32 @@
 # imports
 import os
 import sys
+import time
+import shutil
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import vcf
 from vcf.parser import (
     _Info as VcfInfo,
     _Format as VcfFormat,
     _vcf_metadata_parser as VcfMetadataParser,
 )
+from .reader_backends import reader_backend
+from .filter_outputs import FilterOutputs
+from utils.vcf_io import (
+    ContigOrder,
+    OrderTracker,
+    compressed_name,
+    iter_vcf_contig,
+    open_vcf,
+    open_vcf_output,
+    read_tabix_contigs,
+    sort_vcf_file,
+    strip_vcf_extension,
+)
+
+logger = logging.getLogger("filter")
 
 
 class var_sample:
@@ -31,6 +51,12 @@ class var_sample:
         -vcf_reader
         -vcf_complex_out
         -txt_out
+        -backend
+        -reader_backend
+        -compress
+        -vcf_out_order
+        -vcf_complex_out_order
+        -shard
     """
 
     def __init__(
@@ -44,6 +70,9 @@ class var_sample:
         variantFraction,
         tnRatio,
         filterGermline,
+        backend="auto",
+        compress=False,
+        shard=None,
     ):
 
         # specified by CLI tool
@@ -56,6 +85,8 @@ class var_sample:
         self.variantFraction = variantFraction
         self.tnRatio = tnRatio
         self.filterGermline = filterGermline
+        # (contig, virtual offset of its first record) when only one contig of an indexed vcf is filtered
+        self.shard = shard
         # custom info
         # vcf output name
         self.vcf_out = self.out_name()
@@ -66,10 +97,24 @@ class var_sample:
         self.vcf_out_sort = self.out_name()
         self.vcf_complex_out_sort = self.vcf_complex_out.replace(".vcf", "_sorted.vcf")
         self.vcf_out_sort = self.vcf_out.replace(".vcf", "_sorted.vcf")
+        # bgzip compressed vcfs are named .vcf.gz, the sorted ones get a tabix index
+        self.compress = compress
+        self.vcf_out = compressed_name(self.vcf_out, compress)
+        self.vcf_complex_out = compressed_name(self.vcf_complex_out, compress)
+        self.vcf_out_sort = compressed_name(self.vcf_out_sort, compress)
+        self.vcf_complex_out_sort = compressed_name(self.vcf_complex_out_sort, compress)
+        # whether the filter wrote the records in order, set by filter_single and filter_case_control
+        self.vcf_out_order = None
+        self.vcf_complex_out_order = None
         # vcf reader
         self.vcf_reader = self.set_reader()
         # sample list
         self.allsamples = list(self.vcf_reader.samples)
+        # engine reading the fields the filters use: cyvcf2 when installed, PyVCF otherwise
+        self.backend = backend
+        self.reader_backend = reader_backend(
+            backend, self.vcf_reader, self.inputVcf, None if shard is None else shard[0]
+        )
 
     def out_name(self):
         """
@@ -79,8 +124,7 @@ class var_sample:
         -input: self
         -ouput: a string that specifies the name of the output vcf
         """
-        vcf_out = os.path.basename(self.inputVcf)
-        vcf_out = os.path.splitext(vcf_out)[0]
+        vcf_out = strip_vcf_extension(os.path.basename(self.inputVcf))
         if self.outputDir != "":
             vcf_out = os.path.join(self.outputDir, vcf_out)
         return vcf_out
@@ -94,7 +138,11 @@ class var_sample:
         -input: self
         -ouput: a vcf reader
         """
-        vcf_reader = vcf.Reader(open(self.inputVcf, "r"))
+        if self.shard is None:
+            vcf_lines = open_vcf(self.inputVcf)
+        else:
+            vcf_lines = iter_vcf_contig(self.inputVcf, *self.shard)
+        vcf_reader = vcf.Reader(vcf_lines, compressed=False)
         vcf_reader.infos["set"] = VcfInfo(
             "set",
             ".",
@@ -140,6 +188,38 @@ class var_sample:
         else:
             return True
 
+    def kept_record(self, site):
+        """
+        @Description : The purpose of this function is to build the PyVCF record written out for a site that passed the filters,
+                        padding complex indels for proper genotyping
+        -input: a site of self.reader_backend
+        -ouput:
+            - the PyVCF record of the site
+            - boolean representing whether the record is a padded complex indel
+        """
+        record = self.reader_backend.record(site)
+        if (
+            record.INFO["TYPE"] == "Complex"
+            and len(record.REF) != len(record.ALT)
+            and record.INFO["SHIFT3"] > 0
+            and record.INFO["SHIFT3"] <= len(record.INFO["LSEQ"])
+        ):
+            padding_seq = record.INFO["LSEQ"][
+                len(record.INFO["LSEQ"]) - (record.INFO["SHIFT3"] + 1) :
+            ]
+            record.REF = padding_seq + record.REF
+            for alt in record.ALT:
+                alt.sequence = padding_seq + alt.sequence
+            record.POS = record.POS - (record.INFO["SHIFT3"] + 1)
+            record.INFO["SHIFT3_ADJUSTED"] = record.INFO["SHIFT3"]
+            record.INFO["SHIFT3"] = 0
+            complex_flag = True
+        else:
+            complex_flag = False
+            record.INFO["SHIFT3_ADJUSTED"] = 0
+        record.add_info("set", "VarDict")
+        return record, complex_flag
+
     def filter_single(self):
         # TODO: contiue work on method, check with Karthi / Ronak about single filter
         """
@@ -152,43 +232,27 @@ class var_sample:
             - self.vcf_complex_out
             - self.txt_out
         """
-        vcf_writer = vcf.Writer(open(self.vcf_out, "w"), self.vcf_reader)
-        vcf_complex_writer = vcf.Writer(
-            open(self.vcf_complex_out, "w"), self.vcf_reader
+        outputs = FilterOutputs(
+            self.vcf_reader,
+            self.vcf_out,
+            self.vcf_complex_out,
+            self.txt_out,
+            self.sampleName,
         )
-        txt_fh = open(self.txt_out, "wb")
+        # outputs written in contig order are not sorted again
+        self.vcf_out_order = outputs.vcf_out_order
+        self.vcf_complex_out_order = outputs.vcf_complex_out_order
 
         # mutations
 
         # Iterate through rows and filter mutations
-        for record in self.vcf_reader:
-            tcall = record.genotype(self.sampleName)
-
-            # Pad complex indels for proper genotyping
-            if (
-                record.INFO["TYPE"] == "Complex"
-                and len(record.REF) != len(record.ALT)
-                and record.INFO["SHIFT3"] > 0
-                and record.INFO["SHIFT3"] <= len(record.INFO["LSEQ"])
-            ):
-                padding_seq = record.INFO["LSEQ"][
-                    len(record.INFO["LSEQ"]) - (record.INFO["SHIFT3"] + 1) :
-                ]
-                record.REF = padding_seq + record.REF
-                for alt in record.ALT:
-                    alt.sequence = padding_seq + alt.sequence
-                record.POS = record.POS - (record.INFO["SHIFT3"] + 1)
-                record.INFO["SHIFT3_ADJUSTED"] = record.INFO["SHIFT3"]
-                record.INFO["SHIFT3"] = 0
-                complex_flag = True
-            else:
-                complex_flag = False
-                record.INFO["SHIFT3_ADJUSTED"] = 0
+        for site in self.reader_backend:
+            tcall = site.genotype(self.sampleName)
 
-            tmq = int(record.INFO["QUAL"])
+            tmq = int(site.info("QUAL"))
 
             if tcall["DP"] is not None:
-                tdp = int(tcall["DP"][0])
+                tdp = int(tcall["DP"])
             else:
                 tdp = 0
             if tcall["VD"] is not None:
@@ -199,36 +263,15 @@ class var_sample:
                 tvf = int(tad) / float(tdp)
             else:
                 tvf = 0
-            record.add_info("set", "VarDict")
             if (
                 (tmq >= int(self.minQual))
                 & (tdp >= int(self.totalDepth))
                 & (tad >= int(self.alleleDepth))
                 & (tvf >= float(self.variantFraction))
             ):
-                if complex_flag:
-                    vcf_complex_writer.write_record(record)
-                else:
-                    vcf_writer.write_record(record)
-                out_line = str.encode(
-                    self.sampleName
-                    + "\t"
-                    + record.CHROM
-                    + "\t"
-                    + str(record.POS)
-                    + "\t"
-                    + str(record.REF)
-                    + "\t"
-                    + str(record.ALT[0])
-                    + "\t"
-                    + "."
-                    + "\n"
-                )
-                txt_fh.write(out_line)
+                outputs.write_record(*self.kept_record(site))
 
-        vcf_writer.close()
-        vcf_complex_writer.close()
-        txt_fh.close()
+        outputs.close()
         return self.vcf_out, self.vcf_complex_out, self.txt_out
 
     def filter_case_control(self):
@@ -252,42 +295,26 @@ class var_sample:
 
         normal_sampleName = self.vcf_reader.samples[1]
 
-        vcf_writer = vcf.Writer(open(self.vcf_out, "w"), self.vcf_reader)
-        vcf_complex_writer = vcf.Writer(
-            open(self.vcf_complex_out, "w"), self.vcf_reader
+        outputs = FilterOutputs(
+            self.vcf_reader,
+            self.vcf_out,
+            self.vcf_complex_out,
+            self.txt_out,
+            self.sampleName,
         )
-        txt_fh = open(self.txt_out, "wb")
+        # outputs written in contig order are not sorted again
+        self.vcf_out_order = outputs.vcf_out_order
+        self.vcf_complex_out_order = outputs.vcf_complex_out_order
 
         # mutations
 
         # Iterate through rows and filter mutations
-        for record in self.vcf_reader:
-            tcall = record.genotype(self.sampleName)
-
-            # Pad complex indels for proper genotyping
-            if (
-                record.INFO["TYPE"] == "Complex"
-                and len(record.REF) != len(record.ALT)
-                and record.INFO["SHIFT3"] > 0
-                and record.INFO["SHIFT3"] <= len(record.INFO["LSEQ"])
-            ):
-                padding_seq = record.INFO["LSEQ"][
-                    len(record.INFO["LSEQ"]) - (record.INFO["SHIFT3"] + 1) :
-                ]
-                record.REF = padding_seq + record.REF
-                for alt in record.ALT:
-                    alt.sequence = padding_seq + alt.sequence
-                record.POS = record.POS - (record.INFO["SHIFT3"] + 1)
-                record.INFO["SHIFT3_ADJUSTED"] = record.INFO["SHIFT3"]
-                record.INFO["SHIFT3"] = 0
-                complex_flag = True
-            else:
-                complex_flag = False
-                record.INFO["SHIFT3_ADJUSTED"] = 0
+        for site in self.reader_backend:
+            tcall = site.genotype(self.sampleName)
 
             keep_based_on_status = True
             try:
-                if "Somatic" not in record.INFO["STATUS"] and self.filterGermline:
+                if "Somatic" not in site.info("STATUS") and self.filterGermline:
                     keep_based_on_status = False
             except KeyError:
                 keep_based_on_status = False
@@ -297,10 +324,10 @@ class var_sample:
                 else:
                     tmq = 0
             except:
-                tmq = int(record.INFO["QUAL"])
+                tmq = int(site.info("QUAL"))
 
             if tcall["DP"] is not None:
-                tdp = int(tcall["DP"][0])
+                tdp = int(tcall["DP"])
             else:
                 tdp = 0
             if tcall["VD"] is not None:
@@ -313,14 +340,14 @@ class var_sample:
                 tvf = 0
             #### processing normal sample
             # Read record for normal sample
-            ncall = record.genotype(normal_sampleName)
+            ncall = site.genotype(normal_sampleName)
             if ncall:
                 if ncall["QUAL"] is not None:
                     nmq = int(ncall["QUAL"])
                 else:
                     nmq = 0
                 if ncall["DP"] is not None:
-                    ndp = int(ncall["DP"][0])
+                    ndp = int(ncall["DP"])
                 else:
                     ndp = 0
                 if ncall["VD"] is not None:
@@ -333,7 +360,6 @@ class var_sample:
                     nvf = 0
                 nvfRF = int(self.tnRatio) * nvf
 
-            record.add_info("set", "VarDict")
             if_swap_sample = False
             if self.allsamples[1] == self.sampleName:
                 if_swap_sample = True
@@ -356,52 +382,132 @@ class var_sample:
                     & (tad >= int(self.alleleDepth))
                     & (tvf >= float(self.variantFraction))
                 ):
-                    if complex_flag:
-                        vcf_complex_writer.write_record(record)
-                    else:
-                        vcf_writer.write_record(record)
-                    out_line = str.encode(
-                        self.sampleName
-                        + "\t"
-                        + record.CHROM
-                        + "\t"
-                        + str(record.POS)
-                        + "\t"
-                        + str(record.REF)
-                        + "\t"
-                        + str(record.ALT[0])
-                        + "\t"
-                        + "."
-                        + "\n"
+                    outputs.write_record(*self.kept_record(site))
+        outputs.close()
+        return self.vcf_out, self.vcf_complex_out, self.txt_out
+
+    def filter_by_contig(self, method, threads):
+        """
+        @Description : The purpose of this function is to run a filter over the contigs of a bgzip compressed, tabix indexed vcf
+                        in a pool of processes, then concatenate the outputs of every contig in the order of the vcf.
+                        The outputs are the same as those of the filter run in one process, which is what happens when
+                        threads is 1 or the vcf has no tabix index.
+        -input:
+            - method: filter_single or filter_case_control
+            - threads: number of processes
+        -ouput:
+            - self.vcf_out
+            - self.vcf_complex_out
+            - self.txt_out
+        """
+        index = f"{self.inputVcf}.tbi"
+        if threads <= 1:
+            return getattr(self, method)()
+        if not os.path.exists(index):
+            logger.warning(
+                "--threads needs a bgzip compressed vcf with a tabix index (%s), filtering in one process.",
+                index,
+            )
+            return getattr(self, method)()
+        contigs = read_tabix_contigs(index)
+        logger.info(
+            "filtering %d contigs of %s in %d processes.",
+            len(contigs),
+            self.inputVcf,
+            threads,
+        )
+        with tempfile.TemporaryDirectory(
+            dir=self.outputDir or None
+        ) as shard_dir, ProcessPoolExecutor(threads) as pool:
+            futures = []
+            for i, shard in enumerate(contigs.items()):
+                os.mkdir(os.path.join(shard_dir, str(i)))
+                futures.append(
+                    pool.submit(
+                        _filter_shard,
+                        method,
+                        dict(
+                            inputVcf=self.inputVcf,
+                            outputDir=os.path.join(shard_dir, str(i)),
+                            sampleName=self.sampleName,
+                            minQual=self.minQual,
+                            totalDepth=self.totalDepth,
+                            alleleDepth=self.alleleDepth,
+                            variantFraction=self.variantFraction,
+                            tnRatio=self.tnRatio,
+                            filterGermline=self.filterGermline,
+                            backend=self.backend,
+                            shard=shard,
+                        ),
                     )
-                    txt_fh.write(out_line)
-        vcf_writer.close()
-        vcf_complex_writer.close()
-        txt_fh.close()
+                )
+            outputs = []
+            for contig, future in zip(contigs, futures):
+                shard_outputs, seconds = future.result()
+                logger.info("filtered contig %s in %.2fs.", contig, seconds)
+                outputs.append(shard_outputs)
+            contig_order = ContigOrder(self.vcf_reader.contigs)
+            self.vcf_out_order = OrderTracker(contig_order)
+            self.vcf_complex_out_order = OrderTracker(contig_order)
+            _concatenate_vcfs(
+                [vcf_out for vcf_out, _, _ in outputs], self.vcf_out, self.vcf_out_order
+            )
+            _concatenate_vcfs(
+                [vcf_complex_out for _, vcf_complex_out, _ in outputs],
+                self.vcf_complex_out,
+                self.vcf_complex_out_order,
+            )
+            with open(self.txt_out, "wb") as txt_fh:
+                for _, _, txt_out in outputs:
+                    with open(txt_out, "rb") as shard_txt:
+                        shutil.copyfileobj(shard_txt, txt_fh)
         return self.vcf_out, self.vcf_complex_out, self.txt_out
 
     def sort_vcf(self):
-        # Read the input VCF file
-        vcf_reader = vcf.Reader(open(self.vcf_out, "r"))
-        sorted_records = sorted(
-            vcf_reader, key=lambda record: (record.CHROM, record.POS)
+        """
+        @Description : The purpose of this function is to sort the filtered vcf by contig, in the order of the vcf header, and position.
+                        Memory is bounded by sorting in runs merged from disk, and records the filter already wrote in order are copied as they are.
+        -input: self
+        -ouput: self.vcf_out_sort
+        """
+        return sort_vcf_file(
+            self.vcf_out,
+            self.vcf_out_sort,
+            presorted=self.vcf_out_order is not None and self.vcf_out_order.sorted,
         )
-        # Write sorted records to the output VCF file
-        vcf_writer = vcf.Writer(open(self.vcf_out_sort, "w"), vcf_reader)
-        for record in sorted_records:
-            vcf_writer.write_record(record)
-        vcf_writer.close()
-        return self.vcf_out_sort
 
     def sort_vcf_complex(self):
-        # Read the input VCF file
-        vcf_reader = vcf.Reader(open(self.vcf_complex_out, "r"))
-        sorted_records = sorted(
-            vcf_reader, key=lambda record: (record.CHROM, record.POS)
+        """
+        @Description : The purpose of this function is to sort the filtered complex vcf, like sort_vcf
+        -input: self
+        -ouput: self.vcf_complex_out_sort
+        """
+        return sort_vcf_file(
+            self.vcf_complex_out,
+            self.vcf_complex_out_sort,
+            presorted=self.vcf_complex_out_order is not None
+            and self.vcf_complex_out_order.sorted,
         )
-        # Write sorted records to the output VCF file
-        vcf_writer = vcf.Writer(open(self.vcf_complex_out_sort, "w"), vcf_reader)
-        for record in sorted_records:
-            vcf_writer.write_record(record)
-        vcf_writer.close()
-        return self.vcf_complex_out_sort
+
+
+def _filter_shard(method, kwargs):
+    # runs in a worker process of var_sample.filter_by_contig
+    start = time.perf_counter()
+    shard = var_sample(**kwargs)
+    outputs = getattr(shard, method)()
+    return outputs, time.perf_counter() - start
+
+
+def _concatenate_vcfs(vcfs, output, order):
+    # the header of the first vcf, then the records of every vcf
+    with open_vcf_output(output) as output_fh:
+        for i, shard_vcf in enumerate(vcfs):
+            with open(shard_vcf) as shard_fh:
+                for line in shard_fh:
+                    if line.startswith("#"):
+                        if i == 0:
+                            output_fh.write(line)
+                        continue
+                    chrom, pos, _ = line.split("\t", 2)
+                    order.add(chrom, int(pos))
+                    output_fh.write(line)
@@ -15,6 +15,7 @@ from vcf.parser import (
     _vcf_metadata_parser as VcfMetadataParser,
 )
 from .vardict_class import var_sample
+from .reader_backends import check_backend
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -101,6 +102,24 @@ def filter(
     outputDir: str = typer.Option(
         "", "--outDir", "-o", help="Full Path to the output dir"
     ),
+    backend: str = typer.Option(
+        "auto",
+        "--backend",
+        help="Engine reading the vcf: cyvcf2 (htslib), pyvcf, or auto to use cyvcf2 when it is installed. The outputs are identical.",
+        callback=check_backend,
+    ),
+    compress: bool = typer.Option(
+        False,
+        "--compress",
+        help="Write bgzip compressed vcfs (.vcf.gz), with a tabix index (.tbi) for the sorted ones.",
+    ),
+    threads: int = typer.Option(
+        1,
+        "--threads",
+        "-t",
+        min=1,
+        help="Filter the contigs of a bgzip compressed, tabix indexed vcf in this many processes. The outputs are the same as with one.",
+    ),
 ):
     """
     This tool helps to filter vardict version 1.4.6 VCFs for single sample calling
@@ -118,6 +137,8 @@ def filter(
         variantFraction,
         tnRatio,
         filterGermline,
+        backend,
+        compress,
     )
 
     # check for normal
@@ -127,7 +148,9 @@ def filter(
         )
     else:
         # filter single
-        vcf_out, vcf_complex_out, txt_out = to_filter.filter_single()
+        vcf_out, vcf_complex_out, txt_out = to_filter.filter_by_contig(
+            "filter_single", threads
+        )
         vcf_out_sort = to_filter.sort_vcf()
         vcf_complex_out_sort = to_filter.sort_vcf_complex()
     return vcf_out_sort, vcf_complex_out_sort, txt_out
@@ -193,6 +216,24 @@ def filter(
     outputDir: str = typer.Option(
         "", "--outDir", "-o", help="Full Path to the output dir"
     ),
+    backend: str = typer.Option(
+        "auto",
+        "--backend",
+        help="Engine reading the vcf: cyvcf2 (htslib), pyvcf, or auto to use cyvcf2 when it is installed. The outputs are identical.",
+        callback=check_backend,
+    ),
+    compress: bool = typer.Option(
+        False,
+        "--compress",
+        help="Write bgzip compressed vcfs (.vcf.gz), with a tabix index (.tbi) for the sorted ones.",
+    ),
+    threads: int = typer.Option(
+        1,
+        "--threads",
+        "-t",
+        min=1,
+        help="Filter the contigs of a bgzip compressed, tabix indexed vcf in this many processes. The outputs are the same as with one.",
+    ),
 ):
     """
     This tool helps to filter vardict version 1.4.6 VCFs for case control calling
@@ -210,11 +251,15 @@ def filter(
         variantFraction,
         tnRatio,
         filterGermline,
+        backend,
+        compress,
     )
     # check for normal
     if to_filter.has_normal():
         # filter with normal
-        vcf_out, vcf_complex_out, txt_out = to_filter.filter_case_control()
+        vcf_out, vcf_complex_out, txt_out = to_filter.filter_by_contig(
+            "filter_case_control", threads
+        )
         vcf_out_sort = to_filter.sort_vcf()
         vcf_complex_out_sort = to_filter.sort_vcf_complex()
     else:
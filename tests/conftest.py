@@ -0,0 +1,8 @@
+import pytest  # type: ignore
+
+
+@pytest.fixture(autouse=True)
+def resource_cache_dir(tmp_path, monkeypatch):
+    # keep the cache of parsed reference resources out of the user cache directory
+    monkeypatch.setenv("PV_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
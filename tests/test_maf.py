@@ -1,8 +1,50 @@
 import pytest  # type: ignore
 import os
+import json
+import tracemalloc
 from typer.testing import CliRunner
 from pdb import set_trace as bp
 from postprocessing_variant_calls.main import app
+from postprocessing_variant_calls.maf.annotate.annotate_helpers import (
+    read_bed,
+    read_maf,
+)
+from postprocessing_variant_calls.maf.helper import (
+    read_delimited,
+    CommentFilter,
+    build_variant_id,
+    build_variant_key,
+    MAFFile,
+    _find_VAFandsummary,
+    stream_concat,
+    external_first_occurrence,
+    maf_duplicates,
+    CompiledRules,
+    RulesFile,
+    _tag_by_variant_annotations_iterrows,
+    HotspotIndex,
+    _tag_by_hotspots_dictreader,
+    write_maf,
+    apply_maf_schema,
+    MAF_FORMATS,
+)
+from postprocessing_variant_calls.maf.filter.filter_helpers import (
+    apply_filter_maf,
+    _apply_filter_maf_iterrows,
+    blocklist_keys,
+    extract_blocklist,
+    in_blocklist,
+    _pivot_table_summary_stats,
+    __generate_table_and_find_summary_stats as generate_summary_stats,
+)
+from postprocessing_variant_calls.cache.resource_cache import (
+    ResourceCache,
+    frame_to_arrays,
+    arrays_to_frame,
+)
+from utils.pybed_intersect import annotater, _naive_annotater
+import pandas as pd
+import numpy as np
 
 runner = CliRunner()
 maf_concat_files = [
@@ -33,10 +75,52 @@ maf_concat_paths = [
     ]
 ]
 
-maf_annotate_maf_by_bed = [["maf", "annotate", "mafbybed", "--help"]]
+maf_concat_streaming = [
+    [
+        "maf",
+        "concat",
+        "-f",
+        "tests/data/maf/subset/example_input.maf",
+        "-f",
+        "tests/data/maf/concat/maf1.maf",
+        "-f",
+        "tests/data/maf/subset/example_input.maf",
+        "-o",
+        "tests/data/maf/concat/output_maf.maf",
+        "--deduplicate",
+    ]
+]
 
 maf_annotate_maf_by_bed = [["maf", "annotate", "mafbybed", "--help"]]
 
+maf_annotate_maf_by_bed_files = [
+    [
+        "maf",
+        "annotate",
+        "mafbybed",
+        "-m",
+        "tests/data/maf/subset/example_input.maf",
+        "-b",
+        "tests/data/maf/annotate/example_targets.bed",
+        "-o",
+        "tests/data/maf/annotate/example_output.maf",
+        "-c",
+        "covered",
+    ]
+]
+
+maf_annotate_extract_blocklist = [
+    [
+        "maf",
+        "annotate",
+        "extract_blocklist",
+        "-b",
+        "tests/data/maf/filter/blocklist.tsv",
+        "-m",
+        "tests/data/maf/subset/example_input.maf",
+    ]
+]
+
 maf_subset = [
     [
         "maf",
@@ -98,6 +182,131 @@ def test_concat_paths(call):
     os.remove("tests/data/maf/concat/output_maf.maf")
 
 
+@pytest.mark.parametrize("call", maf_concat_files + maf_concat_streaming)
+def test_concat_streaming(call):
+    result = runner.invoke(app, call)
+    assert result.exit_code == 0
+    expected = pd.read_csv("tests/data/maf/concat/output_maf.maf", sep="\t")
+    result = runner.invoke(app, call + ["--streaming"])
+    assert result.exit_code == 0
+    streamed = pd.read_csv("tests/data/maf/concat/output_maf.maf", sep="\t")
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
+    os.remove("tests/data/maf/concat/output_maf.maf")
+
+
+def test_concat_streaming_csv(tmp_path):
+    call = [
+        "maf",
+        "concat",
+        "-f",
+        "tests/data/maf/concat/maf1.maf",
+        "-f",
+        "tests/data/maf/concat/maf2.maf",
+        "--format",
+        "csv",
+    ]
+    result = runner.invoke(app, call + ["-o", str(tmp_path / "in_memory.csv")])
+    assert result.exit_code == 0
+    result = runner.invoke(
+        app, call + ["-o", str(tmp_path / "streamed.csv"), "--streaming"]
+    )
+    assert result.exit_code == 0
+    assert "\t" not in (tmp_path / "streamed.csv").read_text()
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / "streamed.csv"),
+        pd.read_csv(tmp_path / "in_memory.csv"),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "output, option",
+    [
+        ("output.parquet", []),
+        ("output.feather", []),
+        ("output.maf", ["--format", "parquet"]),
+    ],
+)
+def test_concat_streaming_columnar_output(tmp_path, output, option):
+    result = runner.invoke(
+        app,
+        [
+            "maf",
+            "concat",
+            "-f",
+            "tests/data/maf/concat/maf1.maf",
+            "-f",
+            "tests/data/maf/concat/maf2.maf",
+            "-o",
+            str(tmp_path / output),
+            "--streaming",
+        ]
+        + option,
+    )
+    assert result.exit_code != 0
+    assert "--streaming writes delimited text" in result.stdout
+    assert not (tmp_path / output).exists()
+
+
+@pytest.mark.parametrize("call", maf_concat_paths + maf_concat_streaming)
+def test_concat_workers(call):
+    result = runner.invoke(app, call)
+    assert result.exit_code == 0
+    with open("tests/data/maf/concat/output_maf.maf") as handle:
+        expected = handle.read()
+    result = runner.invoke(app, call + ["--workers", "2"])
+    assert result.exit_code == 0
+    with open("tests/data/maf/concat/output_maf.maf") as handle:
+        assert handle.read() == expected
+    os.remove("tests/data/maf/concat/output_maf.maf")
+
+
+def test_external_first_occurrence(tmp_path):
+    keys = np.random.default_rng(0).integers(0, 500, 5000).astype(np.uint64)
+    chunks = np.array_split(keys, 7)
+    with external_first_occurrence(chunks, n_partitions=5, tmp_dir=tmp_path) as first:
+        first = np.array(first)
+    assert (first == ~pd.Series(keys).duplicated().to_numpy()).all()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stream_concat_deduplicate(tmp_path):
+    files = [
+        "tests/data/maf/subset/example_input.maf",
+        "tests/data/maf/concat/maf1.maf",
+        "tests/data/maf/subset/example_input.maf",
+    ]
+    n_rows = stream_concat(
+        files, tmp_path / "streamed.maf", "\t", deduplicate=True, chunksize=300
+    )
+    streamed = read_delimited(
+        tmp_path / "streamed.maf", dtype=str, keep_default_na=False
+    )
+    concat_df = pd.concat(
+        [read_delimited(maf, dtype=str, keep_default_na=False) for maf in files],
+        ignore_index=True,
+    ).fillna("")
+    expected = maf_duplicates(concat_df)
+    assert len(expected) < len(concat_df)
+    assert n_rows == len(expected)
+    pd.testing.assert_frame_equal(
+        streamed[expected.columns],
+        expected.reset_index(drop=True),
+    )
+
+
+def test_stream_concat_memory(tmp_path):
+    # peak memory depends on the chunk size, not on the number of files
+    peaks = []
+    for n_files in [2, 8]:
+        files = ["tests/data/maf/subset/example_input.maf"] * n_files
+        tracemalloc.start()
+        stream_concat(files, tmp_path / "streamed.maf", "\t", chunksize=500)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < 1.5 * peaks[0]
+
+
 @pytest.mark.parametrize("call", maf_subset)
 def test_concat_files(call):
     result = runner.invoke(app, call)
@@ -115,13 +324,686 @@ def test_annotate_mafbybed(call):
     assert result.exit_code == 0
 
 
+@pytest.mark.parametrize("call", maf_annotate_maf_by_bed_files)
+def test_annotate_mafbybed_files(call):
+    result = runner.invoke(app, call)
+    assert result.exit_code == 0
+    output = pd.read_csv("tests/data/maf/annotate/example_output.maf", sep="\t")
+    assert set(output["covered"]) == {"yes", "no"}
+    os.remove("tests/data/maf/annotate/example_output.maf")
+
+
+@pytest.mark.parametrize("call", maf_annotate_extract_blocklist)
+def test_annotate_extract_blocklist(call):
+    result = runner.invoke(app, call)
+    assert result.exit_code == 0
+    assert "29 of 3254 variants found in the blocklist." in result.stdout
+
+
+def test_extract_blocklist():
+    blocklist = extract_blocklist("tests/data/maf/filter/blocklist.tsv", "\t")
+    assert len(blocklist) == 4
+    assert ("17", "7577018", "7577018", "C", "T") in blocklist
+    maf_df = read_delimited("tests/data/maf/subset/example_input.maf")
+    assert in_blocklist(maf_df, blocklist).sum() == 29
+    assert len(extract_blocklist(None, "\t")) == 0
+
+
+def test_annotater_matches_naive():
+    maf_df = read_maf("tests/data/maf/subset/example_input.maf")
+    bed_df = read_bed("tests/data/maf/annotate/example_targets.bed")
+    # the nested loop annotater needs every maf chromosome in the bed
+    maf_df = maf_df[maf_df["Chromosome"].isin(bed_df["Chromosome"])]
+    key = [
+        "Chromosome",
+        "Start_Position",
+        "End_Position",
+        "Reference_Allele",
+        "Tumor_Seq_Allele1",
+        "Tumor_Seq_Allele2",
+        "covered",
+    ]
+    indexed = annotater(maf_df, bed_df, "covered")[key].drop_duplicates()
+    naive = _naive_annotater(maf_df, bed_df, "covered")[key].drop_duplicates()
+    pd.testing.assert_frame_equal(
+        indexed.sort_values(key).reset_index(drop=True),
+        naive.sort_values(key).reset_index(drop=True),
+    )
+
+
 @pytest.mark.parametrize("call", maf_tag)
 def test_maf_tag(call):
     result = runner.invoke(app, call)
     assert result.exit_code == 0
 
 
+def test_tag_by_variant_classification(tmp_path):
+    # expected outputs were written by the per row implementation
+    result = runner.invoke(
+        app,
+        [
+            "maf",
+            "tag",
+            "by_variant_classification",
+            "-m",
+            "tests/data/maf/tag/by_variant_classification.maf",
+            "-tx_ref",
+            "tests/data/maf/tag/canonical_tx_ref.tsv",
+            "-o",
+            str(tmp_path),
+        ],
+    )
+    assert result.exit_code == 0
+    for expected in os.listdir("tests/data/maf/tag/expected"):
+        with open(tmp_path / expected) as output, open(
+            os.path.join("tests/data/maf/tag/expected", expected)
+        ) as reference:
+            assert output.read() == reference.read()
+
+
+def test_tag_by_rules(tmp_path):
+    result = runner.invoke(
+        app,
+        [
+            "maf",
+            "tag",
+            "by_rules",
+            "-m",
+            "tests/data/maf/tag/by_variant_classification.maf",
+            "-r",
+            "tests/data/maf/tag/by_rules/example_rules.json",
+            "-o",
+            str(tmp_path / "tagged.maf"),
+        ],
+    )
+    assert result.exit_code == 0
+    tagged = pd.read_csv(tmp_path / "tagged.maf", sep="\t")
+    assert (tagged["is_TERT_variant"] == "Yes").sum() == 4
+
+
+def test_compiled_rules_match_iterrows():
+    maf = read_delimited("tests/data/maf/tag/by_variant_classification.maf")
+    rng = np.random.default_rng(1)
+    genes = ["TP53", "KRAS", "EGFR", "MET", "TERT", "BRCA2"]
+    classes = ["Missense_Mutation", "Silent", "Intron", "5'Flank", "3'UTR"]
+    rules = []
+    for i in range(40):
+        rules.append(
+            {
+                # repeated names, the last rule sets the column
+                "Tag_Column_Name": f"rule{i % 30}",
+                "Hugo_Symbol": list(rng.choice(genes, 2)) if i % 4 else "none",
+                "Variant_Classification": (
+                    list(rng.choice(classes, 2)) if i % 3 else "none"
+                ),
+                "Start_Position": (
+                    int(rng.integers(1e6, 7e7)) if i % 5 == 0 or i % 12 == 0 else "none"
+                ),
+                "End_Position": int(rng.integers(7e7, 14e7)) if i % 7 == 0 else "none",
+            }
+        )
+    rules_df = pd.DataFrame(rules)
+    compiled = CompiledRules(rules_df).evaluate(maf)
+    reference = _tag_by_variant_annotations_iterrows(maf.copy(), rules_df)
+    assert list(compiled.columns) == [f"is_rule{i}_variant" for i in range(30)]
+    assert (compiled == "Yes").any().any()
+    pd.testing.assert_frame_equal(compiled, reference[compiled.columns])
+
+
+def test_compiled_rules_missing_bounds(tmp_path):
+    maf = read_delimited("tests/data/maf/tag/by_variant_classification.maf")
+    # variants ending before they start, or missing a position
+    maf.loc[maf.index[0], "End_Position"] = maf["Start_Position"].iloc[0] - 10
+    maf.loc[maf.index[1], "Start_Position"] = np.nan
+    rules = [
+        {"Tag_Column_Name": "open", "Hugo_Symbol": "", "Variant_Classification": ""},
+        {
+            "Tag_Column_Name": "no_end",
+            "Hugo_Symbol": "",
+            "Variant_Classification": "",
+            "Start_Position": "",
+        },
+        {
+            "Tag_Column_Name": "gene",
+            "Hugo_Symbol": "TP53",
+            "Variant_Classification": "",
+            "End_Position": 1e9,
+        },
+        {
+            "Tag_Column_Name": "window",
+            "Hugo_Symbol": "",
+            "Variant_Classification": "",
+            "Start_Position": 1,
+            "End_Position": 1e9,
+        },
+        {
+            "Tag_Column_Name": "below",
+            "Hugo_Symbol": "",
+            "Variant_Classification": "",
+            "Start_Position": "",
+            "End_Position": int(maf["Start_Position"].iloc[0]),
+        },
+    ]
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps(rules))
+    rules_df = RulesFile(str(rules_file)).data_frame
+    compiled = CompiledRules(rules_df).evaluate(maf)
+    reference = _tag_by_variant_annotations_iterrows(maf.copy(), rules_df)
+    pd.testing.assert_frame_equal(compiled, reference[compiled.columns])
+    # a rule missing a bound key never matches, "" leaves it unconstrained
+    assert (compiled["is_open_variant"] == "No").all()
+    assert (compiled["is_no_end_variant"] == "No").all()
+    assert (compiled["is_gene_variant"] == "No").all()
+    assert (compiled["is_window_variant"] == "Yes").sum() == len(maf) - 1
+    assert compiled["is_below_variant"].iloc[0] == "Yes"
+
+
+def test_tag_hotspots(tmp_path):
+    call = [
+        "maf",
+        "tag",
+        "hotspots",
+        "-m",
+        "tests/data/maf/tag/by_variant_classification.maf",
+        "-h",
+        "tests/data/maf/tag/hotspots.txt",
+        "--hotspots-index",
+        str(tmp_path / "hotspots.idx"),
+        "-o",
+        str(tmp_path / "tagged.maf"),
+    ]
+    # the second run reads the index saved by the first
+    for _ in range(2):
+        result = runner.invoke(app, call)
+        assert result.exit_code == 0
+        tagged = pd.read_csv(tmp_path / "tagged.maf", sep="\t")
+        reference = _tag_by_hotspots_dictreader(
+            read_delimited("tests/data/maf/tag/by_variant_classification.maf"),
+            "tests/data/maf/tag/hotspots.txt",
+        )
+        assert (tagged["hotspot_whitelist"] == "Yes").sum() == 25
+        assert (tagged["hotspot_whitelist"] == reference["hotspot_whitelist"]).all()
+
+
+def test_hotspot_index_rebuilt_when_stale(tmp_path):
+    hotspots = tmp_path / "hotspots.txt"
+    index_file = tmp_path / "hotspots.idx"
+    hotspots.write_text(
+        "Chromosome\tStart_Position\tReference_Allele\tTumor_Seq_Allele2\n7\t100\tA\tT\n"
+    )
+    assert len(HotspotIndex.load(hotspots, index_file).keys) == 1
+    with open(hotspots, "a") as handle:
+        handle.write("7\t200\tC\tG\n")
+    index = HotspotIndex.load(hotspots, index_file)
+    assert len(index.keys) == 2
+    maf = pd.DataFrame(
+        {
+            "Chromosome": [7, 7, 8],
+            "Start_Position": [200.0, 300.0, 100.0],
+            "Reference_Allele": ["C", "A", "A"],
+            "Tumor_Seq_Allele2": ["G", "T", "T"],
+        }
+    )
+    assert index.contains(maf).tolist() == [True, False, False]
+    # an edit keeping the size and modification time is still seen
+    stat = os.stat(hotspots)
+    hotspots.write_text(hotspots.read_text().replace("7\t200\tC\tG", "7\t300\tA\tT"))
+    os.utime(hotspots, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    index = HotspotIndex.load(hotspots, index_file)
+    assert index.contains(maf).tolist() == [False, True, False]
+    # touching the file keeps the saved index
+    saved = os.stat(index_file).st_mtime_ns
+    os.utime(hotspots)
+    HotspotIndex.load(hotspots, index_file)
+    assert os.stat(index_file).st_mtime_ns == saved
+
+
+def test_resource_cache(tmp_path):
+    source = tmp_path / "resource.tsv"
+    source.write_text("a\tb\n1\tx\n2\t\n")
+    builds = []
+
+    def build():
+        builds.append(source.read_text())
+        return read_delimited(source)
+
+    cache = ResourceCache(tmp_path / "cache", max_bytes=10**6)
+    first = cache.fetch("table", source, build, frame_to_arrays, arrays_to_frame)
+    second = cache.fetch("table", source, build, frame_to_arrays, arrays_to_frame)
+    assert len(builds) == 1
+    pd.testing.assert_frame_equal(first, second)
+    # an edited resource gets a new key instead of the stale entry
+    source.write_text("a\tb\n3\ty\n")
+    third = cache.fetch("table", source, build, frame_to_arrays, arrays_to_frame)
+    assert len(builds) == 2
+    assert third["a"].tolist() == [3]
+    assert len(cache.entries()) == 2
+
+
+def test_resource_cache_evicts_least_recently_used(tmp_path):
+    cache = ResourceCache(tmp_path / "cache", max_bytes=10**6)
+    sources = [tmp_path / f"resource{i}.txt" for i in range(3)]
+    builds = []
+
+    def fetch(source):
+        # each entry is a little over 400 kB, so only two fit under the cap
+        return cache.fetch(
+            "keys",
+            source,
+            lambda: builds.append(source) or np.arange(50_000),
+            lambda keys: {"keys": keys},
+            lambda arrays: arrays["keys"],
+        )
+
+    for i, source in enumerate(sources):
+        source.write_text(str(i))
+    for i, source in enumerate(sources[:2]):
+        fetch(source)
+        os.utime(cache.entries()[-1][0], (i, i))
+    # reading the first entry makes the second one the least recently used
+    fetch(sources[0])
+    fetch(sources[2])
+    assert len(cache.entries()) == 2
+    assert cache.size() <= cache.max_bytes
+    builds.clear()
+    fetch(sources[0])
+    fetch(sources[1])
+    assert builds == [sources[1]]
+
+
+def test_cached_reference_resources(resource_cache_dir):
+    blocklist = "tests/data/maf/filter/blocklist.tsv"
+    bed = "tests/data/maf/annotate/example_targets.bed"
+    parsed = extract_blocklist(blocklist, "\t"), read_bed(bed)
+    cached = extract_blocklist(blocklist, "\t"), read_bed(bed)
+    assert sorted(path.name.split("-")[0] for path in resource_cache_dir.iterdir()) == [
+        "bed",
+        "blocklist",
+    ]
+    pd.testing.assert_index_equal(cached[0], parsed[0])
+    pd.testing.assert_frame_equal(cached[1], parsed[1])
+
+
+def test_cache_cli(resource_cache_dir):
+    HotspotIndex.load("tests/data/maf/tag/hotspots.txt")
+    result = runner.invoke(app, ["cache", "info"])
+    assert result.exit_code == 0
+    assert "1 entries" in result.stdout
+    assert "hotspots-" in result.stdout
+    result = runner.invoke(app, ["cache", "clear", "--kind", "bed"])
+    assert "Removed 0 cache entries." in result.stdout
+    result = runner.invoke(app, ["cache", "clear"])
+    assert "Removed 1 cache entries." in result.stdout
+    assert not list(resource_cache_dir.iterdir())
+
+
 @pytest.mark.parametrize("call", maf_filter)
 def test_maf_filter(call):
     result = runner.invoke(app, call)
     assert result.exit_code == 0
+
+
+def test_access_filters(tmp_path):
+    # expected outputs were written before the maf schema was introduced
+    data = "tests/data/maf/filter/access_filters"
+    result = runner.invoke(
+        app,
+        [
+            "maf",
+            "filter",
+            "access_filters",
+            "-f",
+            f"{data}/fillout.maf",
+            "-a",
+            f"{data}/anno.maf",
+            "-bl",
+            "tests/data/maf/filter/blocklist.tsv",
+            "-ts",
+            "T1",
+            "-ns",
+            "N1",
+            "-o",
+            str(tmp_path / "output"),
+        ],
+    )
+    assert result.exit_code == 0
+    for expected in os.listdir(f"{data}/expected"):
+        with open(tmp_path / expected) as output, open(
+            os.path.join(f"{data}/expected", expected)
+        ) as reference:
+            assert output.read() == reference.read()
+
+
+def test_tag_output_format(tmp_path):
+    maf = "tests/data/maf/tag/by_variant_classification.maf"
+    call = ["maf", "tag", "common_variant", "-m", maf, "--format", "csv"]
+    result = runner.invoke(app, call + ["-o", str(tmp_path / "tagged.maf")])
+    assert result.exit_code == 0
+    tagged = pd.read_csv(tmp_path / "tagged.maf")
+    assert len(tagged) == len(read_delimited(maf))
+    result = runner.invoke(app, call[:-1] + ["orc", "-o", str(tmp_path / "x.maf")])
+    assert result.exit_code != 0
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_columnar_round_trip(tmp_path, extension):
+    pytest.importorskip("pyarrow")
+    maf = "tests/data/maf/tag/by_variant_classification.maf"
+    tagged = tmp_path / f"tagged{extension}"
+    result = runner.invoke(
+        app, ["maf", "tag", "common_variant", "-m", maf, "-o", str(tagged)]
+    )
+    assert result.exit_code == 0
+    # the next step reads the columnar output back without parsing text
+    concat = tmp_path / f"concat{extension}"
+    result = runner.invoke(
+        app, ["maf", "concat", "-f", str(tagged), "-f", str(tagged), "-o", str(concat)]
+    )
+    assert result.exit_code == 0
+    assert len(MAFFile(concat, "\t").data_frame) == 2 * len(read_delimited(maf))
+    written = MAFFile(tagged, "\t").data_frame
+    expected = MAFFile(maf, "\t").tag("common_variant").reset_index(drop=True)
+    pd.testing.assert_frame_equal(written, expected)
+    write_maf(written, tmp_path / f"again{extension}")
+    pd.testing.assert_frame_equal(
+        MAFFile(tmp_path / f"again{extension}", "\t").data_frame, written
+    )
+
+
+def test_columnar_requires_pyarrow(tmp_path):
+    try:
+        import pyarrow  # noqa: F401
+
+        pytest.skip("pyarrow is installed")
+    except ImportError:
+        pass
+    result = runner.invoke(
+        app,
+        [
+            "maf",
+            "tag",
+            "common_variant",
+            "-m",
+            "tests/data/maf/tag/by_variant_classification.maf",
+            "-o",
+            str(tmp_path / "tagged.parquet"),
+        ],
+    )
+    assert result.exit_code != 0
+    assert "requires pyarrow" in result.stdout
+
+
+def test_maf_schema(tmp_path):
+    maf = tmp_path / "schema.maf"
+    pd.DataFrame(
+        {
+            "Hugo_Symbol": ["TP53", "KRAS", "TP53"],
+            "Chromosome": ["17", "12", "X"],
+            "Start_Position": [7577018, 25398284, 100],
+            "End_Position": [7577018, 25398284, 100],
+            "Reference_Allele": ["C", "C", "A"],
+            "Tumor_Seq_Allele2": ["T", "-", "G"],
+            "t_alt_count": [5, 10, 2],
+            "t_depth": [100.0, None, 50.0],
+            "CallMethod": ["MuTect", "VarDict", "MuTect"],
+        }
+    ).to_csv(maf, sep="\t", index=False)
+    df = MAFFile(maf, "\t").data_frame
+    assert df["Hugo_Symbol"].dtype == "category"
+    assert df["CallMethod"].dtype == object
+    assert df["t_alt_count"].dtype == np.int32
+    # incomplete counts keep the dtype they were read with
+    assert df["t_depth"].dtype == np.float64
+    assert df["id"].tolist() == [
+        "17_7577018_7577018_C_T",
+        "12_25398284_25398284_C_",
+        "X_100_100_A_G",
+    ]
+    # the casts do not change the text written back out
+    write_maf(df.drop(columns="id"), tmp_path / "written.maf")
+    assert (tmp_path / "written.maf").read_text() == maf.read_text()
+    # counts beyond int32 keep the dtype they were read with
+    inferred = read_delimited(maf)
+    inferred.loc[0, "t_alt_count"] = 2**31
+    cast = apply_maf_schema(inferred)
+    assert cast["Hugo_Symbol"].dtype == "category"
+    assert cast["t_alt_count"].dtype == np.int64
+
+
+@pytest.mark.parametrize("maf_format", ["tsv", "csv"])
+@pytest.mark.parametrize("chunksize", [None, 7])
+def test_projection_filter(tmp_path, chunksize, maf_format):
+    maf = tmp_path / "complexity.maf"
+    df = read_delimited("tests/data/maf/tag/by_variant_classification.maf")
+    df["complexity"] = np.where(np.arange(len(df)) % 3 == 0, "yes", "no")
+    df.to_csv(maf, sep="\t", index=False)
+    full = MAFFile(maf, "\t")
+    full.write(full.filter("not_complex"), tmp_path / "full.maf", maf_format)
+    projected = MAFFile(maf, "\t", projection="not_complex", chunksize=chunksize)
+    if chunksize is None:
+        assert len(projected.data_frame.columns) == 7
+    projected.run("filter", "not_complex", tmp_path / "projected.maf", maf_format)
+    assert (tmp_path / "projected.maf").read_text() == (
+        tmp_path / "full.maf"
+    ).read_text()
+    assert (
+        len(read_delimited(tmp_path / "projected.maf", MAF_FORMATS[maf_format]))
+        == (df["complexity"] == "no").sum()
+    )
+
+
+@pytest.mark.parametrize("option", [["--projection"], ["--chunksize", "10"]])
+def test_projection_tag_cli(tmp_path, option):
+    maf = "tests/data/maf/tag/by_variant_classification.maf"
+    call = ["maf", "tag", "common_variant", "-m", maf] + option
+    result = runner.invoke(app, call + ["-o", str(tmp_path / "projected.maf")])
+    assert result.exit_code == 0
+    full = MAFFile(maf, "\t")
+    full.write(full.tag("common_variant"), tmp_path / "full.maf")
+    assert (tmp_path / "projected.maf").read_text() == (
+        tmp_path / "full.maf"
+    ).read_text()
+
+
+def _cmo_ch_maf(path):
+    # a maf with every column the cmo_ch tags and filters read
+    df = read_delimited("tests/data/maf/tag/by_variant_classification.maf")
+    rows = np.arange(len(df))
+    df["t_alt_count"] = rows % 9
+    df["t_depth"] = rows % 9 + 10
+    df["CNT"] = [f"{row % 7},1" if row % 4 else "" for row in rows]
+    df["Consequence"] = np.where(rows % 5 == 0, "stop_gained", "missense_variant")
+    df["hotspot"] = np.where(rows % 2 == 0, "yes", "no")
+    df["common_variant"] = np.where(rows % 6 == 0, "yes", "no")
+    df["complexity"] = np.where(rows % 7 == 0, "yes", "no")
+    df["mappability"] = np.where(rows % 8 == 0, "yes", "no")
+    df.to_csv(path, sep="\t", index=False)
+    return path
+
+
+@pytest.mark.parametrize("option", [["--projection"], ["--chunksize", "50"]])
+@pytest.mark.parametrize(
+    "command",
+    [
+        ["filter", "hotspot"],
+        ["filter", "non_hotspot"],
+        ["filter", "not_complex"],
+        ["filter", "mappable"],
+        ["filter", "non_common_variant"],
+        ["filter", "cmo_ch"],
+        ["tag", "germline_status"],
+        ["tag", "common_variant"],
+        ["tag", "prevalence_in_cosmicDB"],
+        ["tag", "truncating_mut_in_TSG"],
+        ["tag", "cmo_ch"],
+    ],
+)
+@pytest.mark.parametrize("maf_format", ["tsv", "csv"])
+def test_projection_commands(tmp_path, command, option, maf_format):
+    # every projected command reads all the columns its tag or filter uses
+    maf = _cmo_ch_maf(tmp_path / "cmo_ch.maf")
+    call = ["maf"] + command + ["-m", str(maf), "--format", maf_format]
+    result = runner.invoke(app, call + ["-o", str(tmp_path / "full.maf")])
+    assert result.exit_code == 0
+    result = runner.invoke(app, call + option + ["-o", str(tmp_path / "projected.maf")])
+    assert result.exit_code == 0
+    assert (tmp_path / "projected.maf").read_text() == (
+        tmp_path / "full.maf"
+    ).read_text()
+
+
+@pytest.mark.parametrize("missing_row", [10, 110])
+def test_chunked_dtypes_match_whole_maf(tmp_path, missing_row):
+    # a missing count in only one chunk makes the column float in every chunk
+    maf = _cmo_ch_maf(tmp_path / "cmo_ch.maf")
+    df = read_delimited(maf)
+    df["t_alt_count"] = df["t_alt_count"].astype(object)
+    df.loc[missing_row, "t_alt_count"] = ""
+    df.to_csv(maf, sep="\t", index=False)
+    call = ["maf", "tag", "germline_status", "-m", str(maf)]
+    result = runner.invoke(app, call + ["-o", str(tmp_path / "full.maf")])
+    assert result.exit_code == 0
+    result = runner.invoke(
+        app, call + ["--chunksize", "50", "-o", str(tmp_path / "chunked.maf")]
+    )
+    assert result.exit_code == 0
+    assert (tmp_path / "chunked.maf").read_text() == (tmp_path / "full.maf").read_text()
+    counts = read_delimited(tmp_path / "chunked.maf", dtype=str)["t_alt_count"]
+    assert counts.dropna().str.endswith(".0").all()
+
+
+def test_read_delimited_skips_comments(tmp_path):
+    maf = tmp_path / "comments.maf"
+    maf.write_text(
+        "#version 2.4\n#comment\nHugo_Symbol\tChromosome\nTP53\t17\n#inline\nKRAS\t12"
+    )
+    df = read_delimited(maf)
+    assert list(df.columns) == ["Hugo_Symbol", "Chromosome"]
+    assert df["Hugo_Symbol"].tolist() == ["TP53", "KRAS"]
+    with open(maf, "rb") as handle:
+        stream = CommentFilter(handle, chunk_size=3)
+        assert stream.read() == b"Hugo_Symbol\tChromosome\nTP53\t17\nKRAS\t12"
+
+
+def test_build_variant_id_matches_rowwise():
+    cols = [
+        "Chromosome",
+        "Start_Position",
+        "End_Position",
+        "Reference_Allele",
+        "Tumor_Seq_Allele2",
+    ]
+    maf_df = read_delimited("tests/data/maf/subset/example_input.maf")
+    rowwise = maf_df[cols].apply(
+        lambda x: "_".join(x.replace("-", "").astype(str)), axis=1
+    )
+    ids = build_variant_id(maf_df, cols)
+    assert ids.tolist() == rowwise.tolist()
+    keys = build_variant_key(maf_df, cols)
+    assert keys.dtype == "uint64"
+    assert keys.nunique() == ids.nunique()
+
+
+@pytest.mark.parametrize("matched", [True, False])
+def test_apply_filter_maf_matches_iterrows(matched):
+    pre_filter_maf = read_delimited("tests/data/maf/filter/pre_filter.tsv")
+    if not matched:
+        pre_filter_maf = pre_filter_maf.drop(
+            columns=[
+                "Matched_Norm_Sample_Barcode",
+                "n_alt_count_fragment",
+                "n_ref_count_fragment",
+                "n_vaf_fragment",
+            ]
+        )
+    args = {
+        "tumor_TD_min": 20,
+        "normal_TD_min": 20,
+        "tumor_vaf_germline_thres": 0.4,
+        "normal_vaf_germline_thres": 0.4,
+        "tier_one_alt_min": 3,
+        "tier_two_alt_min": 5,
+        "min_n_curated_samples_alt_detected": 2,
+        "tn_ratio_thres": 5,
+        "blocklist": blocklist_keys(pre_filter_maf.iloc[::7]),
+    }
+    vectorized = apply_filter_maf(pre_filter_maf, **args)
+    rowwise = _apply_filter_maf_iterrows(pre_filter_maf, **args)
+    assert vectorized.to_csv(sep="\t", index=False) == rowwise.to_csv(
+        sep="\t", index=False
+    )
+    assert vectorized["Status"].str.contains("InBlacklist").any()
+
+
+@pytest.mark.parametrize(
+    "fillout_type,suffix",
+    [("CURATED", "_duplex"), ("CURATED", "_simplex_duplex"), ("NORMAL", "_standard")],
+)
+def test_fillout_summary_matches_pivot_table(fillout_type, suffix):
+    fillout = MAFFile("tests/data/maf/filter/fillout.maf", "\t")
+    df_fillout = fillout.data_frame
+    if fillout_type == "NORMAL":
+        df_fillout = df_fillout[df_fillout["fillout_type"].str.endswith("NORMAL")]
+    else:
+        df_fillout = df_fillout[df_fillout["fillout_type"] == fillout_type]
+    df_fillout = _find_VAFandsummary(df_fillout, suffix[1:])
+    args = (df_fillout, fillout.cols["general"], 3, fillout_type + "_", suffix)
+    summary_table = generate_summary_stats(*args)
+    pd.testing.assert_frame_equal(summary_table, _pivot_table_summary_stats(*args))
+
+
+def test_find_VAFandsummary_memory():
+    # a large fillout, summaries must be added without copying the frame
+    fillout = read_delimited("tests/data/maf/filter/fillout.maf")
+    fillout = fillout[fillout["fillout_type"] == "CURATED"]
+    fillout = pd.concat([fillout] * 250, ignore_index=True)
+    fillout_before = fillout.copy()
+    frame_bytes = fillout.memory_usage(deep=True).sum()
+    sample_groups = ["simplex", "duplex", "simplex_duplex"]
+    tracemalloc.start()
+    summarized = _find_VAFandsummary(fillout, sample_groups)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < frame_bytes
+    pd.testing.assert_frame_equal(fillout, fillout_before)
+    expected = (
+        "DP="
+        + (
+            fillout["t_alt_count_fragment_duplex"].astype(int)
+            + fillout["t_ref_count_fragment_duplex"].astype(int)
+        ).astype(str)
+        + ";RD="
+        + fillout["t_ref_count_fragment_duplex"].astype(str)
+        + ";AD="
+        + fillout["t_alt_count_fragment_duplex"].astype(str)
+        + ";VF="
+        + fillout["t_vaf_fragment_duplex"].fillna(0).astype(str)
+    )
+    assert summarized["summary_fragment_duplex"].tolist() == expected.tolist()
+
+
+def test_extract_fillout_type_partition():
+    fillout = MAFFile("tests/data/maf/filter/fillout.maf", "\t")
+    df_fillout = fillout.data_frame
+    (
+        df_curated,
+        df_plasma,
+        df_tumor,
+        df_matched_normal,
+        df_normals,
+        df_control,
+    ) = fillout.extract_fillout_type()
+    for df, fillout_types in [
+        (df_curated, ["CURATED"]),
+        (df_plasma, ["PLASMA"]),
+        (df_tumor, ["CASE"]),
+        (df_control, ["CONTROL"]),
+        (df_normals, ["MATCHED_NORMAL", "UNMATCHED_NORMAL"]),
+    ]:
+        expected = df_fillout[df_fillout["fillout_type"].isin(fillout_types)]
+        assert df.index.equals(expected.index)
+        pd.testing.assert_frame_equal(df[expected.columns], expected)
+    matched = df_fillout[df_fillout["fillout_type"] == "MATCHED_NORMAL"]
+    pd.testing.assert_frame_equal(
+        df_matched_normal, _find_VAFandsummary(matched, "standard")
+    )
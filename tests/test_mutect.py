@@ -1,8 +1,11 @@
 import pytest  # type: ignore
 import os
+import gzip
+import shutil
 from typer.testing import CliRunner
 from pdb import set_trace as bp
 from postprocessing_variant_calls.main import app
+from utils.vcf_io import iter_vcf_contig, read_tabix_contigs
 
 runner = CliRunner()
 
@@ -22,3 +25,62 @@ def test_mutect1_filter(call):
 def test_mutect2_filter(call):
     result = runner.invoke(app, call)
     assert result.exit_code == 0
+
+
+@pytest.mark.parametrize("caller", ["mutect1", "mutect2"])
+def test_compressed_vcfs(caller, tmp_path):
+    # a gzipped input is read transparently and --compress writes the same vcf bgzipped
+    input_vcf = tmp_path / "case_control_test.vcf.gz"
+    with open("tests/data/mutect/case_control_test.vcf", "rb") as plain:
+        with gzip.open(input_vcf, "wb") as compressed:
+            shutil.copyfileobj(plain, compressed)
+    plain_dir = tmp_path / "plain"
+    compressed_dir = tmp_path / "compressed"
+    plain_dir.mkdir()
+    compressed_dir.mkdir()
+    call = [
+        caller,
+        "case-control",
+        "filter",
+        "--inputTxt",
+        "tests/data/mutect/case_control_test.txt",
+        "--refFasta",
+        "tests/data/mutect/ref.fasta",
+        "--tsampleName",
+        "C-TUMOR-T01",
+    ]
+    result = runner.invoke(
+        app,
+        call
+        + [
+            "--inputVcf",
+            "tests/data/mutect/case_control_test.vcf",
+            "-o",
+            str(plain_dir),
+        ],
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(
+        app,
+        call + ["--inputVcf", str(input_vcf), "-o", str(compressed_dir), "--compress"],
+    )
+    assert result.exit_code == 0
+
+    plain_vcf = (plain_dir / "case_control_test_filtered.vcf").read_text()
+    records = [line for line in plain_vcf.splitlines(True) if line[0] != "#"]
+    assert len(records) > 0
+    compressed_vcf = compressed_dir / "case_control_test_filtered.vcf.gz"
+    with gzip.open(compressed_vcf, "rt") as compressed:
+        assert compressed.read() == plain_vcf
+    # the index finds every contig of the output, and where its records start
+    contigs = read_tabix_contigs(f"{compressed_vcf}.tbi")
+    assert list(contigs) == list(dict.fromkeys(line.split("\t")[0] for line in records))
+    for contig, start in contigs.items():
+        lines = list(iter_vcf_contig(compressed_vcf, contig, start))
+        assert [line for line in lines if line[0] != "#"] == [
+            line for line in records if line.startswith(f"{contig}\t")
+        ]
+    if caller == "mutect1":
+        assert (compressed_dir / "case_control_test_filtered.txt").read_bytes() == (
+            plain_dir / "case_control_test_filtered.txt"
+        ).read_bytes()
@@ -1,8 +1,15 @@
 import pytest  # type: ignore
+import io
 import os
+import gzip
+import shutil
+import vcf
 from typer.testing import CliRunner
 from pdb import set_trace as bp
 from postprocessing_variant_calls.main import app
+from postprocessing_variant_calls.vardict.vardict_class import var_sample
+from postprocessing_variant_calls.vardict.filter_outputs import FilterOutputs
+from utils.vcf_io import BgzfWriter, karyotypic_key, sort_vcf_file
 
 runner = CliRunner()
 vardict_single_calls = [
@@ -74,3 +81,178 @@ def test_two(call):
     os.remove("tests/data/vardict/two/case_control_test_STDfilter_complex.vcf")
     os.remove("tests/data/vardict/two/case_control_test_STDfilter.vcf")
     os.remove("tests/data/vardict/two/case_control_test_STDfilter.txt")
+
+
+@pytest.mark.parametrize("call", vardict_single_calls + vardict_matched)
+def test_reader_backends_identical(call, tmp_path):
+    pytest.importorskip("cyvcf2")
+    outputs = {}
+    for backend in ["pyvcf", "cyvcf2"]:
+        output_dir = tmp_path / backend
+        output_dir.mkdir()
+        result = runner.invoke(app, call[:-1] + [str(output_dir), "--backend", backend])
+        assert result.exit_code == 0
+        outputs[backend] = {
+            path.name: path.read_bytes() for path in sorted(output_dir.iterdir())
+        }
+    assert len(outputs["pyvcf"]) == 5
+    assert outputs["cyvcf2"] == outputs["pyvcf"]
+
+
+def test_unknown_reader_backend():
+    result = runner.invoke(app, vardict_single_calls[0] + ["--backend", "htslib"])
+    assert result.exit_code == 1
+    assert "Unknown reader backend htslib" in result.stdout
+
+
+@pytest.mark.parametrize("backend", ["pyvcf", "auto"])
+def test_compressed_vcfs(backend, tmp_path):
+    # a gzipped input is read transparently and --compress writes the same vcfs bgzipped
+    input_vcf = tmp_path / "single_test.vcf.gz"
+    with open("tests/data/vardict/single_test.vcf", "rb") as plain:
+        with gzip.open(input_vcf, "wb") as compressed:
+            shutil.copyfileobj(plain, compressed)
+    plain_dir = tmp_path / "plain"
+    compressed_dir = tmp_path / "compressed"
+    plain_dir.mkdir()
+    compressed_dir.mkdir()
+    call = vardict_single_calls[0][:-1]
+    result = runner.invoke(app, call + [str(plain_dir), "--backend", backend])
+    assert result.exit_code == 0
+    call[call.index("tests/data/vardict/single_test.vcf")] = str(input_vcf)
+    result = runner.invoke(
+        app, call + [str(compressed_dir), "--backend", backend, "--compress"]
+    )
+    assert result.exit_code == 0
+    for name in [
+        "single_test_STDfilter.vcf",
+        "single_test_STDfilter_complex.vcf",
+        "single_test_STDfilter_sorted.vcf",
+        "single_test_STDfilter_complex_sorted.vcf",
+    ]:
+        with gzip.open(compressed_dir / f"{name}.gz", "rb") as compressed:
+            assert compressed.read() == (plain_dir / name).read_bytes()
+    for name in [
+        "single_test_STDfilter_sorted",
+        "single_test_STDfilter_complex_sorted",
+    ]:
+        with gzip.open(compressed_dir / f"{name}.vcf.gz.tbi", "rb") as index:
+            assert index.read(4) == b"TBI\1"
+    assert not (compressed_dir / "single_test_STDfilter.vcf.gz.tbi").exists()
+    assert (compressed_dir / "single_test_STDfilter.txt").read_bytes() == (
+        plain_dir / "single_test_STDfilter.txt"
+    ).read_bytes()
+
+
+def test_tabix_index_requires_sorted_records(tmp_path):
+    writer = BgzfWriter(tmp_path / "unsorted.vcf.gz", index=True)
+    writer.write("#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n")
+    writer.write("1\t200\t.\tA\tT\t.\tPASS\t.\n")
+    with pytest.raises(ValueError, match="not sorted"):
+        writer.write("1\t100\t.\tA\tT\t.\tPASS\t.\n")
+    writer.write("2\t100\t.\tA\tT\t.\tPASS\t.\n")
+    with pytest.raises(ValueError, match="not contiguous"):
+        writer.write("1\t300\t.\tA\tT\t.\tPASS\t.\n")
+
+
+@pytest.mark.parametrize("run_records", [2, 1000])
+def test_sort_vcf_file(run_records, tmp_path):
+    header = [
+        "##fileformat=VCFv4.2\n",
+        "##contig=<ID=chr2,length=242193529>\n",
+        "##contig=<ID=chr10,length=133797422>\n",
+        "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n",
+    ]
+    records = [
+        f"{chrom}\t{pos}\t{name}\tA\tT\t.\tPASS\t.\n"
+        for chrom, pos, name in [
+            ("chrUn_gl000220", 5, "a"),
+            ("chr10", 30, "b"),
+            ("chrX", 2, "c"),
+            ("chr2", 40, "d"),
+            ("chr10", 30, "e"),
+            ("chr2", 7, "f"),
+            ("chr10", 1, "g"),
+        ]
+    ]
+    input_vcf = tmp_path / "unsorted.vcf"
+    input_vcf.write_text("".join(header + records))
+    output_vcf = sort_vcf_file(
+        input_vcf, tmp_path / "sorted.vcf", run_records=run_records
+    )
+    lines = output_vcf.read_text().splitlines(keepends=True)
+    assert lines[: len(header)] == header
+    # header contigs first, then the others in karyotypic order, ties kept in order
+    assert [line.split("\t")[2] for line in lines[len(header) :]] == list("fdgbeca")
+
+
+@pytest.mark.parametrize("call", vardict_single_calls + vardict_matched)
+def test_sorted_outputs_in_karyotypic_order(call, tmp_path):
+    result = runner.invoke(app, call[:-1] + [str(tmp_path), "--backend", "pyvcf"])
+    assert result.exit_code == 0
+    for path in tmp_path.glob("*_sorted.vcf"):
+        keys = [
+            (karyotypic_key(line.split("\t")[0]), int(line.split("\t")[1]))
+            for line in path.read_text().splitlines()
+            if not line.startswith("#")
+        ]
+        assert keys == sorted(keys)
+
+
+@pytest.mark.parametrize("call", vardict_single_calls + vardict_matched)
+def test_filter_by_contig(call, tmp_path):
+    # filtering the contigs of an indexed vcf in 3 processes gives the outputs of 1
+    input_vcf = call[call.index("--inputVcf") + 1]
+    indexed_vcf = tmp_path / os.path.basename(f"{input_vcf}.gz")
+    with open(input_vcf) as plain, BgzfWriter(indexed_vcf, index=True) as compressed:
+        shutil.copyfileobj(plain, compressed)
+    call = call[:-1]
+    call[call.index(input_vcf)] = str(indexed_vcf)
+    outputs = {}
+    for threads in ["1", "3"]:
+        output_dir = tmp_path / threads
+        output_dir.mkdir()
+        result = runner.invoke(
+            app, call + [str(output_dir), "--backend", "pyvcf", "--threads", threads]
+        )
+        assert result.exit_code == 0
+        outputs[threads] = {
+            path.name: path.read_bytes() for path in sorted(output_dir.iterdir())
+        }
+    assert len(outputs["1"]) == 5
+    assert outputs["3"] == outputs["1"]
+
+
+@pytest.mark.parametrize(
+    "input_vcf, sample_name",
+    [
+        ("tests/data/vardict/single_test.vcf", "Myeloid200-1"),
+        ("tests/data/vardict/case_control_test.vcf", "C-C1V52M-L001-d"),
+    ],
+)
+def test_filter_outputs_serialize(input_vcf, sample_name, tmp_path):
+    # records, padded or not, are serialized as vcf.Writer writes them
+    to_filter = var_sample(
+        input_vcf, str(tmp_path), sample_name, 0, 0, 0, 0, 1, False, "pyvcf"
+    )
+    expected = io.StringIO()
+    writer = vcf.Writer(expected, to_filter.vcf_reader)
+    expected.seek(0)
+    expected.truncate()
+    outputs = FilterOutputs(
+        to_filter.vcf_reader,
+        to_filter.vcf_out,
+        to_filter.vcf_complex_out,
+        to_filter.txt_out,
+        sample_name,
+    )
+    padded = 0
+    for site in to_filter.reader_backend:
+        record, complex_flag = to_filter.kept_record(site)
+        padded += complex_flag
+        writer.write_record(record)
+        assert outputs.serialize(record)[-1] == expected.getvalue()
+        expected.seek(0)
+        expected.truncate()
+    outputs.close()
+    assert padded > 0
@@ -3,6 +3,63 @@ import numpy
 import typer
 
 
+def build_interval_index(bed_df):
+    """builds a per chromosome index of bed intervals for containment queries
+
+    Intervals are sorted by start and paired with the running maximum of their
+    ends, so a position is inside some interval when the widest interval that
+    starts at or before it ends after it.
+
+    Args:
+        bed_df (pandas dataframe): a valid pandas bed file
+
+    Returns:
+        dict: chromosome -> (sorted starts, running max of ends) numpy arrays
+    """
+    index = {}
+    for chrom, intervals in bed_df.groupby("Chromosome", sort=False):
+        starts = intervals["Start_Position"].to_numpy(dtype=float)
+        ends = intervals["End_Position"].to_numpy(dtype=float)
+        order = numpy.argsort(starts, kind="stable")
+        # fmax ignores missing ends instead of propagating them down the index
+        index[chrom] = (starts[order], numpy.fmax.accumulate(ends[order]))
+    return index
+
+
+def query_interval_index(index, chromosomes, starts, ends):
+    """checks which variants are contained in an indexed bed interval
+
+    A variant is contained when Start_Position >= bed start and
+    End_Position < bed end, the same rule bedtools-like annotation used
+    in the original annotater.
+
+    Args:
+        index (dict): output of build_interval_index
+        chromosomes (array like): chromosome of every variant
+        starts (array like): Start_Position of every variant
+        ends (array like): End_Position of every variant
+
+    Returns:
+        numpy array: boolean mask, True where the variant is contained
+    """
+    starts = numpy.asarray(starts, dtype=float)
+    ends = numpy.asarray(ends, dtype=float)
+    hits = numpy.zeros(len(starts), dtype=bool)
+    groups = pd.Series(numpy.asarray(chromosomes)).groupby(
+        numpy.asarray(chromosomes), sort=False
+    )
+    for chrom, rows in groups.indices.items():
+        if chrom not in index:
+            continue
+        bed_starts, bed_max_ends = index[chrom]
+        position = numpy.searchsorted(bed_starts, starts[rows], side="right")
+        candidates = position > 0
+        hits[rows[candidates]] = (
+            bed_max_ends[position[candidates] - 1] > ends[rows[candidates]]
+        )
+    return hits
+
+
 def annotater(maf_df, bed_df, cname):
     """annotates a maf file based on a bed file
 
@@ -14,10 +71,28 @@ def annotater(maf_df, bed_df, cname):
     Returns:
         float: returns maf dataframe with added annotated column
     """
-    # TODO break down more
-    # sort both the input files
     # TODO handle 0 base case in bedfiles, add a base to bedfile. Maf is 1 based.
     # TODO Do this with an options over commandline: Start_Position + 1, End_Position + 1 for bedfile
+    index = build_interval_index(bed_df)
+    maf_df = maf_df.sort_values(
+        by=["Chromosome", "Start_Position", "End_Position"]
+    ).reset_index(drop=True)
+    hits = query_interval_index(
+        index,
+        maf_df["Chromosome"],
+        maf_df["Start_Position"],
+        maf_df["End_Position"],
+    )
+    maf_df[cname] = numpy.where(hits, "yes", "no")
+    return maf_df
+
+
+def _naive_annotater(maf_df, bed_df, cname):
+    """reference implementation of annotater, compares every variant to every interval.
+
+    Kept to check the interval index against and to benchmark it, see
+    benchmarks/bench_mafbybed.py. Requires every maf chromosome to be present in the bed.
+    """
     bed_df = bed_df.sort_values(by=["Chromosome", "Start_Position", "End_Position"])
     maf_df = maf_df.sort_values(by=["Chromosome", "Start_Position", "End_Position"])
     mafdf_sub = maf_df[
@@ -51,7 +126,6 @@ def annotater(maf_df, bed_df, cname):
             found = False
             while found is False and idb <= (len(subset_bed) - 1):
                 loc_bed = subset_bed[idb]
-                # TODO take advantage of sorted bed and maf
                 # logic for whether to include comment
                 include_logic = (
                     loc_maf["Start_Position"] >= loc_bed["Start_Position"]
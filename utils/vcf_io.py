@@ -0,0 +1,554 @@
+import contextlib
+import gzip
+import heapq
+import io
+import itertools
+import re
+import struct
+import tempfile
+import zlib
+
+# uncompressed bytes per BGZF block, as in htslib, so a deflated block always fits in 64 KiB
+BGZF_BLOCK_SIZE = 0xFF00
+
+# the empty block that terminates every BGZF file
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# tabix linear index windows are 16 kb
+TABIX_MIN_SHIFT = 14
+# tbi indexes address positions below 2^29, like any vcf of a human genome
+TABIX_MAX_POSITION = 1 << 29
+# bin holding the per reference metadata htslib writes after the real bins
+TABIX_META_BIN = 37450
+
+# records sorted in memory at once before a sorted run is spilled to disk
+SORT_RUN_RECORDS = 100_000
+
+CONTIG_ID = re.compile(r"^##contig=<.*?\bID=([^,>]+)")
+
+
+def is_gzipped(path):
+    """checks whether a file is gzip or bgzip compressed, from its magic bytes
+
+    Args:
+        path (str/path): file to check
+
+    Returns:
+        bool: True for gzip and bgzip files
+    """
+    with open(path, "rb") as handle:
+        return handle.read(2) == GZIP_MAGIC
+
+
+def open_vcf(path):
+    """opens a plain, gzip or bgzip vcf for reading as text
+
+    Compressed files are recognised from their content rather than the extension.
+    Pass the handle to PyVCF with compressed=False, as it is already decompressed.
+
+    Args:
+        path (str/path): vcf to read
+
+    Returns:
+        file: text handle of the vcf
+    """
+    if is_gzipped(path):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+    return open(path, "r")
+
+
+def open_vcf_output(path, index=False):
+    """opens a vcf for writing as text, bgzip compressed when path ends with .gz
+
+    Args:
+        path (str/path): vcf to write
+        index (bool): also write a tabix index next to a compressed vcf, path + ".tbi".
+            The records must then be written sorted by position within each contig.
+
+    Returns:
+        file: text handle for a PyVCF writer
+    """
+    if str(path).endswith(".gz"):
+        return BgzfWriter(path, index=index)
+    return open(path, "w")
+
+
+def compressed_name(path, compress):
+    """name of a vcf output, with a .gz suffix when it is written compressed"""
+    return f"{path}.gz" if compress else path
+
+
+def strip_vcf_extension(name):
+    """file name without its .vcf or .vcf.gz extension"""
+    if name.endswith(".gz"):
+        name = name[: -len(".gz")]
+    return name.rsplit(".", 1)[0] if "." in name else name
+
+
+class BgzfWriter:
+    """text file that writes a bgzip (BGZF) compressed file and, optionally, its tabix index
+
+    BGZF is a series of gzip members of at most 64 KiB, so any gzip reader can read the
+    output and tabix/htslib can seek into it. The index is built while the records are
+    written, from the virtual offset (compressed block offset << 16 | offset within the
+    block) of every line.
+    """
+
+    def __init__(self, path, index=False, compresslevel=6):
+        self.path = str(path)
+        self.handle = open(self.path, "wb")
+        self.compresslevel = compresslevel
+        self.buffer = bytearray()
+        self.block_offset = 0
+        self.indexer = TabixIndexer() if index else None
+        self.line = []
+        self.line_start = None
+
+    def tell(self):
+        """virtual offset of the next byte written"""
+        return (self.block_offset << 16) | len(self.buffer)
+
+    def write(self, text):
+        if self.indexer is None:
+            self.write_bytes(text.encode())
+            return len(text)
+        lines = text.split("\n")
+        for i, piece in enumerate(lines):
+            if i < len(lines) - 1:
+                piece += "\n"
+            elif not piece:
+                break
+            if self.line_start is None:
+                self.line_start = self.tell()
+            self.write_bytes(piece.encode())
+            self.line.append(piece)
+            if piece.endswith("\n"):
+                self.__index_line()
+        return len(text)
+
+    def write_bytes(self, data):
+        data = memoryview(data)
+        while len(data):
+            room = BGZF_BLOCK_SIZE - len(self.buffer)
+            self.buffer += data[:room]
+            data = data[room:]
+            if len(self.buffer) >= BGZF_BLOCK_SIZE:
+                self.__write_block()
+
+    def flush(self):
+        self.handle.flush()
+
+    def close(self):
+        if self.handle.closed:
+            return
+        if self.line:
+            self.__index_line()
+        if self.buffer:
+            self.__write_block()
+        self.handle.write(BGZF_EOF)
+        self.handle.close()
+        if self.indexer is not None:
+            self.indexer.write(self.path + ".tbi")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __index_line(self):
+        line, start = "".join(self.line), self.line_start
+        self.line = []
+        self.line_start = None
+        if not line.startswith("#"):
+            self.indexer.add(line, start, self.tell())
+
+    def __write_block(self):
+        data = bytes(self.buffer)
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+        deflated = compressor.compress(data) + compressor.flush()
+        # gzip header with the BC extra field holding the block size - 1
+        block_size = 18 + len(deflated) + 8
+        block = (
+            struct.pack(
+                "<4BI2BH2BHH",
+                0x1F,
+                0x8B,
+                8,
+                4,
+                0,
+                0,
+                0xFF,
+                6,
+                ord("B"),
+                ord("C"),
+                2,
+                block_size - 1,
+            )
+            + deflated
+            + struct.pack("<2I", zlib.crc32(data), len(data))
+        )
+        self.handle.write(block)
+        self.block_offset += len(block)
+        self.buffer = bytearray()
+
+
+def reg2bin(beg, end):
+    """tabix/BAM bin of the 0-based, end exclusive interval [beg, end)"""
+    end -= 1
+    if beg >> 14 == end >> 14:
+        return ((1 << 15) - 1) // 7 + (beg >> 14)
+    if beg >> 17 == end >> 17:
+        return ((1 << 12) - 1) // 7 + (beg >> 17)
+    if beg >> 20 == end >> 20:
+        return ((1 << 9) - 1) // 7 + (beg >> 20)
+    if beg >> 23 == end >> 23:
+        return ((1 << 6) - 1) // 7 + (beg >> 23)
+    if beg >> 26 == end >> 26:
+        return ((1 << 3) - 1) // 7 + (beg >> 26)
+    return 0
+
+
+class _ReferenceIndex:
+    def __init__(self, first_offset):
+        self.bins = {}
+        self.linear = []
+        self.first_offset = first_offset
+        self.last_offset = first_offset
+        self.n_records = 0
+        self.chunk_bin = None
+        self.chunk_start = first_offset
+        self.last_beg = -1
+
+    def add(self, beg, end, start, stop):
+        bin_ = reg2bin(beg, end)
+        if bin_ != self.chunk_bin:
+            self.close_chunk(start)
+            self.chunk_bin = bin_
+            self.chunk_start = start
+        first_window = beg >> TABIX_MIN_SHIFT
+        last_window = (end - 1) >> TABIX_MIN_SHIFT
+        if last_window >= len(self.linear):
+            self.linear.extend([None] * (last_window + 1 - len(self.linear)))
+        for window in range(first_window, last_window + 1):
+            if self.linear[window] is None:
+                self.linear[window] = start
+        self.last_offset = stop
+        self.last_beg = beg
+        self.n_records += 1
+
+    def close_chunk(self, stop):
+        if self.chunk_bin is None:
+            return
+        chunks = self.bins.setdefault(self.chunk_bin, [])
+        if chunks and chunks[-1][1] == self.chunk_start:
+            chunks[-1][1] = stop
+        else:
+            chunks.append([self.chunk_start, stop])
+
+    def finish(self):
+        self.close_chunk(self.last_offset)
+        self.chunk_bin = None
+        # windows without records point at the previous window, leading ones at the first record
+        previous = self.first_offset
+        for window, offset in enumerate(self.linear):
+            if offset is None:
+                self.linear[window] = previous
+            previous = self.linear[window]
+
+
+class TabixIndexer:
+    """builds the tabix (.tbi) index of a bgzip compressed vcf, record by record"""
+
+    def __init__(self):
+        self.references = {}
+        self.current = None
+
+    def add(self, line, start, stop):
+        """adds a vcf record
+
+        Args:
+            line (str): the record
+            start (int): virtual offset of the start of the record
+            stop (int): virtual offset just past the end of the record
+
+        Raises:
+            ValueError: if the records are not sorted by position within contiguous contigs
+        """
+        fields = line.split("\t", 8)
+        chrom = fields[0]
+        beg = int(fields[1]) - 1
+        end = beg + len(fields[3])
+        if len(fields) > 7:
+            info_end = _info_end(fields[7])
+            if info_end is not None and info_end > beg:
+                end = info_end
+        if end > TABIX_MAX_POSITION:
+            raise ValueError(
+                f"cannot index the vcf, {chrom}:{beg + 1} is beyond the {TABIX_MAX_POSITION} positions of a tabix index"
+            )
+        if chrom not in self.references:
+            if self.current is not None:
+                self.current.finish()
+            self.current = self.references[chrom] = _ReferenceIndex(start)
+        elif self.references[chrom] is not self.current:
+            raise ValueError(
+                f"cannot index the vcf, the records of contig {chrom} are not contiguous"
+            )
+        if beg < self.current.last_beg:
+            raise ValueError(
+                f"cannot index the vcf, the records of contig {chrom} are not sorted by position"
+            )
+        self.current.add(beg, end, start, stop)
+
+    def write(self, path):
+        """writes the bgzip compressed tabix index
+
+        Args:
+            path (str/path): index file, usually the vcf path + ".tbi"
+        """
+        if self.current is not None:
+            self.current.finish()
+        names = b"".join(name.encode() + b"\0" for name in self.references)
+        # magic, n_ref, format (2 = vcf), col_seq, col_beg, col_end, meta char, skip
+        header = b"TBI\1" + struct.pack(
+            "<8i", len(self.references), 2, 1, 2, 0, ord("#"), 0, len(names)
+        )
+        with BgzfWriter(path) as index:
+            index.write_bytes(header + names)
+            for reference in self.references.values():
+                index.write_bytes(struct.pack("<i", len(reference.bins) + 1))
+                for bin_, chunks in reference.bins.items():
+                    index.write_bytes(struct.pack("<Ii", bin_, len(chunks)))
+                    for chunk in chunks:
+                        index.write_bytes(struct.pack("<2Q", *chunk))
+                index.write_bytes(
+                    struct.pack(
+                        "<Ii4Q",
+                        TABIX_META_BIN,
+                        2,
+                        reference.first_offset,
+                        reference.last_offset,
+                        reference.n_records,
+                        0,
+                    )
+                )
+                index.write_bytes(struct.pack("<i", len(reference.linear)))
+                index.write_bytes(
+                    struct.pack(f"<{len(reference.linear)}Q", *reference.linear)
+                )
+            # records without coordinates
+            index.write_bytes(struct.pack("<Q", 0))
+
+
+def _info_end(info):
+    for field in info.split(";"):
+        if field.startswith("END="):
+            try:
+                return int(field[len("END=") :])
+            except ValueError:
+                return None
+    return None
+
+
+def karyotypic_key(chrom):
+    """sort key putting contigs in karyotypic order: 1-22, X, Y, M/MT, then the others by name
+
+    A chr prefix is ignored, so chr2 comes before chr10 and both after 1.
+
+    Args:
+        chrom (str): contig name
+
+    Returns:
+        tuple: sort key
+    """
+    name = chrom[3:] if chrom.lower().startswith("chr") else chrom
+    if name.isdigit():
+        return (0, int(name), "")
+    if name.upper() in ("X", "Y"):
+        return (1, "XY".index(name.upper()), "")
+    if name.upper() in ("M", "MT"):
+        return (2, 0, "")
+    return (3, 0, chrom)
+
+
+class ContigOrder:
+    """sort key of vcf records: contigs in the order of the ##contig header lines, then position
+
+    Contigs missing from the header come after the declared ones, in karyotypic order.
+    """
+
+    def __init__(self, contigs=()):
+        self.ranks = {}
+        for contig in contigs:
+            self.ranks.setdefault(contig, (len(self.ranks), (0, 0, "")))
+        self.n_declared = len(self.ranks)
+
+    @classmethod
+    def from_header(cls, header_lines):
+        """builds the order from the ##contig lines of a vcf header"""
+        contigs = []
+        for line in header_lines:
+            match = CONTIG_ID.match(line)
+            if match:
+                contigs.append(match.group(1))
+        return cls(contigs)
+
+    def rank(self, chrom):
+        if chrom not in self.ranks:
+            self.ranks[chrom] = (self.n_declared, karyotypic_key(chrom))
+        return self.ranks[chrom]
+
+    def key(self, chrom, pos):
+        return (self.rank(chrom), pos)
+
+    def line_key(self, line):
+        chrom, pos, _ = line.split("\t", 2)
+        return (self.rank(chrom), int(pos))
+
+
+class OrderTracker:
+    """checks whether records are written in ContigOrder, so sorting them can be skipped"""
+
+    def __init__(self, order):
+        self.order = order
+        self.last = None
+        self.sorted = True
+
+    def add(self, chrom, pos):
+        key = self.order.key(chrom, pos)
+        if self.last is not None and key < self.last:
+            self.sorted = False
+        self.last = key
+
+
+def sort_vcf_file(
+    input_vcf,
+    output_vcf,
+    presorted=False,
+    index=True,
+    run_records=SORT_RUN_RECORDS,
+    tmp_dir=None,
+):
+    """sorts the records of a vcf by contig, in header order, and position, with bounded memory
+
+    The header and the record lines are copied as they are. Records are sorted in runs of
+    run_records lines, spilled to temporary files when there is more than one run and
+    merged, so at most run_records records are in memory. The sort is stable: records at
+    the same position keep their order.
+
+    Args:
+        input_vcf (str/path): vcf to sort, plain or compressed
+        output_vcf (str/path): sorted vcf, bgzip compressed when it ends with .gz
+        presorted (bool): the records are known to be sorted already, copy them through
+        index (bool): write a tabix index for a compressed output
+        run_records (int): records sorted in memory at once
+        tmp_dir (str/path, optional): directory of the spilled runs, the system default otherwise
+
+    Returns:
+        str/path: output_vcf
+    """
+    with contextlib.ExitStack() as stack:
+        handle = stack.enter_context(open_vcf(input_vcf))
+        header = []
+        for line in handle:
+            if not line.startswith("#"):
+                records = itertools.chain([line], handle)
+                break
+            header.append(line)
+        else:
+            records = iter(())
+        output = stack.enter_context(open_vcf_output(output_vcf, index=index))
+        output.write("".join(header))
+        records = (line if line.endswith("\n") else line + "\n" for line in records)
+        if not presorted:
+            key = ContigOrder.from_header(header).line_key
+            spill_dir = stack.enter_context(tempfile.TemporaryDirectory(dir=tmp_dir))
+            records = _merge_sorted_runs(records, key, run_records, spill_dir, stack)
+        for line in records:
+            output.write(line)
+    return output_vcf
+
+
+def _merge_sorted_runs(lines, key, run_records, spill_dir, stack):
+    runs = []
+    while True:
+        run = sorted(itertools.islice(lines, run_records), key=key)
+        if len(run) < run_records and not runs:
+            # everything fitted in memory
+            return iter(run)
+        if not run:
+            break
+        with tempfile.NamedTemporaryFile(
+            "w", dir=spill_dir, suffix=".vcf", delete=False
+        ) as spill:
+            spill.writelines(run)
+        runs.append(stack.enter_context(open(spill.name)))
+    # heapq.merge takes ties from the earlier run first, which keeps the sort stable
+    return heapq.merge(*runs, key=key)
+
+
+def read_tabix_contigs(index_path):
+    """reads the contigs of a tabix index and where their records start
+
+    Args:
+        index_path (str/path): the .tbi index of a bgzip compressed vcf
+
+    Returns:
+        dict: contig -> virtual offset of its first record, in the order of the vcf
+    """
+    with gzip.open(index_path, "rb") as handle:
+        data = handle.read()
+    if data[:4] != b"TBI\1":
+        raise ValueError(f"{index_path} is not a tabix index")
+    n_ref = struct.unpack_from("<i", data, 4)[0]
+    l_nm = struct.unpack_from("<i", data, 32)[0]
+    names = data[36 : 36 + l_nm].split(b"\0")[:n_ref]
+    offset = 36 + l_nm
+    contigs = {}
+    for name in names:
+        first = None
+        n_bin = struct.unpack_from("<i", data, offset)[0]
+        offset += 4
+        for _ in range(n_bin):
+            bin_, n_chunk = struct.unpack_from("<Ii", data, offset)
+            offset += 8
+            if bin_ != TABIX_META_BIN:
+                for chunk in range(n_chunk):
+                    start = struct.unpack_from("<Q", data, offset + 16 * chunk)[0]
+                    first = start if first is None else min(first, start)
+            offset += 16 * n_chunk
+        n_intv = struct.unpack_from("<i", data, offset)[0]
+        offset += 4 + 8 * n_intv
+        if first is not None:
+            contigs[name.decode()] = first
+    return dict(sorted(contigs.items(), key=lambda contig: contig[1]))
+
+
+def iter_vcf_contig(path, contig, start):
+    """yields the header and the records of one contig of a bgzip compressed vcf
+
+    Args:
+        path (str/path): bgzip compressed vcf, sorted so each contig is contiguous
+        contig (str): contig to read
+        start (int): virtual offset of its first record, from read_tabix_contigs
+
+    Yields:
+        str: the header lines, then the record lines of contig
+    """
+    with open_vcf(path) as handle:
+        for line in handle:
+            if not line.startswith("#"):
+                break
+            yield line
+    with open(path, "rb") as raw:
+        raw.seek(start >> 16)
+        with gzip.GzipFile(fileobj=raw) as compressed:
+            compressed.read(start & 0xFFFF)
+            prefix = contig + "\t"
+            for line in io.TextIOWrapper(compressed, encoding="utf-8"):
+                if not line.startswith(prefix):
+                    break
+                yield line